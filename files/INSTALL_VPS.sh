@@ -142,6 +142,9 @@ echo "📦 Instalando dependências Python com versões compatíveis..."
 echo "   - Flask..."
 sudo -u n8n /opt/tts-env/bin/pip install flask==3.0.0
 
+echo "   - Gunicorn (servidor de produção, vários workers)..."
+sudo -u n8n /opt/tts-env/bin/pip install gunicorn==26.2.0
+
 echo "   - PyTorch 2.1 (compatível com XTTS_v2)..."
 sudo -u n8n /opt/tts-env/bin/pip install torch==2.1.0 torchaudio==2.1.0
 
@@ -157,6 +160,9 @@ sudo -u n8n /opt/tts-env/bin/pip install whisper-timestamped==1.14.2
 echo "   - Pillow (para MoviePy processar imagens)..."
 sudo -u n8n /opt/tts-env/bin/pip install Pillow==9.5.0
 
+echo "   - NumPy (efeitos do modo motion e tempo dos slides)..."
+sudo -u n8n /opt/tts-env/bin/pip install numpy==1.24.3
+
 # 11.1. CORREÇÃO CRÍTICA: Instala versão correta do transformers para XTTS_v2
 echo "   - Corrigindo transformers para compatibilidade com XTTS_v2..."
 sudo -u n8n /opt/tts-env/bin/pip uninstall -y transformers 2>/dev/null || true
@@ -220,11 +226,17 @@ Type=simple
 User=n8n
 Group=n8n
 WorkingDirectory=/home/n8n/files
-ExecStart=/opt/tts-env/bin/python3 /home/n8n/files/server.py
+ExecStart=/opt/tts-env/bin/gunicorn -c /home/n8n/files/gunicorn.conf.py wsgi:app
+ExecReload=/bin/kill -HUP $MAINPID
 Restart=always
 RestartSec=10
+# Ao parar, o executor espera os jobs em execução (DRAIN_TIMEOUT) antes de sair
+KillMode=mixed
+TimeoutStopSec=660
 Environment=PYTHONPATH=/home/n8n/files
 Environment=PYTHONUNBUFFERED=1
+Environment=WEB_WORKERS=4
+Environment=DRAIN_TIMEOUT=600
 
 [Install]
 WantedBy=multi-user.target
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Alinhamento texto/áudio (frases e palavras com tempos)
+O próprio TTS sabe onde cada frase começa e termina no WAV (nº de amostras de
+cada chunk), então o alinhamento sai da síntese, sem rodar o Whisper de novo,
+e fica ao lado do áudio: audios/audio_<id>.align.json.
+
+Dentro de cada frase, o tempo é repartido entre as palavras proporcionalmente
+ao tamanho de cada uma.
+
+Para áudios que não foram gerados aqui (sem sidecar), há um alinhador reserva
+opcional com whisper_timestamped, usado só se estiver instalado.
+
+Configuração (variáveis de ambiente):
+  - ALIGN_FALLBACK: "0" desliga o alinhador reserva (padrão "1")
+  - ALIGN_WHISPER_MODEL: modelo do whisper_timestamped (padrão "base")
+"""
+
+import os
+import json
+import wave
+
+# ========================================
+# CONFIGURAÇÕES
+# ========================================
+
+ALIGNMENT_VERSION = 1
+ALIGNMENT_SUFFIX = ".align.json"
+ALIGN_FALLBACK = os.environ.get("ALIGN_FALLBACK", "1") == "1"
+ALIGN_WHISPER_MODEL = os.environ.get("ALIGN_WHISPER_MODEL", "base")
+ALIGN_LANGUAGE = "pt"
+
+# ========================================
+# SIDECAR
+# ========================================
+
+def alignment_path(audio_path):
+    """audios/audio_<id>.wav -> audios/audio_<id>.align.json"""
+    return os.path.splitext(audio_path)[0] + ALIGNMENT_SUFFIX
+
+def _split_words(text, start, end):
+    """Tempos das palavras da frase, proporcionais ao nº de caracteres (+1 da pausa)"""
+    words = text.split()
+    if not words:
+        return []
+    weights = [len(word) + 1 for word in words]
+    scale = (end - start) / sum(weights)
+    result, t = [], start
+    for word, weight in zip(words, weights):
+        result.append({"word": word, "start": round(t, 3), "end": round(t + weight * scale, 3)})
+        t += weight * scale
+    return result
+
+def build_alignment(sentences, segments, sample_rate, total_frames=None, source="tts"):
+    """
+    Alinhamento a partir dos chunks da síntese
+
+    Args:
+        sentences: texto de cada frase (como deve aparecer na legenda)
+        segments: (amostra inicial, nº de amostras) de cada frase no WAV final
+        total_frames: nº de amostras do WAV (padrão: fim do último segmento)
+    """
+    if len(sentences) != len(segments):
+        raise ValueError(f"{len(sentences)} frases para {len(segments)} segmentos de áudio")
+    items = []
+    for text, (start_frame, n_frames) in zip(sentences, segments):
+        start = start_frame / sample_rate
+        end = (start_frame + n_frames) / sample_rate
+        items.append({"text": text, "start": round(start, 3), "end": round(end, 3),
+                      "words": _split_words(text, start, end)})
+    if total_frames is None:
+        total_frames = sum(segments[-1]) if segments else 0
+    return {
+        "version": ALIGNMENT_VERSION,
+        "source": source,
+        "sample_rate": sample_rate,
+        "frames": total_frames,
+        "duration": round(total_frames / sample_rate, 3),
+        "sentences": items,
+    }
+
+def write_alignment(audio_path, alignment):
+    """Grava o sidecar de forma atômica"""
+    path = alignment_path(audio_path)
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(alignment, f, ensure_ascii=False)
+    os.replace(tmp, path)
+    return path
+
+def _wav_frames(audio_path):
+    try:
+        with wave.open(audio_path, "rb") as wav:
+            return wav.getnframes()
+    except (OSError, EOFError, wave.Error):
+        return None
+
+def read_alignment(audio_path):
+    """Sidecar do áudio, ou None se não existir ou não corresponder ao WAV atual"""
+    path = alignment_path(audio_path)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, encoding="utf-8") as f:
+            alignment = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if alignment.get("version") != ALIGNMENT_VERSION:
+        return None
+    frames = _wav_frames(audio_path)
+    if frames is not None and alignment.get("frames") not in (None, frames):
+        print(f"⚠️ Alinhamento desatualizado para {os.path.basename(audio_path)} - ignorado")
+        return None
+    return alignment
+
+# ========================================
+# ALINHADOR RESERVA (WHISPER)
+# ========================================
+
+def whisper_alignment(audio_path):
+    """Alinha com whisper_timestamped (None se não estiver instalado)"""
+    try:
+        import whisper_timestamped as whisper
+    except ImportError:
+        return None
+
+    print(f"🔎 Alinhando {os.path.basename(audio_path)} com whisper_timestamped ({ALIGN_WHISPER_MODEL})...")
+    model = whisper.load_model(ALIGN_WHISPER_MODEL, device="cpu")
+    result = whisper.transcribe(model, whisper.load_audio(audio_path), language=ALIGN_LANGUAGE)
+
+    sentences = []
+    for segment in result.get("segments", []):
+        words = [{"word": w["text"].strip(), "start": round(w["start"], 3), "end": round(w["end"], 3)}
+                 for w in segment.get("words", []) if w.get("text", "").strip()]
+        text = segment.get("text", "").strip()
+        if text:
+            sentences.append({"text": text, "start": round(segment["start"], 3),
+                              "end": round(segment["end"], 3),
+                              "words": words or _split_words(text, segment["start"], segment["end"])})
+
+    with wave.open(audio_path, "rb") as wav:
+        sample_rate, frames = wav.getframerate(), wav.getnframes()
+    return {
+        "version": ALIGNMENT_VERSION,
+        "source": "whisper",
+        "sample_rate": sample_rate,
+        "frames": frames,
+        "duration": round(frames / sample_rate, 3) if frames else None,
+        "sentences": sentences,
+    }
+
+def load_alignment(audio_path):
+    """
+    Alinhamento do áudio: sidecar da síntese ou, sem ele, o alinhador reserva
+    (resultado gravado como sidecar para os próximos vídeos). None se nenhum existir.
+    """
+    alignment = read_alignment(audio_path)
+    if alignment is not None or not ALIGN_FALLBACK:
+        return alignment
+    alignment = whisper_alignment(audio_path)
+    if alignment is not None:
+        write_alignment(audio_path, alignment)
+    return alignment
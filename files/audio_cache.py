@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cache de áudios endereçado por conteúdo
+Textos com as mesmas frases, mesmo modo de síntese e mesmo silêncio entre
+frases, com a mesma voz, idioma e modelo, geram sempre o mesmo WAV, então o
+resultado é guardado em cache/audio/<sha256>.wav e reaproveitado por hardlink (ou cópia). O sidecar de
+alinhamento (legendas) acompanha o WAV: <sha256>.align.json.
+
+Política de remoção: LRU limitado por tamanho total (AUDIO_CACHE_MAX_MB).
+O índice (tamanho e último uso de cada chave) e os contadores ficam em tabelas
+do banco de jobs (job_store.py), então todos os workers do gunicorn enxergam o
+mesmo cache; o arquivo em disco é a fonte da verdade para hit/miss.
+"""
+
+import os
+import json
+import time
+import shutil
+import sqlite3
+import threading
+
+from hashing import file_sha256, text_sha256
+from job_store import JOB_DB_PATH
+from create_audio import split_sentence_pairs, TTS_SENTENCE_SILENCE_MS, LANGUAGE, MODEL_NAME
+from speaker_cache import voice_sample_path
+from alignment import alignment_path
+
+# ========================================
+# CONFIGURAÇÕES
+# ========================================
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+AUDIO_CACHE_DIR = os.path.join(BASE_DIR, "cache", "audio")
+AUDIO_CACHE_MAX_MB = int(os.environ.get("AUDIO_CACHE_MAX_MB", "2048"))  # 0 = desativado
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS audio_cache (
+    cache_dir   TEXT NOT NULL,
+    key         TEXT NOT NULL,
+    size        INTEGER NOT NULL,
+    last_used   REAL NOT NULL,
+    PRIMARY KEY (cache_dir, key)
+);
+CREATE INDEX IF NOT EXISTS idx_audio_cache_lru ON audio_cache (cache_dir, last_used);
+CREATE TABLE IF NOT EXISTS audio_cache_stats (
+    cache_dir   TEXT NOT NULL,
+    name        TEXT NOT NULL,
+    value       INTEGER NOT NULL,
+    PRIMARY KEY (cache_dir, name)
+);
+"""
+
+# ========================================
+# FUNÇÕES AUXILIARES
+# ========================================
+
+def link_or_copy(src, dst):
+    """Hardlink atômico de src em dst (cópia se o filesystem não suportar)"""
+    tmp = f"{dst}.tmp{os.getpid()}.{threading.get_ident()}"
+    try:
+        os.link(src, tmp)
+    except OSError:
+        shutil.copyfile(src, tmp)
+    os.replace(tmp, dst)
+
+# ========================================
+# CACHE
+# ========================================
+
+class AudioCache:
+    """
+    Cache LRU de WAVs em disco com contadores de hit/miss
+    (índice compartilhado no SQLite, uma conexão por thread)
+    """
+
+    def __init__(self, cache_dir=AUDIO_CACHE_DIR, max_bytes=AUDIO_CACHE_MAX_MB * 1024 * 1024,
+                 db_path=JOB_DB_PATH):
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.max_bytes = max_bytes
+        self.db_path = db_path
+        self._local = threading.local()
+        if self.enabled:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._conn().executescript(SCHEMA)
+            self._load_index()
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.wav")
+
+    def _load_index(self):
+        """Registra no índice os WAVs que já estão em disco (mtime = último uso)"""
+        rows = []
+        for fname in os.listdir(self.cache_dir):
+            if not fname.endswith(".wav"):
+                continue
+            try:
+                st = os.stat(os.path.join(self.cache_dir, fname))
+            except OSError:
+                continue
+            rows.append((self.cache_dir, fname[:-4], st.st_size, st.st_mtime))
+        self._conn().executemany(
+            "INSERT OR IGNORE INTO audio_cache (cache_dir, key, size, last_used) VALUES (?, ?, ?, ?)",
+            rows)
+
+    def _count(self, name):
+        self._conn().execute(
+            "INSERT INTO audio_cache_stats (cache_dir, name, value) VALUES (?, ?, 1) "
+            "ON CONFLICT (cache_dir, name) DO UPDATE SET value = value + 1",
+            (self.cache_dir, name))
+
+    def key(self, text, voice="default", sentence_mode=False, silence_ms=None):
+        """
+        Chave do áudio: frases (originais e sanitizadas) + modo de síntese + silêncio
+        efetivo entre frases + hash do sample + idioma + modelo
+
+        A pontuação removida na sanitização decide onde as frases são cortadas e o
+        texto das legendas (alinhamento), então textos que só diferem nela não
+        compartilham o WAV. Fora do modo por frase o silêncio é sempre
+        TTS_SENTENCE_SILENCE_MS (create_audio.synthesize_sentences).
+        """
+        pairs = split_sentence_pairs(text)
+        if not sentence_mode or silence_ms is None:
+            silence_ms = TTS_SENTENCE_SILENCE_MS
+        if len(pairs) < 2:
+            silence_ms = 0  # Uma frase só: não há pausa entre frases
+        return text_sha256(json.dumps(pairs, ensure_ascii=False),
+                           "sentence" if sentence_mode else "full", silence_ms,
+                           file_sha256(voice_sample_path(voice)), LANGUAGE, MODEL_NAME)
+
+    def lookup(self, key, dest_path):
+        """Se o WAV da chave estiver em disco, materializa em dest_path e retorna True"""
+        if not self.enabled:
+            return False
+        path = self._path(key)
+        try:
+            os.utime(path)  # Marca uso recente (persistente entre reinícios)
+            size = os.path.getsize(path)
+            link_or_copy(path, dest_path)
+            self._copy_sidecar(path, dest_path)
+            hit = True
+        except OSError:
+            hit = False  # Nunca gerado ou removido por outro worker
+
+        conn = self._conn()
+        if hit:
+            conn.execute(
+                "INSERT INTO audio_cache (cache_dir, key, size, last_used) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (cache_dir, key) DO UPDATE SET last_used = excluded.last_used",
+                (self.cache_dir, key, size, time.time()))
+        else:
+            conn.execute("DELETE FROM audio_cache WHERE cache_dir = ? AND key = ?",
+                         (self.cache_dir, key))
+        self._count("hits" if hit else "misses")
+        return hit
+
+    def store(self, key, src_path):
+        """Adiciona o WAV gerado ao cache e aplica a política de tamanho"""
+        if not self.enabled or not os.path.exists(src_path):
+            return
+        link_or_copy(src_path, self._path(key))
+        self._copy_sidecar(src_path, self._path(key))
+        self._conn().execute(
+            "INSERT OR REPLACE INTO audio_cache (cache_dir, key, size, last_used) VALUES (?, ?, ?, ?)",
+            (self.cache_dir, key, os.path.getsize(src_path), time.time()))
+        self._evict()
+
+    def stats(self):
+        conn = self._conn()
+        if self.enabled:
+            entries, total = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM audio_cache WHERE cache_dir = ?",
+                (self.cache_dir,)).fetchone()
+            counters = dict(conn.execute(
+                "SELECT name, value FROM audio_cache_stats WHERE cache_dir = ?", (self.cache_dir,)))
+        else:
+            entries, total, counters = 0, 0, {}
+        hits, misses = counters.get("hits", 0), counters.get("misses", 0)
+        lookups = hits + misses
+        return {
+            "enabled": self.enabled,
+            "entries": entries,
+            "size_mb": round(total / (1024 * 1024), 2),
+            "max_mb": round(self.max_bytes / (1024 * 1024), 2),
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / lookups, 3) if lookups else None,
+            "evictions": counters.get("evictions", 0),
+        }
+
+    def _copy_sidecar(self, src_path, dst_path):
+        """Leva junto o alinhamento do WAV (ou remove um sidecar antigo no destino)"""
+        src_sidecar, dst_sidecar = alignment_path(src_path), alignment_path(dst_path)
+        if os.path.exists(src_sidecar):
+            link_or_copy(src_sidecar, dst_sidecar)
+        elif os.path.exists(dst_sidecar):
+            os.remove(dst_sidecar)
+
+    def _evict(self):
+        """Remove as chaves menos usadas até o total caber em max_bytes (mantém ao menos uma)"""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM audio_cache WHERE cache_dir = ?",
+                                 (self.cache_dir,)).fetchone()[0]
+            evicted = []
+            if total > self.max_bytes:
+                rows = conn.execute("SELECT key, size FROM audio_cache WHERE cache_dir = ? "
+                                    "ORDER BY last_used", (self.cache_dir,)).fetchall()
+                for key, size in rows[:-1]:
+                    if total <= self.max_bytes:
+                        break
+                    evicted.append(key)
+                    total -= size
+                conn.executemany("DELETE FROM audio_cache WHERE cache_dir = ? AND key = ?",
+                                 [(self.cache_dir, key) for key in evicted])
+                for _ in evicted:
+                    self._count("evictions")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        for key in evicted:
+            for path in (self._path(key), alignment_path(self._path(key))):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
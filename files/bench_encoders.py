@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark dos perfis de encoder
+Renderiza o mesmo slideshow sintético (imagens testsrc2 + áudio senoidal,
+gerados pelo próprio ffmpeg) com cada perfil e mostra tempo de encode,
+fps efetivo e tamanho do arquivo.
+
+Uso: python3 bench_encoders.py [--slides 12] [--duration 60] [--profiles draft,social]
+                               [--mode single|still] [--x265] [--json resultado.json]
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import subprocess
+import tempfile
+
+import progress
+from encoder_profiles import ENCODER_PROFILES, encoder_available
+from create_video import render, FPS, SCALE_FILTER, VIDEO_WIDTH, VIDEO_HEIGHT
+
+# ========================================
+# DADOS SINTÉTICOS
+# ========================================
+
+def make_slides(work_dir, count):
+    """Gera 'count' imagens diferentes (1080x1920) com o testsrc2 do ffmpeg"""
+    pattern = os.path.join(work_dir, "slide_%03d.jpg")
+    subprocess.run([
+        'ffmpeg', '-y', '-loglevel', 'error',
+        '-f', 'lavfi', '-i', f'testsrc2=s={VIDEO_WIDTH}x{VIDEO_HEIGHT}:r=1',
+        '-frames:v', str(count), '-q:v', '2', pattern
+    ], check=True)
+    return sorted(os.path.join(work_dir, f) for f in os.listdir(work_dir) if f.startswith("slide_"))
+
+def make_audio(work_dir, duration):
+    """WAV mono 24kHz com um tom de 440Hz (mesmo formato do XTTS)"""
+    path = os.path.join(work_dir, "audio.wav")
+    subprocess.run([
+        'ffmpeg', '-y', '-loglevel', 'error',
+        '-f', 'lavfi', '-i', f'sine=frequency=440:sample_rate=24000:duration={duration}',
+        '-ac', '1', path
+    ], check=True)
+    return path
+
+def write_filelist(work_dir, slides, duration):
+    path = os.path.join(work_dir, "filelist.txt")
+    img_duration = duration / len(slides)
+    with open(path, 'w') as f:
+        for slide in slides:
+            f.write(f"file '{slide}'\n")
+            f.write(f"duration {img_duration}\n")
+        f.write(f"file '{slides[-1]}'\n")
+    return path
+
+# ========================================
+# BENCHMARK
+# ========================================
+
+def run(profiles, codecs, slides_count, duration, mode="single"):
+    work_dir = tempfile.mkdtemp(prefix="bench_encoders_")
+    results = []
+    try:
+        print(f"🧪 Gerando slideshow sintético: {slides_count} slides, {duration}s de áudio...")
+        slides = make_slides(work_dir, slides_count)
+        audio = make_audio(work_dir, duration)
+        filelist = write_filelist(work_dir, slides, duration)
+        frames = int(duration * FPS)
+
+        for codec in codecs:
+            for profile in profiles:
+                output = os.path.join(work_dir, f"out_{profile}_{codec}.mp4")
+                t0 = time.time()
+                render(filelist, audio, output, mode=mode, video_filter=SCALE_FILTER,
+                       duration=duration, profile=profile, codec=codec, frames=slides,
+                       durations=[duration / len(slides)] * len(slides))
+                elapsed = time.time() - t0
+                size = os.path.getsize(output)
+                results.append({
+                    "mode": mode,
+                    "profile": profile,
+                    "codec": codec,
+                    "encode_seconds": round(elapsed, 2),
+                    "fps": round(frames / elapsed, 1),
+                    "realtime_factor": round(duration / elapsed, 2),
+                    "size_mb": round(size / (1024 * 1024), 2),
+                    "bitrate_kbps": round(size * 8 / duration / 1000),
+                })
+                os.remove(output)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+def print_table(results):
+    print(f"\n{'perfil':<10}{'codec':<7}{'tempo (s)':>11}{'fps':>9}{'x tempo real':>14}"
+          f"{'tamanho (MB)':>14}{'kbps':>8}")
+    print("-" * 73)
+    for r in results:
+        print(f"{r['profile']:<10}{r['codec']:<7}{r['encode_seconds']:>11.2f}{r['fps']:>9.1f}"
+              f"{r['realtime_factor']:>14.2f}{r['size_mb']:>14.2f}{r['bitrate_kbps']:>8}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark dos perfis de encoder")
+    parser.add_argument("--slides", type=int, default=12)
+    parser.add_argument("--duration", type=float, default=60.0, help="duração do áudio em segundos")
+    parser.add_argument("--profiles", default=",".join(ENCODER_PROFILES))
+    parser.add_argument("--mode", choices=["single", "still", "two-pass"], default="single",
+                        help="modo de renderização (still reaproveita segmentos do cache)")
+    parser.add_argument("--x265", action="store_true", help="também mede H.265 (libx265)")
+    parser.add_argument("--json", help="salva os resultados neste arquivo")
+    args = parser.parse_args()
+
+    profiles = [p.strip() for p in args.profiles.split(",") if p.strip()]
+    unknown = [p for p in profiles if p not in ENCODER_PROFILES]
+    if unknown:
+        print(f"❌ Perfis desconhecidos: {unknown}")
+        sys.exit(1)
+    codecs = ["h264"]
+    if args.x265:
+        if encoder_available("libx265"):
+            codecs.append("h265")
+        else:
+            print("⚠️ ffmpeg sem libx265 - medindo só H.264")
+
+    progress.enabled = False
+    results = run(profiles, codecs, args.slides, args.duration, args.mode)
+    print_table(results)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"slides": args.slides, "duration": args.duration, "fps": FPS, "mode": args.mode,
+                       "results": results}, f, indent=2)
+        print(f"\n💾 Resultados salvos em {args.json}")
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark do tempo de import dos scripts de render
+Cada vídeo roda create_video.py em um processo novo, então tudo o que ele
+importa no topo é pago em todo job. Este script roda "python -X importtime"
+em processos limpos e mostra:
+  - tempo total do import de cada módulo (mediana de N execuções)
+  - as dependências mais pesadas (tempo acumulado)
+  - módulos pesados que não deveriam ser carregados no início (ex.: moviepy)
+
+Sai com código 1 se um módulo proibido for importado ou se o tempo passar
+do limite (--max-ms), para ser usado como verificação antes do deploy.
+
+Uso: python3 bench_imports.py [--modules create_video] [--repeat 5]
+                              [--top 15] [--max-ms 300] [--json resultado.json]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULT_MODULES = ["create_video"]
+
+# Pacotes que só podem ser carregados sob demanda (caminhos opcionais)
+FORBIDDEN_IMPORTS = {
+    "create_video": ["moviepy", "imageio", "numpy", "PIL", "torch", "TTS"],
+}
+
+# ========================================
+# MEDIÇÃO
+# ========================================
+
+def parse_importtime(stderr):
+    """Linhas do -X importtime -> [(nome, profundidade, próprio µs, acumulado µs)]"""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # cabeçalho "self [us] | cumulative | imported package"
+        name = parts[2].rstrip()
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((name.strip(), depth, int(parts[0]), int(parts[1])))
+    return entries
+
+def measure(module):
+    """Um import do módulo em um processo novo: (tempo de parede s, entradas do importtime)"""
+    t0 = time.time()
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=BASE_DIR, capture_output=True, text=True)
+    elapsed = time.time() - t0
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "?"
+        raise RuntimeError(f"Falha ao importar {module}: {error}")
+    return elapsed, parse_importtime(result.stderr)
+
+def run(modules, repeat, top):
+    results = []
+    for module in modules:
+        runs = [measure(module) for _ in range(repeat)]
+        totals = [next((cum for name, depth, _, cum in entries if name == module and depth == 0), 0)
+                  for _, entries in runs]
+        entries = runs[totals.index(sorted(totals)[len(totals) // 2])][1]
+        loaded = {name for name, _, _, _ in entries}
+        heaviest = sorted((e for e in entries if e[0] != module), key=lambda e: e[3], reverse=True)
+        results.append({
+            "module": module,
+            "import_ms": round(statistics.median(totals) / 1000, 1),
+            "import_min_ms": round(min(totals) / 1000, 1),
+            "process_ms": round(statistics.median(wall for wall, _ in runs) * 1000, 1),
+            "modules_loaded": len(loaded),
+            "forbidden": sorted(pkg for pkg in FORBIDDEN_IMPORTS.get(module, []) if pkg in loaded),
+            "heaviest": [{"module": name, "cumulative_ms": round(cum / 1000, 1),
+                          "self_ms": round(own / 1000, 1)}
+                         for name, _, own, cum in heaviest[:top]],
+        })
+    return results
+
+def print_report(results):
+    for r in results:
+        print(f"\n📦 {r['module']}: import {r['import_ms']:.1f} ms (mín {r['import_min_ms']:.1f}) | "
+              f"processo {r['process_ms']:.1f} ms | {r['modules_loaded']} módulos")
+        print(f"  {'módulo':<40}{'acumulado (ms)':>16}{'próprio (ms)':>14}")
+        print("  " + "-" * 70)
+        for item in r["heaviest"]:
+            print(f"  {item['module']:<40}{item['cumulative_ms']:>16.1f}{item['self_ms']:>14.1f}")
+        if r["forbidden"]:
+            print(f"  ❌ Importados no início (deveriam ser sob demanda): {', '.join(r['forbidden'])}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark do tempo de import dos scripts de render")
+    parser.add_argument("--modules", default=",".join(DEFAULT_MODULES),
+                        help="módulos a medir, separados por vírgula")
+    parser.add_argument("--repeat", type=int, default=5, help="execuções por módulo (usa a mediana)")
+    parser.add_argument("--top", type=int, default=15, help="dependências mais pesadas a listar")
+    parser.add_argument("--max-ms", type=float, default=None,
+                        help="falha se o import (mediana) passar deste tempo")
+    parser.add_argument("--json", help="salva os resultados neste arquivo")
+    args = parser.parse_args()
+
+    modules = [m.strip() for m in args.modules.split(",") if m.strip()]
+    try:
+        results = run(modules, max(1, args.repeat), args.top)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print_report(results)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"python": sys.version.split()[0], "repeat": args.repeat,
+                       "max_ms": args.max_ms, "results": results}, f, indent=2)
+        print(f"\n💾 Resultados salvos em {args.json}")
+
+    failed = [r["module"] for r in results
+              if r["forbidden"] or (args.max_ms is not None and r["import_ms"] > args.max_ms)]
+    if failed:
+        print(f"\n❌ Import acima do limite ou com módulos proibidos: {', '.join(failed)}")
+        sys.exit(1)
+    print("\n✅ Tempo de import dentro do esperado")
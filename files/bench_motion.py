@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark do motor de efeitos (Ken Burns + crossfade)
+Mede em frames por segundo:
+  - o motor NumPy sozinho (frames gerados e descartados, sem encoder)
+  - o render completo no modo motion, comparado com os modos still e single
+sobre o mesmo slideshow sintético (imagens testsrc2 + áudio senoidal).
+
+Uso: python3 bench_motion.py [--slides 12] [--duration 60] [--profile draft]
+                             [--modes motion,still,single] [--json resultado.json]
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+
+import progress
+from encoder_profiles import ENCODER_PROFILES
+from image_cache import prepare_frames
+from create_video import render, FPS, PRESCALED_FILTER, VIDEO_WIDTH, VIDEO_HEIGHT
+from motion_render import MotionEngine, source_size
+from bench_encoders import make_slides, make_audio, write_filelist
+
+RENDER_MODES = ["motion", "still", "single"]
+
+# ========================================
+# BENCHMARK
+# ========================================
+
+def bench_engine(slides, durations):
+    """Frames/s do motor sem encoder (imagens já pré-escaladas)"""
+    sources = prepare_frames(slides, *source_size(VIDEO_WIDTH, VIDEO_HEIGHT))
+    engine = MotionEngine(sources, durations, VIDEO_WIDTH, VIDEO_HEIGHT, FPS)
+    t0 = time.time()
+    count = sum(1 for _ in engine.frames())
+    elapsed = time.time() - t0
+    return {"mode": "motor (sem encoder)", "seconds": round(elapsed, 2),
+            "fps": round(count / elapsed, 1), "ms_per_frame": round(1000 * elapsed / count, 2)}
+
+def run(modes, slides_count, duration, profile):
+    work_dir = tempfile.mkdtemp(prefix="bench_motion_")
+    results = []
+    try:
+        print(f"🧪 Gerando slideshow sintético: {slides_count} slides, {duration}s de áudio...")
+        slides = make_slides(work_dir, slides_count)
+        audio = make_audio(work_dir, duration)
+        durations = [duration / len(slides)] * len(slides)
+        frames_count = int(round(duration * FPS))
+
+        results.append(bench_engine(slides, durations))
+
+        frames = prepare_frames(slides, VIDEO_WIDTH, VIDEO_HEIGHT)
+        filelist = write_filelist(work_dir, frames, duration)
+        output = os.path.join(work_dir, "out.mp4")
+        for mode in modes:
+            t0 = time.time()
+            render(filelist, audio, output, mode=mode, video_filter=PRESCALED_FILTER,
+                   duration=duration, profile=profile, frames=frames, durations=durations,
+                   work_dir=work_dir, images=slides)
+            elapsed = time.time() - t0
+            results.append({"mode": mode, "seconds": round(elapsed, 2),
+                            "fps": round(frames_count / elapsed, 1),
+                            "ms_per_frame": round(1000 * elapsed / frames_count, 2)})
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+def print_table(results):
+    print(f"\n{'modo':<22}{'tempo (s)':>11}{'fps':>9}{'ms/frame':>11}")
+    print("-" * 53)
+    for r in results:
+        print(f"{r['mode']:<22}{r['seconds']:>11.2f}{r['fps']:>9.1f}{r['ms_per_frame']:>11.2f}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark do motor de efeitos (Ken Burns + crossfade)")
+    parser.add_argument("--slides", type=int, default=12)
+    parser.add_argument("--duration", type=float, default=60.0, help="duração do áudio em segundos")
+    parser.add_argument("--profile", choices=sorted(ENCODER_PROFILES), default="draft")
+    parser.add_argument("--modes", default=",".join(RENDER_MODES),
+                        help="modos de render a comparar (motion, still, single)")
+    parser.add_argument("--json", help="salva os resultados neste arquivo")
+    args = parser.parse_args()
+
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    unknown = [m for m in modes if m not in RENDER_MODES]
+    if unknown:
+        print(f"❌ Modos desconhecidos: {unknown}")
+        sys.exit(1)
+
+    progress.enabled = False
+    results = run(modes, args.slides, args.duration, args.profile)
+    print_table(results)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"slides": args.slides, "duration": args.duration, "fps": FPS,
+                       "profile": args.profile, "results": results}, f, indent=2)
+        print(f"\n💾 Resultados salvos em {args.json}")
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark da renderização em blocos paralelos
+Renderiza o mesmo slideshow sintético (imagens testsrc2 + áudio senoidal) no
+passo único (um ffmpeg) e em K blocos paralelos, comparando o tempo de parede.
+
+Uso: python3 bench_parallel.py [--slides 40] [--duration 300] [--chunks auto,2,4]
+                               [--profile draft] [--json resultado.json]
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+
+import progress
+from encoder_profiles import ENCODER_PROFILES
+from create_video import render_single_pass, FPS, SCALE_FILTER
+from parallel_render import render_parallel, choose_chunk_count
+from bench_encoders import make_slides, make_audio, write_filelist
+
+# ========================================
+# BENCHMARK
+# ========================================
+
+def run(chunk_options, slides_count, duration, profile):
+    work_dir = tempfile.mkdtemp(prefix="bench_parallel_")
+    results = []
+    try:
+        print(f"🧪 Gerando slideshow sintético: {slides_count} slides, {duration}s de áudio...")
+        slides = make_slides(work_dir, slides_count)
+        audio = make_audio(work_dir, duration)
+        filelist = write_filelist(work_dir, slides, duration)
+        durations = [duration / len(slides)] * len(slides)
+        frames = int(duration * FPS)
+        output = os.path.join(work_dir, "out.mp4")
+
+        t0 = time.time()
+        render_single_pass(filelist, audio, output, SCALE_FILTER, duration, profile)
+        baseline = time.time() - t0
+        results.append({"mode": "single", "chunks": 1, "seconds": round(baseline, 2),
+                         "fps": round(frames / baseline, 1), "speedup": 1.0})
+        print(f"⏱️ Passo único: {baseline:.2f}s")
+
+        for option in chunk_options:
+            chunks = choose_chunk_count(duration, len(slides)) if option == "auto" else int(option)
+            t0 = time.time()
+            render_parallel(slides, durations, audio, output, SCALE_FILTER, FPS,
+                            profile, duration=duration, chunks=chunks, work_dir=work_dir)
+            elapsed = time.time() - t0
+            results.append({"mode": f"parallel ({option})", "chunks": chunks,
+                            "seconds": round(elapsed, 2), "fps": round(frames / elapsed, 1),
+                            "speedup": round(baseline / elapsed, 2)})
+            print(f"⏱️ {chunks} bloco(s): {elapsed:.2f}s")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return results
+
+def print_table(results):
+    print(f"\n{'modo':<18}{'blocos':>8}{'tempo (s)':>11}{'fps':>9}{'speedup':>10}")
+    print("-" * 56)
+    for r in results:
+        print(f"{r['mode']:<18}{r['chunks']:>8}{r['seconds']:>11.2f}{r['fps']:>9.1f}"
+              f"{r['speedup']:>9.2f}x")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark da renderização em blocos paralelos")
+    parser.add_argument("--slides", type=int, default=40)
+    parser.add_argument("--duration", type=float, default=300.0, help="duração do áudio em segundos")
+    parser.add_argument("--chunks", default="auto",
+                        help="quantidades de blocos a medir, separadas por vírgula (auto = escolha automática)")
+    parser.add_argument("--profile", choices=sorted(ENCODER_PROFILES), default="draft")
+    parser.add_argument("--json", help="salva os resultados neste arquivo")
+    args = parser.parse_args()
+
+    chunk_options = [c.strip() for c in args.chunks.split(",") if c.strip()]
+    invalid = [c for c in chunk_options if c != "auto" and not (c.isdigit() and int(c) > 0)]
+    if invalid:
+        print(f"❌ Valores inválidos em --chunks: {invalid}")
+        sys.exit(1)
+
+    progress.enabled = False
+    print(f"🖥️ Núcleos disponíveis: {os.cpu_count()}")
+    results = run(chunk_options, args.slides, args.duration, args.profile)
+    print_table(results)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"slides": args.slides, "duration": args.duration, "fps": FPS,
+                       "profile": args.profile, "cores": os.cpu_count(), "results": results},
+                      f, indent=2)
+        print(f"\n💾 Resultados salvos em {args.json}")
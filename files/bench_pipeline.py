@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark do pipeline completo (áudio -> vídeo) pelo servidor
+Gera entradas sintéticas, sobe o servidor (backend TTS "stub") em uma cópia
+isolada dos scripts e envia N jobs de uma vez para cada nível de concorrência.
+Cada nível começa do zero (banco, caches e pastas novas), então duas execuções
+com os mesmos parâmetros e a mesma semente são comparáveis entre commits.
+
+Entradas:
+  - imagens JPEG/PNG com resolução aleatória (Pillow, semente fixa)
+  - modo pipeline: texto com o tamanho certo para o stub gerar --audio-seconds de
+    áudio, com fator de tempo real --rtf (segundos de síntese por segundo de áudio)
+  - modo video: WAVs senoidais ou de ruído (--audio sine|noise) já em audios/,
+    só o /create-video é medido
+
+Saída (tela e --json):
+  - vazão (vídeos/hora) e latência ponta a ponta (p50/p95/p99)
+  - percentis de cada etapa a partir dos timings dos jobs (fila, síntese, encode, mux...)
+  - pico de memória (maior processo e soma da árvore do servidor, via /proc)
+  - I/O de disco e CPU de todos os processos do servidor (getrusage dos filhos)
+  - --baseline resultado_anterior.json mostra a variação em relação a outro commit
+
+Uso: python3 bench_pipeline.py [--jobs 8] [--concurrency 1,2,4] [--images 6]
+                               [--audio-seconds 20] [--rtf 0.3] [--mode pipeline|video]
+                               [--audio sine|noise] [--render-mode still] [--server gunicorn|flask]
+                               [--seed 1] [--json resultado.json] [--baseline anterior.json]
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import wave
+import random
+import shutil
+import argparse
+import resource
+import tempfile
+import threading
+import subprocess
+import http.client
+from array import array
+
+from bench_server import start_server, stop_server, percentile
+from tts_worker import STUB_SECONDS_PER_WORD
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Arquivos copiados para a instalação isolada de cada nível
+SERVER_FILES = ("fonts", "voice_sample.wav")
+SAMPLE_RATE = 24000
+RSS_SAMPLE_INTERVAL = 0.25
+JOB_TIMEOUT = 900
+
+WORDS = ("imagem voz texto vídeo cena roteiro história dia noite cidade campo rio mar "
+         "caminho tempo luz cor som passo ideia mundo casa pessoa momento").split()
+
+# ========================================
+# DADOS SINTÉTICOS
+# ========================================
+
+def make_images(dst_dir, count, rng, min_side=480, max_side=4000):
+    """Imagens com resolução e formato aleatórios (gradientes + formas)"""
+    from PIL import Image, ImageDraw
+    os.makedirs(dst_dir, exist_ok=True)
+    names = []
+    for i in range(count):
+        width, height = rng.randint(min_side, max_side), rng.randint(min_side, max_side)
+        channels = [Image.linear_gradient("L").rotate(rng.randint(0, 359)).resize((width, height))
+                    for _ in range(3)]
+        img = Image.merge("RGB", channels)
+        draw = ImageDraw.Draw(img)
+        for _ in range(12):
+            x0, y0 = rng.randint(0, width - 1), rng.randint(0, height - 1)
+            x1, y1 = rng.randint(x0, width), rng.randint(y0, height)
+            draw.ellipse((x0, y0, x1, y1), fill=tuple(rng.randint(0, 255) for _ in range(3)))
+        ext = rng.choice(("jpg", "png"))
+        name = f"bench_{i:03d}.{ext}"
+        if ext == "jpg":
+            img.save(os.path.join(dst_dir, name), quality=90)
+        else:
+            img.save(os.path.join(dst_dir, name), compress_level=1)
+        names.append(name)
+    return names
+
+def make_wav(path, seconds, signal, rng):
+    """WAV mono 16 bits 24kHz: tom de 220Hz ('sine') ou ruído branco ('noise')"""
+    n_samples = int(seconds * SAMPLE_RATE)
+    if signal == "noise":
+        samples = array("h", (rng.randint(-8000, 8000) for _ in range(n_samples)))
+    else:
+        step = 2 * math.pi * 220 / SAMPLE_RATE
+        samples = array("h", (int(8000 * math.sin(i * step)) for i in range(n_samples)))
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes(samples.tobytes())
+
+def make_text(seconds, rng):
+    """Texto que o TTS stub transforma em ~'seconds' segundos de áudio (frases de 8 palavras)"""
+    words = [rng.choice(WORDS) for _ in range(max(1, math.ceil(seconds / STUB_SECONDS_PER_WORD)))]
+    sentences = [" ".join(words[i:i + 8]).capitalize() + "." for i in range(0, len(words), 8)]
+    return " ".join(sentences)
+
+def make_install(dst_dir, images_dir):
+    """Cópia dos scripts do servidor com pastas vazias (banco, caches e saídas próprios)"""
+    os.makedirs(dst_dir)
+    for name in os.listdir(BASE_DIR):
+        src = os.path.join(BASE_DIR, name)
+        if name.endswith(".py") and os.path.isfile(src):
+            shutil.copy2(src, dst_dir)
+    for name in SERVER_FILES:
+        src = os.path.join(BASE_DIR, name)
+        if os.path.isdir(src):
+            shutil.copytree(src, os.path.join(dst_dir, name))
+        elif os.path.isfile(src):
+            shutil.copy2(src, dst_dir)
+    shutil.copytree(images_dir, os.path.join(dst_dir, "imagens"))
+    os.makedirs(os.path.join(dst_dir, "audios"))
+
+# ========================================
+# RECURSOS
+# ========================================
+
+def process_tree(root_pid):
+    """PIDs do processo e de todos os descendentes (via /proc)"""
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    pids, stack = [], [root_pid]
+    while stack:
+        pid = stack.pop()
+        pids.append(pid)
+        stack.extend(children.get(pid, []))
+    return pids
+
+def memory_kb(pid):
+    """(VmRSS, VmHWM) do processo em KB - memória atual e pico"""
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith(("VmRSS:", "VmHWM:")):
+                    name, value = line.split(":", 1)
+                    fields[name] = int(value.split()[0])
+    except (OSError, ValueError):
+        pass
+    return fields.get("VmRSS", 0), fields.get("VmHWM", 0)
+
+class RssSampler:
+    """
+    Amostra a memória da árvore do servidor em segundo plano
+    peak_tree = maior soma de RSS dos processos; peak_process = maior pico (VmHWM)
+    de um processo isolado (ffmpeg, worker TTS, worker HTTP...)
+    """
+
+    def __init__(self, pid):
+        self.pid = pid
+        self.peak_tree = 0
+        self.peak_process = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            samples = [memory_kb(pid) for pid in process_tree(self.pid)]
+            self.peak_tree = max(self.peak_tree, sum(rss for rss, _ in samples))
+            self.peak_process = max([self.peak_process] + [hwm for _, hwm in samples])
+            self._stop.wait(RSS_SAMPLE_INTERVAL)
+
+    def __enter__(self):
+        if os.path.isdir("/proc"):
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+# ========================================
+# CLIENTE
+# ========================================
+
+def request(port, method, path, body=None):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=90)
+    try:
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        conn.request(method, path, json.dumps(body) if body is not None else None, headers)
+        response = conn.getresponse()
+        return response.status, json.loads(response.read() or b"{}")
+    finally:
+        conn.close()
+
+def wait_job(port, job_id, deadline):
+    """Long-poll do /status até o job terminar; retorna (json final, instante do fim)"""
+    since = None
+    while time.time() < deadline:
+        query = f"?wait=30&since={since}" if since is not None else "?wait=30"
+        status, data = request(port, "GET", f"/status/{job_id}{query}")
+        if status == 200 and data.get("status") in ("completed", "error"):
+            return data, time.time()
+        since = data.get("updated_at", since)
+    return {"id": job_id, "status": "timeout", "timings": {}}, time.time()
+
+def run_jobs(port, specs):
+    """Envia todos os jobs de uma vez e espera cada um em uma thread"""
+    results = [None] * len(specs)
+
+    def worker(i, path, body):
+        submitted = time.time()
+        status, data = request(port, "POST", path, body)
+        if status not in (200, 202):
+            results[i] = ({"id": body["id"], "status": "rejected", "message": data.get("message"),
+                           "timings": {}}, submitted, time.time())
+            return
+        final, finished = wait_job(port, body["id"], submitted + JOB_TIMEOUT)
+        results[i] = (final, submitted, finished)
+
+    threads = [threading.Thread(target=worker, args=(i, path, body)) for i, (path, body) in enumerate(specs)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+# ========================================
+# BENCHMARK
+# ========================================
+
+def summarize(values):
+    values = sorted(values)
+    return {"p50": round(percentile(values, 50), 3), "p95": round(percentile(values, 95), 3),
+            "p99": round(percentile(values, 99), 3), "max": round(values[-1], 3), "n": len(values)}
+
+def run_level(args, concurrency, work_dir, images_dir, image_names, port):
+    rng = random.Random(args.seed)
+    install = os.path.join(work_dir, f"c{concurrency}")
+    make_install(install, images_dir)
+
+    specs = []
+    for i in range(args.jobs):
+        job_id = f"bench_{i:03d}"
+        images = rng.sample(image_names, min(args.images, len(image_names)))
+        if args.mode == "video":
+            make_wav(os.path.join(install, "audios", f"audio_{job_id}.wav"), args.audio_seconds,
+                     args.audio, rng)
+            specs.append(("/create-video", {"id": job_id, "images": images}))
+        else:
+            specs.append(("/pipeline", {"id": job_id, "text": make_text(args.audio_seconds, rng),
+                                        "images": images}))
+
+    env = {
+        "STUB_TTS_RTF": str(args.rtf),
+        "TTS_WORKERS": str(concurrency),
+        "AUDIO_MAX_CONCURRENCY": str(concurrency),
+        "VIDEO_MAX_CONCURRENCY": str(concurrency),
+        "AUDIO_QUEUE_SIZE": str(max(50, args.jobs)),
+        "VIDEO_QUEUE_SIZE": str(max(50, args.jobs)),
+    }
+    if args.render_mode:
+        env["RENDER_MODE"] = args.render_mode
+
+    usage_before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    proc = start_server(args.server, port, args.workers, os.path.join(install, "jobs.db"),
+                        base_dir=install, extra_env=env)
+    try:
+        with RssSampler(proc.pid) as sampler:
+            t0 = time.time()
+            results = run_jobs(port, specs)
+            wall = time.time() - t0
+    finally:
+        stop_server(proc)
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+
+    completed = [r for r in results if r[0].get("status") == "completed"]
+    stages, caches = {}, {}
+    for final, _, _ in completed:
+        for name, value in (final.get("timings") or {}).items():
+            if not isinstance(value, (int, float)) or isinstance(value, bool):
+                continue
+            if name.endswith(("_cache_hits", "_cache_misses")):
+                # Contagens (video_frames_cache_hits...) viram totais, não percentis
+                cache, _, kind = name.rpartition("_cache_")
+                totals = caches.setdefault(cache.split("_", 1)[-1], {"hits": 0, "misses": 0})
+                totals[kind] += int(value)
+            elif not name.endswith("audio_seconds"):
+                stages.setdefault(name, []).append(value)
+    return {
+        "concurrency": concurrency,
+        "jobs": len(results),
+        "completed": len(completed),
+        "failed": len(results) - len(completed),
+        "errors": sorted({str(r[0].get("message"))[:200] for r in results
+                          if r[0].get("status") != "completed"}),
+        "wall_seconds": round(wall, 2),
+        "videos_per_hour": round(len(completed) / wall * 3600, 1) if wall > 0 else 0.0,
+        "latency_seconds": summarize([finished - submitted for _, submitted, finished in completed])
+                           if completed else None,
+        "stages": {name: summarize(values) for name, values in sorted(stages.items())},
+        "cache": caches,
+        "peak_rss_mb": round(sampler.peak_process / 1024, 1),
+        "peak_tree_rss_mb": round(sampler.peak_tree / 1024, 1),
+        "disk_read_mb": round((usage.ru_inblock - usage_before.ru_inblock) * 512 / (1024 * 1024), 1),
+        "disk_write_mb": round((usage.ru_oublock - usage_before.ru_oublock) * 512 / (1024 * 1024), 1),
+        "cpu_seconds": round(usage.ru_utime + usage.ru_stime
+                             - usage_before.ru_utime - usage_before.ru_stime, 2),
+    }
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def print_report(results, baseline=None):
+    previous = {r["concurrency"]: r for r in (baseline or {}).get("results", [])}
+    for r in results:
+        print(f"\n📊 Concorrência {r['concurrency']}: {r['completed']}/{r['jobs']} vídeos em "
+              f"{r['wall_seconds']:.1f}s -> {r['videos_per_hour']:.1f} vídeos/hora")
+        old = previous.get(r["concurrency"])
+        if old and old.get("videos_per_hour"):
+            change = 100.0 * (r["videos_per_hour"] - old["videos_per_hour"]) / old["videos_per_hour"]
+            print(f"  ↕️ {change:+.1f}% em relação à base ({old['videos_per_hour']:.1f} vídeos/hora)")
+        if r["latency_seconds"]:
+            lat = r["latency_seconds"]
+            print(f"  ⏱️ Latência: p50 {lat['p50']:.2f}s | p95 {lat['p95']:.2f}s | p99 {lat['p99']:.2f}s")
+        print(f"  💾 Pico RSS: {r['peak_rss_mb']:.0f} MB (processo) / "
+              f"{r['peak_tree_rss_mb']:.0f} MB (árvore) | Disco: {r['disk_read_mb']:.1f} MB lidos, "
+              f"{r['disk_write_mb']:.1f} MB gravados | CPU {r['cpu_seconds']:.1f}s")
+        print(f"  {'etapa':<32}{'p50 (s)':>10}{'p95 (s)':>10}{'p99 (s)':>10}{'base p50':>10}")
+        print("  " + "-" * 72)
+        for name, s in r["stages"].items():
+            base = (old or {}).get("stages", {}).get(name, {}).get("p50")
+            base_text = f"{base:>10.3f}" if base is not None else f"{'-':>10}"
+            print(f"  {name:<32}{s['p50']:>10.3f}{s['p95']:>10.3f}{s['p99']:>10.3f}{base_text}")
+        for cache, totals in sorted(r["cache"].items()):
+            print(f"  🗃️ Cache de {cache}: {totals['hits']} acerto(s), {totals['misses']} gerado(s)")
+        for error in r["errors"]:
+            print(f"  ❌ {error}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark do pipeline completo (áudio -> vídeo)")
+    parser.add_argument("--jobs", type=int, default=8, help="vídeos por nível de concorrência")
+    parser.add_argument("--concurrency", default="1,2,4",
+                        help="níveis (workers TTS e vídeos simultâneos), separados por vírgula")
+    parser.add_argument("--mode", choices=["pipeline", "video"], default="pipeline",
+                        help="pipeline = TTS stub + vídeo; video = só /create-video com WAV sintético")
+    parser.add_argument("--images", type=int, default=6, help="imagens por vídeo")
+    parser.add_argument("--image-pool", type=int, default=12, help="imagens sintéticas geradas")
+    parser.add_argument("--audio-seconds", type=float, default=20, help="duração do áudio de cada vídeo")
+    parser.add_argument("--audio", choices=["sine", "noise"], default="sine",
+                        help="sinal dos WAVs no modo video")
+    parser.add_argument("--rtf", type=float, default=0.3,
+                        help="fator de tempo real do TTS stub (segundos de síntese por segundo de áudio)")
+    parser.add_argument("--render-mode", default=None, help="RENDER_MODE do servidor (padrão: still)")
+    parser.add_argument("--server", choices=["gunicorn", "flask"], default="gunicorn")
+    parser.add_argument("--workers", type=int, default=2, help="workers HTTP do gunicorn")
+    parser.add_argument("--port", type=int, default=5097)
+    parser.add_argument("--seed", type=int, default=1, help="semente das entradas sintéticas")
+    parser.add_argument("--keep", action="store_true", help="mantém a pasta temporária (logs, vídeos)")
+    parser.add_argument("--json", help="salva os resultados neste arquivo")
+    parser.add_argument("--baseline", help="resultado anterior (--json) para comparar")
+    args = parser.parse_args()
+
+    levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    work_dir = tempfile.mkdtemp(prefix="bench_pipeline_")
+    results = []
+    try:
+        print(f"🧪 Gerando {args.image_pool} imagens sintéticas (semente {args.seed})...")
+        images_dir = os.path.join(work_dir, "imagens")
+        image_names = make_images(images_dir, args.image_pool, random.Random(args.seed))
+        for concurrency in levels:
+            print(f"🚀 Concorrência {concurrency}: {args.jobs} jobs ({args.mode}, "
+                  f"{args.audio_seconds:.0f}s de áudio, {args.images} imagens)...")
+            results.append(run_level(args, concurrency, work_dir, images_dir, image_names, args.port))
+    except (RuntimeError, OSError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    finally:
+        if args.keep:
+            print(f"📁 Arquivos mantidos em {work_dir}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    print_report(results, baseline)
+    if args.json:
+        config = {k: v for k, v in vars(args).items() if k not in ("json", "baseline", "keep")}
+        with open(args.json, "w") as f:
+            json.dump({"commit": git_commit(), "python": sys.version.split()[0],
+                       "cpus": os.cpu_count(), "config": config, "results": results}, f, indent=2)
+        print(f"\n💾 Resultados salvos em {args.json}")
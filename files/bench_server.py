@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Teste de carga da API (/status e /health)
+Sobe o servidor com o backend de TTS "stub" e um banco de jobs temporário
+(gunicorn com WEB_WORKERS workers, ou o servidor Flask de desenvolvimento com
+--server flask) ou usa um servidor já rodando (--url). Grava jobs concluídos no
+banco e dispara requisições com N conexões keep-alive simultâneas, medindo:
+  - requisições por segundo
+  - latência p50 / p95 / p99 / máxima
+  - erros (status diferente de 200 ou falha de conexão)
+
+Uso: python3 bench_server.py [--server gunicorn|flask] [--workers 4]
+                             [--concurrency 1,8,32] [--seconds 10]
+                             [--endpoints status,health] [--jobs 200]
+                             [--url http://host:porta] [--json resultado.json]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import signal
+import argparse
+import tempfile
+import threading
+import subprocess
+import http.client
+from urllib.parse import urlsplit
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# ========================================
+# SERVIDOR
+# ========================================
+
+def seed_jobs(db_path, count):
+    """Grava 'count' jobs de vídeo concluídos no banco; retorna os IDs"""
+    os.environ["JOB_DB_PATH"] = db_path
+    from job_store import JobStore
+    store = JobStore(db_path)
+    ids = []
+    for i in range(count):
+        job_id = f"bench{i:05d}"
+        store.create(job_id, "video", message="Vídeo na fila", payload={"priority": 0})
+        store.finish(job_id, "completed", "Vídeo criado com sucesso",
+                     file=os.path.join(BASE_DIR, "videos", f"video_{job_id}.mp4"))
+        ids.append(job_id)
+    return ids
+
+def existing_jobs(host, port, count):
+    """IDs de jobs já existentes no servidor (GET /jobs)"""
+    conn = http.client.HTTPConnection(host, port, timeout=10)
+    conn.request("GET", f"/jobs?limit={min(count, 1000)}")
+    response = conn.getresponse()
+    body = response.read()
+    conn.close()
+    if response.status != 200:
+        raise RuntimeError(f"GET /jobs respondeu {response.status}")
+    return [job["id"] for job in json.loads(body)["jobs"]]
+
+def start_server(kind, port, workers, db_path, base_dir=BASE_DIR, extra_env=None):
+    """
+    Sobe o servidor com TTS stub em um processo separado e espera o /health
+
+    base_dir: pasta com os scripts do servidor (bench_pipeline.py usa uma cópia
+    isolada, com audios/, videos/ e caches próprios); extra_env sobrescreve o ambiente
+    """
+    env = {**os.environ,
+           "TTS_BACKEND": "stub", "TTS_WORKERS": "1", "TTS_PYTHON": sys.executable,
+           "JOB_DB_PATH": db_path, "PORT": str(port),
+           "WEB_WORKERS": str(workers), "DRAIN_TIMEOUT": "5", "PYTHONUNBUFFERED": "1",
+           **(extra_env or {})}
+    if kind == "gunicorn":
+        cmd = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "wsgi:app"]
+    else:
+        cmd = [sys.executable, "server.py"]
+    log = open(f"{db_path}.server.log", "w")
+    proc = subprocess.Popen(cmd, cwd=base_dir, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"Servidor saiu com código {proc.returncode} (log: {log.name})")
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                conn.close()
+                return proc
+        except OSError:
+            pass
+        time.sleep(0.3)
+    stop_server(proc)
+    raise RuntimeError(f"Servidor não respondeu em 60s (log: {log.name})")
+
+def stop_server(proc):
+    proc.send_signal(signal.SIGTERM)
+    try:
+        proc.wait(30)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+
+# ========================================
+# CARGA
+# ========================================
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, int(round(p / 100 * len(sorted_values))) - 1))
+    return sorted_values[k]
+
+def client(host, port, paths, deadline, latencies, errors):
+    """Uma conexão keep-alive fazendo requisições em sequência até o deadline"""
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    while time.time() < deadline:
+        path = random.choice(paths)
+        t0 = time.perf_counter()
+        try:
+            conn.request("GET", path)
+            response = conn.getresponse()
+            response.read()
+            ok = response.status == 200
+        except (OSError, http.client.HTTPException):
+            ok = False
+            conn.close()
+            conn = http.client.HTTPConnection(host, port, timeout=30)
+        elapsed = time.perf_counter() - t0
+        if ok:
+            latencies.append(elapsed)
+        else:
+            errors.append(elapsed)
+    conn.close()
+
+def load(host, port, paths, concurrency, seconds):
+    """Carga com 'concurrency' conexões por 'seconds' segundos: estatísticas de latência"""
+    latencies, errors = [], []
+    deadline = time.time() + seconds
+    threads = [threading.Thread(target=client, args=(host, port, paths, deadline, latencies, errors))
+               for _ in range(concurrency)]
+    t0 = time.time()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.time() - t0
+    values = sorted(latencies)
+    return {
+        "concurrency": concurrency,
+        "requests": len(values),
+        "errors": len(errors),
+        "rps": round(len(values) / wall, 1),
+        "p50_ms": round(percentile(values, 50) * 1000, 2),
+        "p95_ms": round(percentile(values, 95) * 1000, 2),
+        "p99_ms": round(percentile(values, 99) * 1000, 2),
+        "max_ms": round((values[-1] if values else 0.0) * 1000, 2),
+    }
+
+def run(host, port, endpoints, job_ids, concurrency_levels, seconds):
+    targets = {
+        "status": [f"/status/{job_id}" for job_id in job_ids] or ["/status/inexistente"],
+        "health": ["/health"],
+    }
+    results = []
+    for endpoint in endpoints:
+        load(host, port, targets[endpoint], 1, 1)  # Aquecimento (conexões, caches do SQLite)
+        for concurrency in concurrency_levels:
+            result = load(host, port, targets[endpoint], concurrency, seconds)
+            result["endpoint"] = endpoint
+            results.append(result)
+            print(f"⏱️ /{endpoint} x{concurrency}: {result['rps']:.1f} req/s | "
+                  f"p50 {result['p50_ms']:.1f} ms | p99 {result['p99_ms']:.1f} ms | "
+                  f"{result['errors']} erro(s)")
+    return results
+
+def print_report(results):
+    print(f"\n  {'endpoint':<10}{'conexões':>10}{'req/s':>10}{'p50 (ms)':>11}"
+          f"{'p95 (ms)':>11}{'p99 (ms)':>11}{'máx (ms)':>11}{'erros':>8}")
+    print("  " + "-" * 82)
+    for r in results:
+        print(f"  {'/' + r['endpoint']:<10}{r['concurrency']:>10}{r['rps']:>10.1f}{r['p50_ms']:>11.2f}"
+              f"{r['p95_ms']:>11.2f}{r['p99_ms']:>11.2f}{r['max_ms']:>11.2f}{r['errors']:>8}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Teste de carga da API (/status e /health)")
+    parser.add_argument("--url", help="servidor já rodando (não sobe um novo nem grava jobs; "
+                                      "/status usa os jobs listados em /jobs)")
+    parser.add_argument("--server", choices=["gunicorn", "flask"], default="gunicorn",
+                        help="servidor a subir quando --url não é passado")
+    parser.add_argument("--workers", type=int, default=4, help="workers do gunicorn")
+    parser.add_argument("--port", type=int, default=5095, help="porta do servidor de teste")
+    parser.add_argument("--concurrency", default="1,8,32", help="conexões simultâneas, separadas por vírgula")
+    parser.add_argument("--seconds", type=float, default=10, help="duração de cada medição")
+    parser.add_argument("--endpoints", default="status,health", help="status e/ou health")
+    parser.add_argument("--jobs", type=int, default=200, help="jobs concluídos gravados no banco de teste")
+    parser.add_argument("--json", help="salva os resultados neste arquivo")
+    args = parser.parse_args()
+
+    levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+    endpoints = [e.strip() for e in args.endpoints.split(",") if e.strip()]
+    unknown = [e for e in endpoints if e not in ("status", "health")]
+    if unknown:
+        print(f"❌ Endpoint desconhecido: {', '.join(unknown)} (use status, health)")
+        sys.exit(1)
+
+    work_dir, proc, job_ids = None, None, []
+    try:
+        if args.url:
+            url = urlsplit(args.url)
+            host, port = url.hostname, url.port or 80
+            job_ids = existing_jobs(host, port, args.jobs) if "status" in endpoints else []
+            print(f"🎯 Usando servidor em {args.url} ({len(job_ids)} jobs para /status)")
+        else:
+            work_dir = tempfile.mkdtemp(prefix="bench_server_")
+            db_path = os.path.join(work_dir, "jobs.db")
+            job_ids = seed_jobs(db_path, args.jobs)
+            label = f"gunicorn ({args.workers} workers)" if args.server == "gunicorn" else "flask"
+            print(f"🚀 Subindo {label} na porta {args.port} com TTS stub e {len(job_ids)} jobs...")
+            proc = start_server(args.server, args.port, args.workers, db_path)
+            host, port = "127.0.0.1", args.port
+        results = run(host, port, endpoints, job_ids, levels, args.seconds)
+    except (RuntimeError, OSError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    finally:
+        if proc is not None:
+            stop_server(proc)
+        if work_dir is not None:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    print_report(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"server": args.url or args.server,
+                       "workers": args.workers if not args.url and args.server == "gunicorn" else None,
+                       "seconds": args.seconds, "jobs": len(job_ids), "results": results}, f, indent=2)
+        print(f"\n💾 Resultados salvos em {args.json}")
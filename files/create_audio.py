@@ -2,13 +2,17 @@
 # -*- coding: utf-8 -*-
 """
 Script para gerar áudio com clonagem de voz usando TTS (XTTS_v2)
-Uso: python3 create_audio.py "<texto>" "<audio_id>"
+Uso: python3 create_audio.py "<texto>" "<audio_id>" ["<voz>"]
 """
 
 import sys
 import os
 import re
-from TTS.api import TTS
+import time
+
+from speaker_cache import SpeakerLatentCache, DEFAULT_VOICE, voice_sample_path
+from alignment import build_alignment, write_alignment, alignment_path
+import progress
 
 # ========================================
 # CONFIGURAÇÕES
@@ -17,30 +21,131 @@ from TTS.api import TTS
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 AUDIOS_DIR = os.path.join(BASE_DIR, "audios")
 VOICE_SAMPLE = os.path.join(BASE_DIR, "voice_sample.wav")
+MODEL_NAME = "tts_models/multilingual/multi-dataset/xtts_v2"
+LANGUAGE = "pt"
+TTS_SENTENCE_SILENCE_MS = int(os.environ.get("TTS_SENTENCE_SILENCE_MS", "250"))  # Pausa entre frases
+
+# ========================================
+# FUNÇÕES AUXILIARES
+# ========================================
+
+def ensure_audio_dir():
+    """Garante que a pasta audios existe COM permissões corretas (CLI e workers TTS)"""
+    if not os.path.exists(AUDIOS_DIR):
+        os.makedirs(AUDIOS_DIR, mode=0o777, exist_ok=True)
+        print(f"📁 Pasta {AUDIOS_DIR} criada com permissões 777")
+    else:
+        # Se já existe, força permissões
+        try:
+            os.chmod(AUDIOS_DIR, 0o777)
+            print(f"🔓 Permissões da pasta {AUDIOS_DIR} atualizadas para 777")
+        except Exception as e:
+            print(f"⚠️ Não foi possível atualizar permissões: {e}")
+
+def sanitize_text(text):
+    """Remove pontuação que o TTS pode falar e normaliza espaços"""
+    text_clean = re.sub(r'[.!?;:]', '', text)  # Remove pontos, exclamação, interrogação, etc
+    return re.sub(r'\s+', ' ', text_clean).strip()  # Remove espaços extras
+
+def split_sentence_pairs(text):
+    """Frases do texto como (texto original, texto sanitizado para o TTS)"""
+    parts = re.split(r'(?<=[.!?])\s+|\n+', text)
+    return [(re.sub(r'\s+', ' ', p).strip(), clean)
+            for p, clean in ((p, sanitize_text(p)) for p in parts) if clean]
+
+def split_sentences(text):
+    """Divide o texto em frases (antes da sanitização) e sanitiza cada uma"""
+    return [clean for _, clean in split_sentence_pairs(text)]
 
-# Garante que a pasta audios existe COM permissões corretas
-if not os.path.exists(AUDIOS_DIR):
-    os.makedirs(AUDIOS_DIR, mode=0o777, exist_ok=True)
-    print(f"📁 Pasta {AUDIOS_DIR} criada com permissões 777")
-else:
-    # Se já existe, força permissões
+def load_tts_model():
+    """Carrega o modelo XTTS_v2 (operação cara, feita uma vez por processo)"""
+    from TTS.api import TTS
+    
+    print("🔄 Carregando modelo XTTS_v2...")
+    return TTS(model_name=MODEL_NAME, gpu=False)
+
+def create_latent_cache(tts, preload=True):
+    """Cache de latentes do locutor ligado ao modelo carregado"""
+    cache = SpeakerLatentCache(tts.synthesizer.tts_model)
+    if preload:
+        cache.preload()
+    return cache
+
+def synthesize_to_file(tts, text_clean, output_path, voice=DEFAULT_VOICE, latents=None):
+    """
+    Sintetiza texto já sanitizado em um arquivo WAV
+    
+    Com cache de latentes, chama o modelo XTTS diretamente com o embedding do
+    locutor já calculado (sem reprocessar o voice sample a cada job).
+    """
+    if latents is None:
+        tts.tts_to_file(
+            text=text_clean,
+            speaker_wav=voice_sample_path(voice),
+            language=LANGUAGE,
+            file_path=output_path,
+            split_sentences=True  # Melhora naturalidade
+        )
+        return
+    
+    gpt_cond_latent, speaker_embedding = latents.get(voice)
+    out = tts.synthesizer.tts_model.inference(
+        text_clean,
+        LANGUAGE,
+        gpt_cond_latent,
+        speaker_embedding,
+        enable_text_splitting=True  # Equivalente ao split_sentences
+    )
+    tts.synthesizer.save_wav(wav=out["wav"], path=output_path)
+
+def synthesize_sentences(tts, sentences, output_path, latents, voice=DEFAULT_VOICE,
+                         silence_ms=TTS_SENTENCE_SILENCE_MS, on_progress=None):
+    """
+    Sintetiza frase a frase (já sanitizadas) e grava um único WAV
+    Cada frase é gravada em um chunk e anexada ao WavConcatenator (com a pausa
+    entre frases), como no caminho do pool - o áudio inteiro nunca fica em memória.
+    on_progress(dict) é chamado a cada frase sintetizada (frase i/N, %, ETA).
+    
+    Returns:
+        (segments, sample_rate): amostra inicial e nº de amostras de cada frase
+        no WAV final - base do alinhamento das legendas
+    """
+    from wav_utils import WavConcatenator
+    
+    writer = WavConcatenator(output_path, silence_ms=silence_ms)
+    chunk_path = f"{output_path}.chunk{os.getpid()}.wav"
+    started = time.time()
     try:
-        os.chmod(AUDIOS_DIR, 0o777)
-        print(f"🔓 Permissões da pasta {AUDIOS_DIR} atualizadas para 777")
-    except Exception as e:
-        print(f"⚠️ Não foi possível atualizar permissões: {e}")
+        for i, sentence in enumerate(sentences):
+            synthesize_to_file(tts, sentence, chunk_path, voice=voice, latents=latents)
+            writer.append(chunk_path)
+            print(f"🎙️ Frase {i + 1}/{len(sentences)} sintetizada")
+            if on_progress:
+                on_progress({"step": "synthesis", "current": i + 1, "total": len(sentences),
+                             **progress.estimate(i + 1, len(sentences), started)})
+        writer.close()
+    except BaseException:
+        writer.abort()
+        raise
+    finally:
+        if os.path.exists(chunk_path):
+            os.remove(chunk_path)
+    return writer.segments, writer.sample_rate
 
 # ========================================
 # FUNÇÃO PRINCIPAL
 # ========================================
 
-def generate_audio(text, audio_id):
+def generate_audio(text, audio_id, tts=None, voice=DEFAULT_VOICE, latents=None):
     """
     Gera áudio com clonagem de voz usando XTTS_v2
     
     Args:
         text: Texto para sintetizar
         audio_id: ID único para o áudio
+        tts: Modelo já carregado (opcional - usado pelos workers residentes)
+        voice: Nome da voz ("default" = voice_sample.wav)
+        latents: SpeakerLatentCache do modelo carregado (opcional)
     
     Returns:
         Path do arquivo de áudio gerado
@@ -53,23 +158,29 @@ def generate_audio(text, audio_id):
     print(f"{'='*60}\n")
     
     # Verifica se voice_sample existe
-    if not os.path.exists(VOICE_SAMPLE):
-        raise FileNotFoundError(f"❌ Voice sample não encontrado: {VOICE_SAMPLE}")
+    voice_sample = voice_sample_path(voice)
+    if not os.path.exists(voice_sample):
+        raise FileNotFoundError(f"❌ Voice sample não encontrado: {voice_sample}")
     
-    print(f"🎯 Usando voice sample: {VOICE_SAMPLE}")
+    print(f"🎯 Usando voice sample: {voice_sample}")
     print(f"💾 Áudio será salvo em: {output_path}")
     
     try:
         # Sanitizar texto - remove pontuação que o TTS pode falar
-        text_clean = re.sub(r'[.!?;:]', '', text)  # Remove pontos, exclamação, interrogação, etc
-        text_clean = re.sub(r'\s+', ' ', text_clean).strip()  # Remove espaços extras
+        text_clean = sanitize_text(text)
         
         print(f"📝 Texto original: {text[:50]}...")
         print(f"📝 Texto limpo: {text_clean[:50]}...")
         
         # Inicializa TTS com modelo XTTS_v2 (melhor qualidade de clonagem)
-        print("🔄 Carregando modelo XTTS_v2...")
-        tts = TTS(model_name="tts_models/multilingual/multi-dataset/xtts_v2", gpu=False)
+        # Em subprocesso o servidor acompanha as etapas pelo stdout (progress.emit)
+        standalone = tts is None
+        if standalone:
+            progress.emit(step="model_load")
+            started = time.time()
+            tts = load_tts_model()
+            latents = create_latent_cache(tts, preload=False)
+            progress.emit_timings(model_load=round(time.time() - started, 3))
         
         # Testa permissões antes de gerar áudio
         print(f"🔍 Testando permissões de escrita em {AUDIOS_DIR}...")
@@ -84,15 +195,30 @@ def generate_audio(text, audio_id):
             print(f"📂 Tentando criar com permissões 666...")
             raise
         
+        # Remove o arquivo anterior em vez de sobrescrever: ele pode ser um
+        # hardlink para uma entrada do cache de áudios
+        for old_path in (output_path, alignment_path(output_path)):
+            if os.path.exists(old_path):
+                os.remove(old_path)
+        
         # Gera áudio clonando a voz do voice_sample
         print("🎙️ Gerando áudio com clonagem de voz...")
-        tts.tts_to_file(
-            text=text_clean,  # <-- texto limpo
-            speaker_wav=VOICE_SAMPLE,
-            language="pt",
-            file_path=output_path,
-            split_sentences=True  # Melhora naturalidade
-        )
+        pairs = split_sentence_pairs(text)
+        started = time.time()
+        if standalone:
+            progress.emit(step="synthesis", sentences=len(pairs))
+        if latents is not None and pairs:
+            # Frase a frase: o nº de amostras de cada uma vira o alinhamento das legendas
+            # Em subprocesso cada frase vira um evento de progresso (frase i/N)
+            segments, sample_rate = synthesize_sentences(
+                tts, [clean for _, clean in pairs], output_path, latents, voice=voice,
+                on_progress=(lambda event: progress.emit(**event)) if standalone else None)
+            write_alignment(output_path, build_alignment(
+                [original for original, _ in pairs], segments, sample_rate))
+        else:
+            synthesize_to_file(tts, text_clean, output_path, voice=voice, latents=latents)
+        if standalone:
+            progress.emit_timings(synth=round(time.time() - started, 3))
         
         # Força permissões no arquivo criado
         try:
@@ -120,17 +246,19 @@ def generate_audio(text, audio_id):
 # ========================================
 
 if __name__ == "__main__":
-    if len(sys.argv) != 3:
-        print("❌ Uso: python3 create_audio.py \"<texto>\" \"<audio_id>\"")
+    if len(sys.argv) not in (3, 4):
+        print("❌ Uso: python3 create_audio.py \"<texto>\" \"<audio_id>\" [\"<voz>\"]")
         print("\nExemplo:")
         print("  python3 create_audio.py \"Olá, este é um teste\" \"teste_001\"")
         sys.exit(1)
     
     text = sys.argv[1]
     audio_id = sys.argv[2]
+    voice = sys.argv[3] if len(sys.argv) == 4 else DEFAULT_VOICE
+    ensure_audio_dir()
     
     try:
-        generate_audio(text, audio_id)
+        generate_audio(text, audio_id, voice=voice)
         sys.exit(0)
     except Exception as e:
         print(f"❌ Falha na execução: {str(e)}")
@@ -2,7 +2,23 @@
 # -*- coding: utf-8 -*-
 import sys
 import os
-from moviepy.editor import *
+import time
+
+# Só módulos leves aqui: o script roda em um processo novo a cada vídeo.
+# NumPy (modo motion) e MoviePy (áudio que não é WAV, sem ffprobe) são
+# importados apenas quando usados - bench_imports.py acompanha o tempo de import.
+from image_cache import prepare_frames
+from workspace import workspace_images, image_index
+from image_index import clean_file_names
+from still_render import render_still
+from parallel_render import render_parallel, choose_chunk_count
+from alignment import load_alignment
+from subtitles import subtitle_filter
+from wav_utils import audio_duration_us
+from slide_timing import slide_durations, validate_timing, SLIDE_TIMING_MODES
+from encoder_profiles import (video_codec_args, audio_codec_args, container_args,
+                              validate_profile, ENCODER_PROFILES, CODECS)
+import progress
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 AUDIOS_DIR = os.path.join(BASE_DIR, "audios")
@@ -13,50 +29,261 @@ VIDEO_WIDTH = 1080
 VIDEO_HEIGHT = 1920
 FPS = 24
 
+# "still" = cada slide codificado uma vez (cache) + concat com -c copy
+# "single" = um único ffmpeg (imagens + áudio), dividido em blocos paralelos
+# quando o vídeo é longo (parallel_render.py); "two-pass" = vídeo mudo + mux
+# "motion" = Ken Burns + crossfade gerados com NumPy (motion_render.py)
+# Em caso de falha: still/motion -> single -> two-pass
+RENDER_MODE = os.environ.get("RENDER_MODE", "still")
+
+# Usa frames pré-processados (cache/frames) em vez de escalar no ffmpeg
+USE_FRAME_CACHE = os.environ.get("USE_FRAME_CACHE", "1") == "1"
+
+SCALE_FILTER = (f'scale={VIDEO_WIDTH}:{VIDEO_HEIGHT}:force_original_aspect_ratio=decrease,'
+                f'pad={VIDEO_WIDTH}:{VIDEO_HEIGHT}:(ow-iw)/2:(oh-ih)/2,setsar=1')
+PRESCALED_FILTER = 'setsar=1'  # Frames do cache já estão no tamanho final
+# Codec/CRF/GOP vêm do perfil de encoder (encoder_profiles.py: draft, social, archive)
+
 os.makedirs(VIDEOS_DIR, exist_ok=True)
 
 def sanitize_image_files():
     if not os.path.exists(IMGS_DIR):
         return
     print("🧹 Limpando nomes de arquivos...")
-    for fname in os.listdir(IMGS_DIR):
-        if not os.path.isfile(os.path.join(IMGS_DIR, fname)):
-            continue
-        
-        # Limpar caracteres corrompidos específicos do N8n
-        clean = fname.replace('\n', '').replace('\r', '').replace("'", "").strip()
-        # Remover $'\n\n' literal do nome
-        clean = clean.replace("$'\\n\\n'", "")
-        # Remover outros caracteres estranhos
-        clean = clean.replace("$'", "").replace("'", "")
-        # Remover espaços extras e caracteres especiais
-        clean = clean.strip().replace(" ", "_")
-        
-        old_path = os.path.join(IMGS_DIR, fname)
-        new_path = os.path.join(IMGS_DIR, clean)
-        
-        if os.path.getsize(old_path) == 0:
-            os.remove(old_path)
-            print(f"🗑️ Removido arquivo vazio: {fname}")
-            continue
-            
-        if old_path != new_path and clean:
+    clean_file_names(IMGS_DIR)
+    print("✅ Limpeza concluída")
+
+def render_single_pass(filelist_path, audio_path, video_path, video_filter=SCALE_FILTER, duration=None,
+                       profile=None, codec=None):
+    """Um único ffmpeg: concat das imagens + áudio, filtro de escala e -shortest"""
+    ffmpeg_cmd = [
+        'ffmpeg', '-y',
+        '-f', 'concat',
+        '-safe', '0',
+        '-i', filelist_path,
+        '-i', audio_path,
+        '-map', '0:v:0',
+        '-map', '1:a:0',
+        '-vf', video_filter,
+        '-r', str(FPS),
+        *video_codec_args(profile, codec, FPS),
+        *audio_codec_args(profile),
+        *container_args(profile),
+        '-shortest',
+        video_path
+    ]
+    
+    t0 = time.time()
+    result = progress.run_ffmpeg(ffmpeg_cmd, duration=duration, step="render")
+    
+    if result.returncode != 0:
+        print(f"❌ Erro ffmpeg (passo único): {result.stderr}")
+        raise Exception("Falha ao renderizar vídeo com ffmpeg (passo único)")
+    progress.emit_timings(encode=round(time.time() - t0, 3))  # Encode e mux no mesmo ffmpeg
+
+def render_two_pass(filelist_path, audio_path, video_path, video_filter=SCALE_FILTER, duration=None,
+                    profile=None, codec=None):
+    """Modo antigo: renderiza vídeo mudo em _temp.mp4 e depois adiciona o áudio"""
+    temp_video = video_path.replace('.mp4', '_temp.mp4')
+    
+    # Comando ffmpeg para criar vídeo a partir das imagens
+    ffmpeg_cmd = [
+        'ffmpeg', '-y',
+        '-f', 'concat',
+        '-safe', '0',
+        '-i', filelist_path,
+        '-vf', video_filter,
+        '-r', str(FPS),
+        *video_codec_args(profile, codec, FPS),
+        temp_video
+    ]
+    
+    t0 = time.time()
+    result = progress.run_ffmpeg(ffmpeg_cmd, duration=duration, step="encode")
+    
+    if result.returncode != 0:
+        print(f"❌ Erro ffmpeg (vídeo): {result.stderr}")
+        raise Exception("Falha ao criar vídeo com ffmpeg")
+    print(f"⏱️ Encode do vídeo: {time.time() - t0:.2f}s")
+    progress.emit_timings(encode=round(time.time() - t0, 3))
+    
+    # Adicionar áudio usando ffmpeg diretamente
+    print("🎵 Adicionando áudio com ffmpeg...")
+    t0 = time.time()
+    result = progress.run_ffmpeg([
+        'ffmpeg', '-i', temp_video, '-i', audio_path,
+        '-c:v', 'copy', *audio_codec_args(profile), *container_args(profile),
+        '-shortest', '-y', video_path
+    ], duration=duration, step="mux")
+    
+    if result.returncode != 0:
+        print(f"❌ Erro ffmpeg: {result.stderr}")
+        raise Exception("Falha ao adicionar áudio com ffmpeg")
+    print(f"⏱️ Mux do áudio: {time.time() - t0:.2f}s")
+    progress.emit_timings(mux=round(time.time() - t0, 3))
+    
+    # Limpar arquivo temporário
+    try:
+        os.remove(temp_video)
+    except:
+        pass
+
+def _make_burn(alignment):
+    """Filtro de legenda (ass_path, offset) -> string do -vf, passado aos renderizadores"""
+    def burn(ass_path, offset=0.0):
+        return subtitle_filter(alignment, ass_path, VIDEO_WIDTH, VIDEO_HEIGHT, offset)
+    return burn
+
+def render(filelist_path, audio_path, video_path, mode=None, video_filter=SCALE_FILTER, duration=None,
+           profile=None, codec=None, frames=None, durations=None, work_dir=None, images=None,
+           subtitles=None):
+    """
+    Renderiza o vídeo final no modo configurado, registrando o tempo gasto
+    Os modos still e single em blocos precisam de frames/durations (os demais
+    usam a filelist); work_dir recebe os temporários dos blocos e o modo
+    motion usa as imagens originais (images)
+    
+    subtitles: alinhamento (alignment.py) - a legenda é queimada no mesmo
+    passo de encode; o modo still não re-codifica, então passa para single
+    """
+    mode = mode or RENDER_MODE
+    t0 = time.time()
+    
+    burn = _make_burn(subtitles) if subtitles else None
+    if subtitles and mode == "still":
+        mode = "single"
+    
+    if mode == "motion" and images:
+        print("⏳ Renderizando slides com movimento (Ken Burns + crossfade)...")
+        try:
+            from motion_render import render_motion
+            render_motion(images, durations, audio_path, video_path, VIDEO_WIDTH, VIDEO_HEIGHT, FPS,
+                          profile, codec, duration, work_dir=work_dir, subtitles=burn)
+            print(f"⏱️ Render motion: {time.time() - t0:.2f}s")
+            progress.emit_timings(render_mode="motion")
+            return
+        except Exception as e:
+            print(f"⚠️ {e} - tentando passo único")
+            mode = "single"
+            t0 = time.time()
+    
+    if mode == "still" and frames:
+        print("⏳ Renderizando slides (segmentos em cache + concat sem re-encode)...")
+        try:
+            render_still(frames, durations, audio_path, video_path, video_filter, FPS,
+                         profile, codec, duration, work_dir=work_dir)
+            print(f"⏱️ Render still: {time.time() - t0:.2f}s")
+            progress.emit_timings(render_mode="still")
+            return
+        except Exception as e:
+            print(f"⚠️ {e} - tentando passo único")
+            mode = "single"
+            t0 = time.time()
+    
+    if mode in ("single", "still", "motion") and frames and choose_chunk_count(duration, len(frames)) > 1:
+        print("⏳ Renderizando vídeo em blocos paralelos...")
+        try:
+            render_parallel(frames, durations, audio_path, video_path, video_filter, FPS,
+                            profile, codec, duration, work_dir=work_dir, subtitles=burn)
+            print(f"⏱️ Render em blocos: {time.time() - t0:.2f}s")
+            progress.emit_timings(render_mode="parallel")
+            return
+        except Exception as e:
+            print(f"⚠️ {e} - tentando passo único")
+            t0 = time.time()
+    
+    # Passo único e two-pass: legenda inteira no filtro de vídeo
+    ass_path = os.path.join(work_dir or os.path.dirname(video_path),
+                            f"{os.path.splitext(os.path.basename(video_path))[0]}.ass")
+    if burn:
+        subtitle = burn(ass_path)
+        if subtitle:
+            # fps antes da legenda: o concat entrega 1 frame por slide
+            video_filter = f"{video_filter},fps={FPS},{subtitle}"
+    
+    try:
+        if mode in ("single", "still", "motion"):
+            print("⏳ Renderizando vídeo + áudio com ffmpeg (passo único)...")
             try:
-                os.rename(old_path, new_path)
-                print(f"✅ Renomeado: {fname} -> {clean}")
+                render_single_pass(filelist_path, audio_path, video_path, video_filter, duration,
+                                   profile, codec)
+                print(f"⏱️ Render passo único: {time.time() - t0:.2f}s")
+                progress.emit_timings(render_mode="single")
+                return
             except Exception as e:
-                print(f"❌ Erro ao renomear {fname}: {e}")
-                pass
-    print("✅ Limpeza concluída")
+                print(f"⚠️ {e} - tentando modo two-pass")
+                t0 = time.time()
+        
+        print("⏳ Renderizando vídeo com ffmpeg (two-pass)...")
+        render_two_pass(filelist_path, audio_path, video_path, video_filter, duration, profile, codec)
+        print(f"⏱️ Render two-pass: {time.time() - t0:.2f}s")
+        progress.emit_timings(render_mode="two-pass")
+    finally:
+        if os.path.exists(ass_path):
+            os.remove(ass_path)
+
+def read_audio_duration(audio_path):
+    """
+    Duração do áudio em segundos: cabeçalho do WAV ou ffprobe; MoviePy só
+    como último recurso (opcional - não é carregado no caminho normal)
+    """
+    try:
+        return audio_duration_us(audio_path) / 1_000_000
+    except ValueError as e:
+        try:
+            from moviepy.editor import AudioFileClip
+        except ImportError:
+            raise e
+        print(f"⚠️ {e} - lendo a duração com MoviePy")
+        with AudioFileClip(audio_path) as clip:
+            return clip.duration
+
+def list_images(images=None):
+    """Imagens de imagens/ (nomes na ordem dada ou todas, em ordem alfabética)"""
+    # LIMPEZA DE IMAGENS PRIMEIRO!
+    sanitize_image_files()
+    
+    # Índice de imagens: só arquivos novos/modificados são lidos e decodificados
+    print(f"📁 Pasta imagens: {IMGS_DIR}")
+    if not os.path.exists(IMGS_DIR):
+        print("❌ Pasta imagens não existe!")
+        return []
+    index = image_index()
+    
+    if images:
+        names = [os.path.basename(name) for name in images]
+        entries = index.lookup(IMGS_DIR, names)
+        missing = [name for name in names if entries[name] is None]
+        if missing:
+            raise FileNotFoundError(f"❌ Imagens não encontradas: {missing}")
+        invalid = [f"{name} ({entries[name]['error']})" for name in names if not entries[name]["verified"]]
+        if invalid:
+            raise ValueError(f"❌ Imagens inválidas: {invalid}")
+        return [os.path.join(IMGS_DIR, name) for name in names]
+    return [os.path.join(IMGS_DIR, entry["name"]) for entry in index.sync(IMGS_DIR) if entry["verified"]]
 
-def create_video(video_id):
+def create_video(video_id, images=None, profile=None, codec=None, workspace=None, subtitles=False,
+                 timing=None):
+    """
+    Gera videos/video_<id>.mp4 a partir do áudio e das imagens
+    
+    Args:
+        video_id: ID do vídeo (usa audios/audio_<id>.wav)
+        images: nomes de arquivos em imagens/ (na ordem); None = todas as imagens
+        profile: perfil de encoder (draft, social, archive; padrão ENCODER_PROFILE)
+        codec: "h264" (padrão) ou "h265"
+        workspace: diretório do job (work/<id>/, montado pelo servidor) - usa as
+                   imagens dele em vez de imagens/ e guarda ali os temporários
+        subtitles: queima legendas a partir do alinhamento da síntese
+                   (audios/audio_<id>.align.json)
+        timing: tempo dos slides - uniform, sentences ou silence (padrão SLIDE_TIMING)
+    """
+    profile, codec = validate_profile(profile, codec)
+    timing = validate_timing(timing)
     print(f"\n{'='*60}")
     print(f"🎬 VÍDEO - ID: {video_id}")
     print(f"{'='*60}\n")
     
-    # LIMPEZA DE IMAGENS PRIMEIRO!
-    sanitize_image_files()
-    
     audio_path = os.path.join(AUDIOS_DIR, f"audio_{video_id}.wav")
     video_path = os.path.join(VIDEOS_DIR, f"video_{video_id}.mp4")
     
@@ -65,18 +292,12 @@ def create_video(video_id):
     
     print(f"🎵 Áudio: {audio_path}")
     
-    # Debug: mostrar arquivos na pasta
-    print(f"📁 Pasta imagens: {IMGS_DIR}")
-    if os.path.exists(IMGS_DIR):
-        all_files = os.listdir(IMGS_DIR)
-        print(f"📋 Arquivos na pasta: {all_files}")
+    if workspace:
+        # Imagens isoladas do job: outros jobs podem mexer em imagens/ à vontade
+        print(f"📁 Workspace: {workspace}")
+        img_files = workspace_images(workspace)
     else:
-        print("❌ Pasta imagens não existe!")
-    
-    img_files = sorted([
-        os.path.join(IMGS_DIR, f) for f in os.listdir(IMGS_DIR)
-        if f.lower().endswith((".jpg", ".jpeg", ".png"))
-    ])
+        img_files = list_images(images)
     
     if not img_files:
         raise ValueError("❌ Nenhuma imagem encontrada")
@@ -85,60 +306,52 @@ def create_video(video_id):
     for img in img_files:
         print(f"  - {os.path.basename(img)}")
     
-    # Limpar vídeos antigos
-    for old in os.listdir(VIDEOS_DIR):
-        if old.endswith('.mp4'):
-            try:
-                os.remove(os.path.join(VIDEOS_DIR, old))
-            except:
-                pass
+    # Calcular durações (cabeçalho do WAV, sem carregar as amostras)
+    audio_duration = read_audio_duration(audio_path)
+    durations = slide_durations(audio_path, len(img_files), audio_duration, timing)
+    
+    print(f"⏱️ Áudio: {audio_duration:.3f}s | Por imagem: "
+          f"{min(durations):.2f}s a {max(durations):.2f}s ({timing})")
     
-    # Calcular durações
-    audio_clip = AudioFileClip(audio_path)
-    audio_duration = audio_clip.duration
-    img_duration = audio_duration / len(img_files)
+    alignment = None
+    if subtitles:
+        alignment = load_alignment(audio_path)
+        if alignment:
+            print(f"💬 Legendas: {len(alignment['sentences'])} frases ({alignment['source']})")
+        else:
+            print("⚠️ Sem alinhamento para este áudio - vídeo sairá sem legendas")
     
-    print(f"⏱️ Áudio: {audio_duration:.2f}s | Por imagem: {img_duration:.2f}s")
+    # Normaliza as imagens para o tamanho do vídeo (uma vez por imagem, com cache)
+    # O modo motion já escala as imagens originais (MotionEngine): pula esta etapa
+    frames = img_files
+    video_filter = SCALE_FILTER
+    if USE_FRAME_CACHE and RENDER_MODE != "motion":
+        progress.emit(step="frames", total=len(img_files))
+        try:
+            frames = prepare_frames(img_files, VIDEO_WIDTH, VIDEO_HEIGHT)
+            video_filter = PRESCALED_FILTER
+        except ImportError:
+            print("⚠️ Pillow não instalado - escala será feita pelo ffmpeg")
     
     # Processar imagens - MÉTODO ALTERNATIVO usando ffmpeg diretamente
     print("🖼️ Processando imagens com ffmpeg...")
     
     # Criar arquivo de lista para ffmpeg
-    import subprocess
-    filelist_path = os.path.join(VIDEOS_DIR, f"filelist_{video_id}.txt")
+    filelist_path = os.path.join(workspace or VIDEOS_DIR, f"filelist_{video_id}.txt")
     
     with open(filelist_path, 'w') as f:
-        for img_path in img_files:
+        for img_path, seconds in zip(frames, durations):
             f.write(f"file '{img_path}'\n")
-            f.write(f"duration {img_duration}\n")
+            f.write(f"duration {seconds:.6f}\n")
         # Adiciona última imagem novamente para fechar o loop
-        f.write(f"file '{img_files[-1]}'\n")
-    
-    print(f"⏱️ Cada imagem: {img_duration:.2f}s")
-    
-    # Renderizar vídeo SEM áudio usando ffmpeg diretamente
-    print("⏳ Renderizando vídeo com ffmpeg...")
-    temp_video = video_path.replace('.mp4', '_temp.mp4')
-    
-    # Comando ffmpeg para criar vídeo a partir das imagens
-    ffmpeg_cmd = [
-        'ffmpeg', '-y',
-        '-f', 'concat',
-        '-safe', '0',
-        '-i', filelist_path,
-        '-vf', f'scale={VIDEO_WIDTH}:{VIDEO_HEIGHT}:force_original_aspect_ratio=decrease,pad={VIDEO_WIDTH}:{VIDEO_HEIGHT}:(ow-iw)/2:(oh-ih)/2,setsar=1',
-        '-r', str(FPS),
-        '-c:v', 'libx264',
-        '-preset', 'ultrafast',
-        '-pix_fmt', 'yuv420p',
-        temp_video
-    ]
+        f.write(f"file '{frames[-1]}'\n")
     
-    result = subprocess.run(ffmpeg_cmd, capture_output=True, text=True)
-    
-    if result.returncode != 0:
-        print(f"❌ Erro ffmpeg (vídeo): {result.stderr}")
-        raise Exception("Falha ao criar vídeo com ffmpeg")
+    # Renderizar vídeo + áudio
+    print(f"🎛️ Perfil de encoder: {profile} ({codec})")
+    render(filelist_path, audio_path, video_path, video_filter=video_filter,
+           duration=audio_duration, profile=profile, codec=codec,
+           frames=frames, durations=durations, work_dir=workspace,
+           images=img_files, subtitles=alignment)
     
     # Limpar arquivo de lista
     try:
@@ -146,24 +359,6 @@ def create_video(video_id):
     except:
         pass
     
-    # Adicionar áudio usando ffmpeg diretamente
-    print("🎵 Adicionando áudio com ffmpeg...")
-    result = subprocess.run([
-        'ffmpeg', '-i', temp_video, '-i', audio_path,
-        '-c:v', 'copy', '-c:a', 'aac', '-b:a', '192k',
-        '-shortest', '-y', video_path
-    ], capture_output=True, text=True)
-    
-    if result.returncode != 0:
-        print(f"❌ Erro ffmpeg: {result.stderr}")
-        raise Exception("Falha ao adicionar áudio com ffmpeg")
-    
-    # Limpar arquivo temporário
-    try:
-        os.remove(temp_video)
-    except:
-        pass
-    
     size_mb = os.path.getsize(video_path) / (1024*1024)
     print(f"\n{'='*60}")
     print(f"✅ VÍDEO CRIADO!")
@@ -174,12 +369,25 @@ def create_video(video_id):
     return video_path
 
 if __name__ == '__main__':
-    if len(sys.argv) != 2:
-        print("❌ Uso: python3 create_video.py <video_id>")
-        sys.exit(1)
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Cria o vídeo a partir do áudio e das imagens")
+    parser.add_argument("video_id")
+    parser.add_argument("images", nargs="*", help="imagens de imagens/ (padrão: todas)")
+    parser.add_argument("--profile", choices=sorted(ENCODER_PROFILES), default=None,
+                        help="perfil de encoder (padrão: ENCODER_PROFILE)")
+    parser.add_argument("--codec", choices=sorted(CODECS), default=None)
+    parser.add_argument("--workspace", default=None,
+                        help="workspace do job (work/<id>/) - ignora imagens/")
+    parser.add_argument("--subtitles", action="store_true",
+                        help="queima legendas a partir do alinhamento do áudio")
+    parser.add_argument("--timing", choices=SLIDE_TIMING_MODES, default=None,
+                        help="tempo dos slides (padrão: SLIDE_TIMING)")
+    args = parser.parse_args()
     
     try:
-        create_video(sys.argv[1])
+        create_video(args.video_id, args.images or None, profile=args.profile, codec=args.codec,
+                     workspace=args.workspace, subtitles=args.subtitles, timing=args.timing)
     except Exception as e:
         print(f"❌ ERRO: {e}")
         sys.exit(1)
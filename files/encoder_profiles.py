@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Perfis de encoder do ffmpeg
+Cada perfil define preset, controle de taxa (CRF e teto de bitrate), GOP,
+tune=stillimage (slides), threads e áudio. O codec pode ser H.264 (libx264,
+padrão) ou H.265 (libx265, opcional - arquivos menores, encode mais lento).
+
+  - draft:   rápido, para conferência (equivale ao antigo ultrafast)
+  - social:  tamanho bom para upload (Instagram/TikTok), faststart
+  - archive: qualidade alta para guardar
+
+Configuração (variáveis de ambiente):
+  - ENCODER_PROFILE: perfil padrão (padrão "draft")
+  - ENCODER_THREADS: threads do encoder (0 = automático)
+"""
+
+import os
+import subprocess
+
+# ========================================
+# PERFIS
+# ========================================
+
+ENCODER_PROFILES = {
+    "draft": {
+        "preset": "ultrafast",
+        "crf": 23,
+        "gop_seconds": 10,
+        "audio_bitrate": "192k",
+    },
+    "social": {
+        "preset": "veryfast",
+        "crf": 26,
+        "maxrate": "4M",
+        "bufsize": "8M",
+        "gop_seconds": 2,
+        "audio_bitrate": "128k",
+        "faststart": True,
+    },
+    "archive": {
+        "preset": "slow",
+        "crf": 18,
+        "gop_seconds": 5,
+        "audio_bitrate": "256k",
+        "faststart": True,
+    },
+}
+
+CODECS = {
+    "h264": "libx264",
+    "h265": "libx265",
+}
+
+# libx265 não tem tune=stillimage e usa CRF em outra escala (~ x264 + 5)
+X265_CRF_OFFSET = 5
+
+DEFAULT_ENCODER_PROFILE = os.environ.get("ENCODER_PROFILE", "draft")
+ENCODER_THREADS = int(os.environ.get("ENCODER_THREADS", "0"))
+
+_available_encoders = None
+
+# ========================================
+# FUNÇÕES
+# ========================================
+
+def validate_profile(profile=None, codec=None):
+    """Normaliza perfil/codec; levanta ValueError se forem desconhecidos"""
+    profile = profile or DEFAULT_ENCODER_PROFILE
+    codec = codec or "h264"
+    if profile not in ENCODER_PROFILES:
+        raise ValueError(f"Perfil de encoder desconhecido: {profile} "
+                         f"(disponíveis: {', '.join(ENCODER_PROFILES)})")
+    if codec not in CODECS:
+        raise ValueError(f"Codec desconhecido: {codec} (disponíveis: {', '.join(CODECS)})")
+    return profile, codec
+
+def encoder_available(encoder, ffmpeg="ffmpeg"):
+    """O ffmpeg instalado tem este encoder? (consulta 'ffmpeg -encoders' uma vez)"""
+    global _available_encoders
+    if _available_encoders is None:
+        try:
+            result = subprocess.run([ffmpeg, "-hide_banner", "-encoders"],
+                                    stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                    text=True, timeout=30)
+            _available_encoders = {line.split()[1] for line in result.stdout.splitlines()
+                                   if len(line.split()) > 1}
+        except (OSError, subprocess.SubprocessError):
+            _available_encoders = set()
+    return encoder in _available_encoders
+
+def video_codec_args(profile=None, codec=None, fps=24, threads=ENCODER_THREADS):
+    """Argumentos -c:v ... do perfil (cai para H.264 se libx265 não existir)"""
+    profile, codec = validate_profile(profile, codec)
+    settings = ENCODER_PROFILES[profile]
+    encoder = CODECS[codec]
+    if encoder == "libx265" and not encoder_available(encoder):
+        print("⚠️ ffmpeg sem libx265 - usando H.264")
+        encoder = "libx264"
+
+    crf = settings["crf"]
+    if encoder == "libx265":
+        crf += X265_CRF_OFFSET
+    gop = max(1, int(settings["gop_seconds"] * fps))
+
+    args = ['-c:v', encoder, '-preset', settings["preset"], '-crf', str(crf),
+            '-g', str(gop), '-pix_fmt', 'yuv420p', '-threads', str(threads)]
+    if encoder == "libx264":
+        args += ['-tune', 'stillimage']
+    else:
+        args += ['-tag:v', 'hvc1', '-x265-params', 'log-level=error']
+    if settings.get("maxrate"):
+        args += ['-maxrate', settings["maxrate"], '-bufsize', settings["bufsize"]]
+    return args
+
+def audio_codec_args(profile=None):
+    profile, _ = validate_profile(profile)
+    return ['-c:a', 'aac', '-b:a', ENCODER_PROFILES[profile]["audio_bitrate"]]
+
+def container_args(profile=None):
+    """Opções do MP4 (faststart move o índice para o início - upload/preview mais rápidos)"""
+    profile, _ = validate_profile(profile)
+    if ENCODER_PROFILES[profile].get("faststart"):
+        return ['-movflags', '+faststart']
+    return []
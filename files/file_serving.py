@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Download de arquivos gerados (áudios e vídeos)
+  - ETag forte = sha256 do conteúdo (hashing.py, memo por tamanho/mtime)
+  - If-None-Match -> 304 sem corpo (retry do n8n não baixa o vídeo de novo)
+  - Range: bytes=início-fim -> 206 com só o trecho pedido (uploads retomados);
+    If-Range com ETag diferente devolve o arquivo inteiro
+  - Zero-copy: o corpo vai pelo wsgi.file_wrapper do servidor. No gunicorn ele
+    usa sendfile() a partir da posição atual do arquivo e do Content-Length,
+    então o trecho sai do page cache direto para o socket, sem passar pelo Python
+  - Nomes com "../" ou caminhos absolutos não saem da pasta (safe_join)
+"""
+
+import os
+import mimetypes
+
+from flask import request, Response
+from werkzeug.security import safe_join
+from werkzeug.wsgi import wrap_file
+from werkzeug.http import http_date
+
+from hashing import file_sha256
+
+BLOCK_SIZE = 256 * 1024  # Leitura quando o servidor não tem sendfile
+
+# ========================================
+# ARQUIVO
+# ========================================
+
+def resolve_download(base_dir, filename):
+    """Caminho do arquivo dentro de base_dir, ou None (inexistente ou fora da pasta)"""
+    path = safe_join(base_dir, filename)
+    if path is None or not os.path.isfile(path):
+        return None
+    return path
+
+class FileRange:
+    """
+    Trecho [start, start + length) de um arquivo aberto
+
+    read() nunca passa do fim do trecho (servidores sem sendfile); fileno() e
+    tell() permitem ao file_wrapper do gunicorn usar sendfile() a partir de start,
+    limitado pelo Content-Length da resposta.
+    """
+
+    def __init__(self, f, start, length):
+        self.f = f
+        self.remaining = length
+        f.seek(start)
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b""
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.f.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.f.fileno()
+
+    def tell(self):
+        return self.f.tell()
+
+    def close(self):
+        self.f.close()
+
+# ========================================
+# RESPOSTA
+# ========================================
+
+def _byte_range(size, etag, mtime):
+    """
+    (início, fim exclusivo) pedido no Range; None = arquivo inteiro;
+    False = intervalo impossível (416)
+    """
+    if request.range is None or request.range.units != "bytes" or len(request.range.ranges) != 1:
+        return None  # Sem Range, inválido ou vários trechos: responde 200 com tudo
+    if_range = request.if_range
+    if if_range.etag is not None and if_range.etag != etag:
+        return None
+    if if_range.date is not None and int(mtime) > if_range.date.timestamp():
+        return None
+    byte_range = request.range.range_for_length(size)
+    return byte_range if byte_range is not None else False
+
+def serve_file(path, download_name=None):
+    """Resposta de download com ETag, 304, Range (206/416) e corpo por file_wrapper"""
+    st = os.stat(path)
+    size = st.st_size
+    etag = file_sha256(path)
+    download_name = download_name or os.path.basename(path)
+    headers = {
+        "ETag": f'"{etag}"',
+        "Accept-Ranges": "bytes",
+        "Last-Modified": http_date(st.st_mtime),
+        "Cache-Control": "no-cache",  # Pode guardar, mas revalida (304) a cada uso
+        "Content-Disposition": f'attachment; filename="{download_name}"',
+    }
+    mimetype = mimetypes.guess_type(download_name)[0] or "application/octet-stream"
+
+    if request.if_none_match.contains_weak(etag):
+        return Response(status=304, headers=headers)
+
+    byte_range = _byte_range(size, etag, st.st_mtime)
+    if byte_range is False:
+        headers["Content-Range"] = f"bytes */{size}"
+        return Response(status=416, headers=headers)
+
+    start, stop = byte_range or (0, size)
+    status = 200
+    if byte_range:
+        status = 206
+        headers["Content-Range"] = f"bytes {start}-{stop - 1}/{size}"
+    headers["Content-Length"] = str(stop - start)
+
+    body = wrap_file(request.environ, FileRange(open(path, "rb"), start, stop - start), BLOCK_SIZE)
+    return Response(body, status=status, headers=headers, mimetype=mimetype,
+                    direct_passthrough=True)
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""
+Configuração do gunicorn para o servidor de vídeos (wsgi.py)
+Workers "gthread": cada long-poll (/status?wait=) e stream SSE (/events) segura
+uma thread, então cada worker tem várias threads; downloads lentos não
+bloqueiam /status porque rodam em outras threads/processos.
+
+Configuração (variáveis de ambiente):
+  - PORT: porta HTTP (padrão 5005)
+  - WEB_WORKERS: processos HTTP (padrão 4)
+  - WEB_THREADS: threads por processo (padrão 16)
+  - WEB_KEEPALIVE: segundos de keep-alive entre requisições (padrão 5)
+  - DRAIN_TIMEOUT: espera pelos jobs em execução ao parar (padrão 600)
+
+Uso: gunicorn -c gunicorn.conf.py wsgi:app
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5005')}"
+workers = int(os.environ.get("WEB_WORKERS", "4"))
+worker_class = "gthread"
+threads = int(os.environ.get("WEB_THREADS", "16"))
+keepalive = int(os.environ.get("WEB_KEEPALIVE", "5"))
+timeout = 120  # Heartbeat do worker (requisições longas rodam em threads)
+
+# O executor espera os jobs em execução antes de sair (server.shutdown_worker);
+# o gunicorn só mata o worker depois de graceful_timeout
+graceful_timeout = int(os.environ.get("DRAIN_TIMEOUT", "600")) + 30
+
+accesslog = None
+errorlog = "-"
+capture_output = True  # prints do servidor vão para o log do gunicorn (journalctl)
+
+def worker_exit(server, worker):
+    import server as video_server
+    video_server.shutdown_worker()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Hash de conteúdo de arquivos (sha256) com memo por (caminho, tamanho, mtime)
+Usado pelos caches para detectar quando um arquivo mudou de verdade.
+"""
+
+import os
+import re
+import hashlib
+import threading
+
+CHUNK_SIZE = 1024 * 1024
+MEMO_MAX_ENTRIES = 10000
+SAFE_NAME_MAX_CHARS = 80  # Parte legível dos nomes com hash (limite de 255 bytes do filesystem)
+
+_SAFE_NAME_RE = re.compile(r"[A-Za-z0-9_.-]+")
+
+_memo = {}
+_memo_lock = threading.Lock()
+
+def file_sha256(path):
+    """Retorna o sha256 (hex) do conteúdo do arquivo, recalculando só se ele mudou"""
+    st = os.stat(path)
+    key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    with _memo_lock:
+        digest = _memo.get(key)
+    if digest is not None:
+        return digest
+
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            h.update(chunk)
+    digest = h.hexdigest()
+
+    with _memo_lock:
+        if len(_memo) >= MEMO_MAX_ENTRIES:
+            _memo.clear()
+        _memo[key] = digest
+    return digest
+
+def text_sha256(*parts):
+    """sha256 de várias partes de texto (separadas por \\0 para evitar colisões)"""
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(str(part).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+def safe_name(value):
+    """
+    Nome de arquivo/diretório para um ID qualquer, diferente para IDs diferentes
+    IDs só com [A-Za-z0-9_.-] ficam como estão; nos demais os outros caracteres
+    viram '_' e o nome ganha '~' + 12 hex do sha256 do ID original ("a/b" ->
+    "a_b~<hash>", enquanto "a_b" continua "a_b"). Como '~' nunca aparece em um
+    ID seguro, os dois grupos não colidem. "." e ".." também levam hash.
+    """
+    value = str(value)
+    if _SAFE_NAME_RE.fullmatch(value) and value.strip("."):
+        return value
+    readable = re.sub(r"[^A-Za-z0-9_.-]", "_", value)[:SAFE_NAME_MAX_CHARS]
+    return f"{readable}~{text_sha256(value)[:12]}"
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cache de imagens pré-processadas no tamanho do vídeo
+Cada imagem é normalizada UMA vez para o canvas VIDEO_WIDTHxVIDEO_HEIGHT
+(escala mantendo proporção + barras pretas, igual ao filtro scale/pad do
+ffmpeg) e guardada em cache/frames/<sha256>_<L>x<A>.jpg. O ffmpeg recebe os
+frames prontos e não precisa mais redimensionar fotos de 4000px a cada render.
+
+Remoção: entradas sem uso há mais de FRAME_CACHE_MAX_AGE_DAYS dias e, depois,
+as mais antigas até o total ficar abaixo de FRAME_CACHE_MAX_MB.
+"""
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from hashing import file_sha256
+import progress
+
+# ========================================
+# CONFIGURAÇÕES
+# ========================================
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+FRAME_CACHE_DIR = os.path.join(BASE_DIR, "cache", "frames")
+FRAME_CACHE_MAX_MB = int(os.environ.get("FRAME_CACHE_MAX_MB", "2048"))
+FRAME_CACHE_MAX_AGE_DAYS = float(os.environ.get("FRAME_CACHE_MAX_AGE_DAYS", "30"))
+PREPROCESS_THREADS = int(os.environ.get("PREPROCESS_THREADS", str(min(8, os.cpu_count() or 1))))
+FRAME_QUALITY = 95
+
+# ========================================
+# PRÉ-PROCESSAMENTO
+# ========================================
+
+def frame_path(src_path, width, height):
+    """Caminho no cache do frame normalizado de uma imagem"""
+    return os.path.join(FRAME_CACHE_DIR, f"{file_sha256(src_path)}_{width}x{height}.jpg")
+
+def normalize_image(src_path, dst_path, width, height):
+    """Escala a imagem para caber no canvas e centraliza sobre fundo preto"""
+    from PIL import Image, ImageOps
+
+    with Image.open(src_path) as img:
+        # JPEG: decodifica já reduzido (potência de 2) quando a foto é enorme
+        img.draft("RGB", (width, height))
+        img = ImageOps.exif_transpose(img).convert("RGB")
+
+        ratio = min(width / img.width, height / img.height)
+        size = (max(1, round(img.width * ratio)), max(1, round(img.height * ratio)))
+        if size != img.size:
+            img = img.resize(size, Image.LANCZOS)
+
+        canvas = Image.new("RGB", (width, height), (0, 0, 0))
+        canvas.paste(img, ((width - size[0]) // 2, (height - size[1]) // 2))
+
+    tmp_path = f"{dst_path}.tmp{os.getpid()}"
+    canvas.save(tmp_path, "JPEG", quality=FRAME_QUALITY)
+    os.replace(tmp_path, dst_path)
+
+def _prepare_one(src_path, width, height):
+    dst_path = frame_path(src_path, width, height)
+    if os.path.exists(dst_path):
+        os.utime(dst_path)  # Marca uso recente para a política de idade
+        return dst_path, True
+    normalize_image(src_path, dst_path, width, height)
+    return dst_path, False
+
+def prepare_frames(img_files, width, height):
+    """
+    Retorna os frames normalizados (mesma ordem de img_files), gerando em
+    paralelo só os que ainda não estão no cache
+    """
+    os.makedirs(FRAME_CACHE_DIR, exist_ok=True)
+    t0 = time.time()
+
+    with ThreadPoolExecutor(max_workers=max(1, PREPROCESS_THREADS)) as executor:
+        results = list(executor.map(lambda p: _prepare_one(p, width, height), img_files))
+
+    hits = sum(1 for _, cached in results if cached)
+    elapsed = time.time() - t0
+    print(f"🖼️ Frames prontos em {elapsed:.2f}s "
+          f"({hits}/{len(results)} do cache, {len(results) - hits} processados)")
+    progress.emit_timings(image_preprocess=round(elapsed, 3), frames_cache_hits=hits,
+                          frames_cache_misses=len(results) - hits)
+
+    frames = [path for path, _ in results]
+    evict_frames(keep=set(frames))
+    return frames
+
+# ========================================
+# REMOÇÃO
+# ========================================
+
+def evict_frames(max_bytes=FRAME_CACHE_MAX_MB * 1024 * 1024,
+                 max_age=FRAME_CACHE_MAX_AGE_DAYS * 86400, keep=()):
+    """Remove frames velhos e, se ainda passar do limite, os menos usados"""
+    return evict_cache_dir(FRAME_CACHE_DIR, max_bytes, max_age, keep, label="frame(s)")
+
+def evict_cache_dir(cache_dir, max_bytes, max_age, keep=(), label="arquivo(s)"):
+    """
+    Política de remoção compartilhada pelos caches de arquivos: primeiro o que
+    está sem uso há mais de max_age segundos, depois os mais antigos até o
+    total ficar abaixo de max_bytes (mtime = último uso)
+    """
+    if not os.path.isdir(cache_dir):
+        return 0
+
+    now = time.time()
+    entries = []
+    for fname in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, fname)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            continue
+        entries.append((st.st_mtime, st.st_size, path))
+    entries.sort()
+
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for mtime, size, path in entries:
+        if now - mtime <= max_age and total <= max_bytes:
+            break
+        if path in keep:
+            continue
+        try:
+            os.remove(path)
+            removed += 1
+            total -= size
+        except OSError:
+            pass
+
+    if removed:
+        print(f"🧹 {removed} {label} removidos do cache")
+    return removed
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Índice persistente das imagens de imagens/
+Cada arquivo é lido uma única vez: o índice (tabela no banco de jobs, ver
+job_store.py) guarda nome, sha256, dimensões, formato, se a imagem foi
+decodificada com sucesso e o tamanho/mtime de quando foi lida. Nas próximas
+consultas só o stat é comparado - hash e decodificação rodam de novo apenas
+para arquivos novos ou modificados (renomeados reaproveitam o registro).
+
+Imagens corrompidas ou truncadas são rejeitadas na entrada: a decodificação
+completa (Pillow) falha uma vez, o erro fica no índice e o arquivo não é lido
+de novo até mudar.
+"""
+
+import os
+import stat
+import time
+import sqlite3
+import threading
+
+from hashing import file_sha256
+from job_store import JOB_DB_PATH
+
+# ========================================
+# CONFIGURAÇÕES
+# ========================================
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+IMAGE_FORMATS = ("JPEG", "MPO", "PNG")  # MPO = JPEG de câmeras/celulares com miniaturas
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS images (
+    folder      TEXT NOT NULL,
+    name        TEXT NOT NULL,
+    sha256      TEXT,
+    width       INTEGER,
+    height      INTEGER,
+    format      TEXT,
+    verified    INTEGER NOT NULL DEFAULT 0,
+    error       TEXT,
+    size        INTEGER NOT NULL,
+    mtime_ns    INTEGER NOT NULL,
+    inode       INTEGER,
+    indexed_at  REAL NOT NULL,
+    PRIMARY KEY (folder, name)
+);
+"""
+
+COLUMNS = ("name", "sha256", "width", "height", "format", "verified", "error",
+           "size", "mtime_ns", "inode", "indexed_at")
+
+# ========================================
+# VALIDAÇÃO
+# ========================================
+
+def sanitize_name(fname):
+    """Nome sem os caracteres que o n8n deixa nos arquivos ($'\\n\\n', aspas, espaços)"""
+    clean = fname.replace('\n', '').replace('\r', '')
+    clean = clean.replace("'", "").replace('"', "")
+    clean = clean.replace("$'", "").replace("'", "")
+    clean = clean.replace("\\n", "").replace("\\r", "")
+    clean = clean.replace("$'\\n\\n'", "").replace("$'\\n'", "")
+    clean = clean.strip().replace(" ", "_").replace("__", "_")
+    return clean
+
+def clean_file_names(folder):
+    """
+    Renomeia os arquivos da pasta para o nome limpo e remove os vazios
+    Retorna ([(nome antigo, nome novo)], [removidos])
+    """
+    renamed, removed = [], []
+    with os.scandir(folder) as it:
+        items = [item for item in it if item.is_file()]
+    for item in items:
+        if item.stat().st_size == 0:
+            os.remove(item.path)
+            print(f"🗑️ Removido arquivo vazio: {item.name!r}")
+            removed.append(item.name)
+            continue
+        clean = sanitize_name(item.name)
+        if clean and clean != item.name:
+            try:
+                os.rename(item.path, os.path.join(folder, clean))
+                print(f"✅ Renomeado: {item.name!r} -> {clean!r}")
+                renamed.append((item.name, clean))
+            except OSError as e:
+                print(f"❌ Erro ao renomear {item.name!r}: {e}")
+    return renamed, removed
+
+def decode_image(path):
+    """
+    Decodifica a imagem inteira e retorna (largura, altura, formato)
+
+    Raises:
+        ValueError se o arquivo não for uma imagem JPEG/PNG legível até o fim
+    """
+    from PIL import Image, UnidentifiedImageError
+
+    try:
+        with Image.open(path) as img:
+            img.verify()  # Estrutura e CRCs (PNG)
+        with Image.open(path) as img:
+            img.load()  # Decodificação completa: pega arquivos truncados
+            width, height, fmt = img.width, img.height, img.format
+    except UnidentifiedImageError:
+        raise ValueError("formato não reconhecido")
+    except (OSError, SyntaxError, Image.DecompressionBombError) as e:
+        raise ValueError(f"imagem corrompida ({e})")
+    if fmt not in IMAGE_FORMATS:
+        raise ValueError(f"formato não suportado ({fmt})")
+    return width, height, fmt
+
+def inspect_image(path, st=None):
+    """Registro do índice para o arquivo (lê o conteúdo: hash + decodificação)"""
+    st = st or os.stat(path)
+    entry = {"name": os.path.basename(path), "sha256": None, "width": None, "height": None,
+             "format": None, "verified": 0, "error": None, "size": st.st_size,
+             "mtime_ns": st.st_mtime_ns, "inode": st.st_ino, "indexed_at": time.time()}
+    if st.st_size == 0:
+        entry["error"] = "imagem vazia"
+        return entry
+    try:
+        entry["sha256"] = file_sha256(path)
+        entry["width"], entry["height"], entry["format"] = decode_image(path)
+        entry["verified"] = 1
+    except ValueError as e:
+        entry["error"] = str(e)
+    except OSError as e:
+        entry["error"] = f"erro de leitura ({e})"
+    return entry
+
+# ========================================
+# ÍNDICE
+# ========================================
+
+class ImageIndex:
+    """Índice das imagens de uma ou mais pastas (uma conexão SQLite por thread)"""
+
+    def __init__(self, db_path=JOB_DB_PATH):
+        self.db_path = db_path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _rows(self, folder, names=None):
+        conn = self._conn()
+        if names is None:
+            rows = conn.execute("SELECT * FROM images WHERE folder = ?", (folder,))
+        else:
+            marks = ",".join("?" * len(names))
+            rows = conn.execute(f"SELECT * FROM images WHERE folder = ? AND name IN ({marks})",
+                                (folder, *names))
+        return {row["name"]: {c: row[c] for c in COLUMNS} for row in rows}
+
+    def _write(self, folder, entries, removed=()):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO images (folder, {', '.join(COLUMNS)}) "
+                f"VALUES (?, {', '.join('?' * len(COLUMNS))})",
+                [(folder, *(entry[c] for c in COLUMNS)) for entry in entries])
+            conn.executemany("DELETE FROM images WHERE folder = ? AND name = ?",
+                             [(folder, name) for name in removed])
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _unchanged(entry, st):
+        return entry["size"] == st.st_size and entry["mtime_ns"] == st.st_mtime_ns
+
+    def _update(self, folder, found, known, vanished=()):
+        """
+        Compara o stat de 'found' ({nome: stat}) com o índice e lê só o que mudou
+        Retorna {nome: registro} dos arquivos encontrados.
+        """
+        # Renomeados (ex.: limpeza de nomes) mantêm inode, tamanho e mtime
+        moved = {(e["inode"], e["size"], e["mtime_ns"]): e for e in vanished}
+        result, changed = {}, []
+        for name, st in found.items():
+            entry = known.get(name)
+            if entry is None or not self._unchanged(entry, st):
+                previous = moved.get((st.st_ino, st.st_size, st.st_mtime_ns))
+                if previous is not None:
+                    entry = {**previous, "name": name, "indexed_at": time.time()}
+                else:
+                    entry = inspect_image(os.path.join(folder, name), st)
+                    if not entry["verified"]:
+                        print(f"⚠️ Imagem rejeitada: {name!r} - {entry['error']}")
+                changed.append(entry)
+            result[name] = entry
+        removed = [e["name"] for e in vanished]
+        if changed or removed:
+            self._write(folder, changed, removed)
+        return result
+
+    def sync(self, folder):
+        """
+        Atualiza o índice da pasta (um scandir; só arquivos novos ou modificados
+        são lidos) e retorna os registros em ordem alfabética
+        """
+        folder = os.path.abspath(folder)
+        found = {}
+        with os.scandir(folder) as it:
+            for item in it:
+                if item.name.lower().endswith(IMAGE_EXTENSIONS) and item.is_file():
+                    found[item.name] = item.stat()
+        known = self._rows(folder)
+        vanished = [e for name, e in known.items() if name not in found]
+        entries = self._update(folder, found, known, vanished)
+        return [entries[name] for name in sorted(entries)]
+
+    def lookup(self, folder, names):
+        """
+        Registros só dos arquivos pedidos (stat de cada um, sem listar a pasta)
+        Retorna {nome: registro ou None se o arquivo não existir}
+        """
+        folder = os.path.abspath(folder)
+        names = list(dict.fromkeys(names))
+        found, missing = {}, []
+        for name in names:
+            try:
+                st = os.stat(os.path.join(folder, name))
+            except OSError:
+                missing.append(name)
+                continue
+            if stat.S_ISREG(st.st_mode):
+                found[name] = st
+            else:
+                missing.append(name)
+        known = self._rows(folder, names)
+        vanished = [known[name] for name in missing if name in known]
+        entries = self._update(folder, found, known, vanished)
+        return {name: entries.get(name) for name in names}
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Execução de jobs com vários workers HTTP (gunicorn, wsgi.py)
+Todos os workers atendem a API, mas só UM executa jobs: o "executor",
+eleito por um lock de arquivo (flock). Se ele morrer, o lock é liberado pelo
+sistema operacional e outro worker assume.
+
+  - Workers HTTP gravam o job como 'queued' no banco (job_store.py); o banco
+    é a fila. StoreQueue responde vagas, posição e estimativa lendo o banco,
+    então qualquer worker responde /status e devolve 429 com fila cheia.
+  - O executor roda as filas em memória (job_queue.py) e o JobDispatcher
+    passa para elas os jobs 'queued' do banco que ainda não estão em execução.
+
+Configuração (variáveis de ambiente):
+  - RUNNER_LOCK_PATH: arquivo do lock de eleição (padrão <JOB_DB_PATH>.runner.lock)
+  - DISPATCH_INTERVAL: segundos entre varreduras do banco pelo executor (padrão 0.5)
+"""
+
+import os
+import time
+import fcntl
+import threading
+
+from job_store import JOB_DB_PATH
+from job_queue import QueueFullError, estimate_start
+
+# ========================================
+# CONFIGURAÇÕES
+# ========================================
+
+RUNNER_LOCK_PATH = os.environ.get("RUNNER_LOCK_PATH", f"{JOB_DB_PATH}.runner.lock")
+DISPATCH_INTERVAL = float(os.environ.get("DISPATCH_INTERVAL", "0.5"))
+
+# ========================================
+# ELEIÇÃO DO EXECUTOR
+# ========================================
+
+class RunnerLock:
+    """Lock exclusivo (flock) que elege o worker executor"""
+
+    def __init__(self, path=RUNNER_LOCK_PATH):
+        self.path = path
+        self._fd = None
+
+    def acquire(self, blocking=True):
+        """Tenta virar o executor; com blocking=True espera o atual sair"""
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, f"{os.getpid()}\n".encode())
+        self._fd = fd
+        return True
+
+    @property
+    def held(self):
+        return self._fd is not None
+
+    def release(self):
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+
+    def owner(self):
+        """PID do executor atual (None se desconhecido)"""
+        try:
+            with open(self.path) as f:
+                return int(f.read().strip() or 0) or None
+        except (OSError, ValueError):
+            return None
+
+# ========================================
+# FILA LIDA DO BANCO
+# ========================================
+
+class StoreQueue:
+    """
+    Mesma interface de leitura da JobQueue, calculada a partir do banco de jobs
+
+    enqueue() confere a vaga e grava o job como 'queued' numa só transação do
+    banco (QueueFullError se cheia); o executor o pega do banco. submit() só
+    confere a vaga de um job que já está no banco (etapas do pipeline, recuperação).
+    """
+
+    persistent = True
+
+    def __init__(self, store, job_type, queue_of, max_concurrency=1, max_queue=50,
+                 ordering="fifo", default_duration=60.0):
+        self.store = store
+        self.job_type = job_type
+        self.queue_of = queue_of  # (tipo, payload) -> fila do job
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max_queue
+        self.ordering = ordering
+        self.default_duration = default_duration
+
+    def _active(self, active_jobs=None):
+        """(jobs na fila em ordem de execução, jobs executando)"""
+        queued, running = [], []
+        for job in self.store.active_jobs() if active_jobs is None else active_jobs:
+            if self.queue_of(job["type"], job["payload"] or {}) != self.job_type:
+                continue
+            (queued if job["status"] == "queued" else running).append(job)
+        queued.sort(key=self._order_key)
+        return queued, running
+
+    def _order_key(self, job):
+        payload = job["payload"] or {}
+        queued_at = payload.get("stage_queued_at") or job["created_at"]
+        priority = -payload.get("priority", 0) if self.ordering == "priority" else 0
+        return (priority, queued_at)
+
+    def submit(self, job_id, args=(), priority=0, active_jobs=None):
+        queued, _ = self._active(active_jobs)
+        waiting = [job for job in queued if job["id"] != job_id]
+        if len(waiting) >= self.max_queue:
+            raise QueueFullError(self.job_type, self.max_queue)
+        if self.ordering == "priority":
+            return sum(1 for job in waiting if self._order_key(job)[0] <= -priority)
+        return len(waiting)
+
+    def enqueue(self, job_id, job_type, payload, priority=0, message=None, batch_id=None):
+        """Grava o job como 'queued' se houver vaga; retorna a posição na fila"""
+        return self.store.enqueue(
+            job_id, job_type, lambda active_jobs: self.submit(job_id, priority=priority,
+                                                              active_jobs=active_jobs),
+            message=message, payload=payload, batch_id=batch_id)
+
+    def will_start_now(self):
+        queued, running = self._active()
+        return len(queued) + len(running) <= self.max_concurrency
+
+    def free_slots(self):
+        queued, _ = self._active()
+        return max(0, self.max_queue - len(queued))
+
+    def is_active(self, job_id):
+        queued, running = self._active()
+        return any(job["id"] == job_id for job in queued + running)
+
+    def position(self, job_id):
+        queued, _ = self._active()
+        for i, job in enumerate(queued):
+            if job["id"] == job_id:
+                return i
+        return None
+
+    def estimated_start(self, job_id):
+        queued, running = self._active()
+        position = next((i for i, job in enumerate(queued) if job["id"] == job_id), None)
+        if position is None:
+            return None
+        starts = [(job["payload"] or {}).get("stage_started_at") or job["started_at"] or time.time()
+                  for job in running]
+        return estimate_start(position, starts, self.default_duration, self.max_concurrency)
+
+    def stats(self):
+        queued, running = self._active()
+        return {
+            "queued": len(queued),
+            "running": len(running),
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "ordering": self.ordering,
+            "avg_duration": round(self.default_duration, 2),
+        }
+
+# ========================================
+# DESPACHO (EXECUTOR)
+# ========================================
+
+class JobDispatcher:
+    """
+    Thread do executor: leva os jobs 'queued' do banco para as filas em memória
+
+    Acorda a cada DISPATCH_INTERVAL ou quando 'wakeup' (threading.Condition)
+    é notificado por uma escrita local no banco.
+    """
+
+    def __init__(self, store, executor, queue_of, args_of, wakeup=None, interval=DISPATCH_INTERVAL):
+        self.store = store
+        self.executor = executor
+        self.queue_of = queue_of
+        self.args_of = args_of
+        self.wakeup = wakeup or threading.Condition()
+        self.interval = interval
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="job-dispatcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopping.set()
+        with self.wakeup:
+            self.wakeup.notify_all()
+        if self._thread is not None:
+            self._thread.join(5)
+
+    def dispatch_once(self):
+        """Submete os jobs da fila do banco que o executor ainda não tem; retorna quantos"""
+        submitted = 0
+        for job in self.store.active_jobs():
+            if job["status"] != "queued" or self.executor.is_active(job["id"]):
+                continue
+            payload = job["payload"] or {}
+            queue_type = self.queue_of(job["type"], payload)
+            if queue_type not in self.executor.queues:
+                continue
+            try:
+                self.executor.submit(queue_type, job["id"], self.args_of(job["type"], job["id"], payload),
+                                     payload.get("priority", 0))
+                submitted += 1
+            except QueueFullError:
+                continue  # Fica no banco; entra quando abrir vaga
+        return submitted
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                self.dispatch_once()
+            except Exception as e:
+                print(f"⚠️ Erro ao despachar jobs: {e}")
+            with self.wakeup:
+                self.wakeup.wait(self.interval)
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Saída dos processos filhos por job
+Em vez de capture_output (tudo em memória até o processo terminar), a saída é
+lida linha a linha e vai para:
+  - um buffer circular limitado em bytes (final da saída, salvo no job)
+  - logs/jobs/<id>.log, com rotação por tamanho (<id>.log.1, .2, ...)
+
+A memória fica limitada por mais que o processo escreva.
+
+Configuração (variáveis de ambiente):
+  - JOB_OUTPUT_TAIL_KB: tamanho do buffer circular por job (padrão 64KB)
+  - JOB_LOG_MAX_KB: tamanho de cada arquivo de log antes de rotacionar (padrão 1024KB)
+  - JOB_LOG_BACKUPS: arquivos rotacionados mantidos por job (padrão 2)
+"""
+
+import os
+import time
+import threading
+import subprocess
+from collections import deque
+
+from hashing import safe_name
+
+# ========================================
+# CONFIGURAÇÕES
+# ========================================
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+JOB_LOG_DIR = os.path.join(BASE_DIR, "logs", "jobs")
+JOB_OUTPUT_TAIL_KB = int(os.environ.get("JOB_OUTPUT_TAIL_KB", "64"))
+JOB_LOG_MAX_KB = int(os.environ.get("JOB_LOG_MAX_KB", "1024"))
+JOB_LOG_BACKUPS = int(os.environ.get("JOB_LOG_BACKUPS", "2"))
+
+# ========================================
+# BUFFER CIRCULAR
+# ========================================
+
+class RingBuffer:
+    """Últimas linhas de uma saída, limitado a max_bytes"""
+
+    def __init__(self, max_bytes=JOB_OUTPUT_TAIL_KB * 1024):
+        self.max_bytes = max(1, max_bytes)
+        self._lines = deque()
+        self._size = 0
+        self.dropped = 0  # Linhas descartadas do início
+        self._lock = threading.Lock()
+
+    def append(self, line):
+        if len(line) > self.max_bytes:
+            line = "..." + line[-(self.max_bytes - 3):]
+        with self._lock:
+            self._lines.append(line)
+            self._size += len(line)
+            while self._size > self.max_bytes:
+                self._size -= len(self._lines.popleft())
+                self.dropped += 1
+
+    def extend(self, lines):
+        for line in lines:
+            self.append(line)
+
+    def text(self):
+        with self._lock:
+            body = "".join(self._lines)
+            if self.dropped:
+                return f"[... {self.dropped} linha(s) anteriores omitidas ...]\n" + body
+            return body
+
+# ========================================
+# LOG POR JOB (COM ROTAÇÃO)
+# ========================================
+
+def log_path(job_id):
+    """logs/jobs/<id>.log (IDs com outros caracteres além de [A-Za-z0-9_.-] ganham hash)"""
+    return os.path.join(JOB_LOG_DIR, f"{safe_name(job_id)}.log")
+
+class JobLog:
+    """Arquivo de log de um job, rotacionado ao passar de max_bytes"""
+
+    def __init__(self, job_id, max_bytes=JOB_LOG_MAX_KB * 1024, backups=JOB_LOG_BACKUPS):
+        os.makedirs(JOB_LOG_DIR, exist_ok=True)
+        self.path = log_path(job_id)
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._file = open(self.path, "a", encoding="utf-8", errors="replace")
+        self._size = self._file.tell()
+
+    def write(self, line):
+        if self.max_bytes and self._size + len(line) > self.max_bytes and self._size > 0:
+            self._rotate()
+        self._file.write(line)
+        self._size += len(line)
+
+    def _rotate(self):
+        self._file.close()
+        if self.backups > 0:
+            for i in range(self.backups - 1, 0, -1):
+                src = f"{self.path}.{i}"
+                if os.path.exists(src):
+                    os.replace(src, f"{self.path}.{i + 1}")
+            os.replace(self.path, f"{self.path}.1")
+        self._file = open(self.path, "w", encoding="utf-8", errors="replace")
+        self._size = 0
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+def read_log_tail(job_id, max_bytes=JOB_OUTPUT_TAIL_KB * 1024):
+    """Final do log atual de um job (None se não existir)"""
+    path = log_path(job_id)
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        f.seek(max(0, size - max_bytes))
+        return f.read().decode("utf-8", errors="replace")
+
+def purge_logs(max_age_seconds):
+    """Remove logs de jobs sem escrita há mais de max_age_seconds"""
+    if not os.path.isdir(JOB_LOG_DIR):
+        return 0
+    cutoff = time.time() - max_age_seconds
+    removed = 0
+    for fname in os.listdir(JOB_LOG_DIR):
+        path = os.path.join(JOB_LOG_DIR, fname)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                removed += 1
+        except OSError:
+            pass
+    return removed
+
+# ========================================
+# EXECUÇÃO DE PROCESSOS
+# ========================================
+
+def stream_process(cmd, job_id, timeout=None, on_line=None, env=None):
+    """
+    Executa cmd lendo stdout+stderr linha a linha
+
+    Cada linha passa por on_line(line) (se retornar True a linha foi consumida,
+    ex.: evento de progresso) e depois vai para o buffer circular e o log do job.
+
+    Returns:
+        subprocess.CompletedProcess com stdout = final da saída (buffer circular)
+
+    Raises:
+        subprocess.TimeoutExpired se passar de timeout (processo é morto)
+    """
+    tail = RingBuffer()
+    log = JobLog(job_id)
+    log.write(f"\n=== {time.strftime('%Y-%m-%d %H:%M:%S')} $ {' '.join(map(str, cmd))[:500]}\n")
+
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+                            bufsize=1, errors="replace", env=env)
+    timed_out = threading.Event()
+
+    def kill():
+        timed_out.set()
+        proc.kill()
+
+    timer = threading.Timer(timeout, kill) if timeout else None
+    if timer:
+        timer.start()
+    try:
+        for line in proc.stdout:
+            if on_line is not None and on_line(line):
+                continue
+            tail.append(line)
+            log.write(line)
+        proc.wait()
+    finally:
+        if timer:
+            timer.cancel()
+        log.write(f"=== código de saída: {proc.returncode}\n")
+        log.close()
+
+    if timed_out.is_set():
+        raise subprocess.TimeoutExpired(cmd, timeout, output=tail.text())
+    return subprocess.CompletedProcess(cmd, proc.returncode, tail.text(), "")
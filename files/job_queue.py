@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Agendador de jobs com filas limitadas por tipo
+Cada tipo de job (audio, video, cleanup) tem sua própria fila com tamanho
+máximo e um número fixo de threads executoras (concorrência máxima).
+
+Ordenação:
+  - "fifo": ordem de chegada
+  - "priority": maior "priority" primeiro (empate = ordem de chegada)
+"""
+
+import time
+import heapq
+import itertools
+import threading
+import traceback
+from collections import deque
+
+DURATION_HISTORY = 20  # Jobs recentes usados para estimar o tempo de espera
+
+class QueueFullError(Exception):
+    """Fila do tipo de job está cheia"""
+
+    def __init__(self, job_type, max_queue):
+        super().__init__(f"Fila de '{job_type}' cheia ({max_queue} jobs aguardando)")
+        self.job_type = job_type
+        self.max_queue = max_queue
+
+def estimate_start(position, running_starts, avg, max_concurrency, now=None):
+    """
+    Estimativa (epoch) de quando o job na posição 'position' deve começar:
+    simula os slots, cada um livre quando o job atual terminar (duração média avg)
+    """
+    now = time.time() if now is None else now
+    slots = [max(0.0, avg - (now - started)) for started in running_starts]
+    slots += [0.0] * (max_concurrency - len(slots))
+    heapq.heapify(slots)
+    for _ in range(position):
+        heapq.heappush(slots, heapq.heappop(slots) + avg)
+    return now + slots[0]
+
+class JobQueue:
+    """Fila de um tipo de job + threads executoras"""
+
+    persistent = False  # Fila em memória (StoreQueue: a fila é o banco de jobs)
+
+    def __init__(self, job_type, handler, max_concurrency=1, max_queue=50,
+                 ordering="fifo", default_duration=60.0, on_start=None):
+        if ordering not in ("fifo", "priority"):
+            raise ValueError(f"Ordenação desconhecida: {ordering}")
+        self.job_type = job_type
+        self.handler = handler
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max_queue
+        self.ordering = ordering
+        self.default_duration = default_duration
+        self.on_start = on_start
+
+        self._heap = []  # (-prioridade, seq, job_id, args)
+        self._seq = itertools.count()
+        self._running = {}  # job_id -> início
+        self._durations = deque(maxlen=DURATION_HISTORY)
+        self._cond = threading.Condition()
+        self._threads = []
+        self._draining = False
+        self.completed = 0
+        self.failed = 0
+
+    def start(self):
+        for i in range(self.max_concurrency):
+            thread = threading.Thread(target=self._run, name=f"{self.job_type}-runner-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def submit(self, job_id, args=(), priority=0):
+        """
+        Enfileira um job. Retorna a posição na fila (0 = será o próximo).
+        Levanta QueueFullError se a fila estiver cheia.
+        """
+        with self._cond:
+            if len(self._heap) >= self.max_queue:
+                raise QueueFullError(self.job_type, self.max_queue)
+            key = -priority if self.ordering == "priority" else 0
+            heapq.heappush(self._heap, (key, next(self._seq), job_id, args))
+            self._cond.notify()
+            return self._position_locked(job_id)
+
+    def will_start_now(self):
+        with self._cond:
+            return len(self._running) + len(self._heap) <= self.max_concurrency
+
+    def free_slots(self):
+        """Quantos jobs ainda cabem na fila"""
+        with self._cond:
+            return max(0, self.max_queue - len(self._heap))
+
+    def is_active(self, job_id):
+        with self._cond:
+            return job_id in self._running or any(e[2] == job_id for e in self._heap)
+
+    def position(self, job_id):
+        """Posição do job na fila (None se não estiver aguardando)"""
+        with self._cond:
+            return self._position_locked(job_id)
+
+    def estimated_start(self, job_id):
+        """Estimativa (epoch) de quando o job deve começar, ou None"""
+        with self._cond:
+            position = self._position_locked(job_id)
+            if position is None:
+                return None
+            return estimate_start(position, self._running.values(), self._avg_duration(),
+                                  self.max_concurrency)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "queued": len(self._heap),
+                "running": len(self._running),
+                "max_concurrency": self.max_concurrency,
+                "max_queue": self.max_queue,
+                "ordering": self.ordering,
+                "avg_duration": round(self._avg_duration(), 2),
+                "completed": self.completed,
+                "failed": self.failed,
+            }
+
+    def drain(self, deadline):
+        """
+        Para de iniciar jobs da fila e espera os que estão executando (até
+        deadline, epoch). Retorna os IDs que ainda estavam executando.
+        """
+        with self._cond:
+            self._draining = True
+            while self._running and time.time() < deadline:
+                self._cond.wait(min(1.0, max(0.0, deadline - time.time())))
+            return list(self._running)
+
+    # ----------------------------------------
+    # Internos
+    # ----------------------------------------
+
+    def _avg_duration(self):
+        if not self._durations:
+            return self.default_duration
+        return sum(self._durations) / len(self._durations)
+
+    def _position_locked(self, job_id):
+        ordered = sorted(self._heap)
+        for i, entry in enumerate(ordered):
+            if entry[2] == job_id:
+                return i
+        return None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._heap or self._draining:
+                    self._cond.wait()
+                _, _, job_id, args = heapq.heappop(self._heap)
+                started = time.time()
+                self._running[job_id] = started
+
+            ok = True
+            try:
+                if self.on_start:
+                    self.on_start(job_id)
+                self.handler(*args)
+            except Exception as e:
+                ok = False
+                print(f"❌ Erro no job {self.job_type} {job_id}: {e}")
+                traceback.print_exc()
+
+            with self._cond:
+                self._running.pop(job_id, None)
+                self._durations.append(time.time() - started)
+                if ok:
+                    self.completed += 1
+                else:
+                    self.failed += 1
+                self._cond.notify_all()  # drain() espera os jobs em execução
+
+class JobScheduler:
+    """Conjunto de filas, uma por tipo de job"""
+
+    def __init__(self):
+        self.queues = {}
+
+    def register(self, job_type, handler, **options):
+        self.queues[job_type] = JobQueue(job_type, handler, **options)
+        return self.queues[job_type]
+
+    def start(self):
+        for q in self.queues.values():
+            q.start()
+        return self
+
+    def submit(self, job_type, job_id, args=(), priority=0):
+        return self.queues[job_type].submit(job_id, args, priority)
+
+    def is_active(self, job_id):
+        """Job na fila ou executando em qualquer tipo"""
+        return any(q.is_active(job_id) for q in self.queues.values())
+
+    def drain(self, timeout):
+        """
+        Encerramento gracioso: nenhuma fila inicia jobs novos e os que estão
+        executando têm até 'timeout' segundos para terminar. Jobs que ficam na
+        fila continuam 'queued' no banco e são recuperados no próximo início.
+        Retorna os IDs que não terminaram a tempo.
+        """
+        deadline = time.time() + timeout
+        for q in self.queues.values():
+            with q._cond:
+                q._draining = True
+        return [job_id for q in self.queues.values() for job_id in q.drain(deadline)]
+
+    def stats(self):
+        return {job_type: q.stats() for job_type, q in self.queues.items()}
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Armazenamento persistente de jobs (SQLite em modo WAL)
+Substitui o dicionário em memória: o status dos jobs sobrevive a reinícios
+do servidor e pode ser lido por vários processos ao mesmo tempo.
+
+Campos de cada job: id, type, status, message, file, error, payload (JSON,
+usado para re-enfileirar após reinício), timings (JSON), progress (JSON, último
+evento de progresso), output (final da saída do processo filho), batch_id
+(lote) e timestamps.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+
+# ========================================
+# CONFIGURAÇÕES
+# ========================================
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+JOB_DB_PATH = os.environ.get("JOB_DB_PATH", os.path.join(BASE_DIR, "jobs.db"))
+JOB_RETENTION_HOURS = float(os.environ.get("JOB_RETENTION_HOURS", "24"))
+
+ACTIVE_STATES = ("queued", "running")
+FINAL_STATES = ("completed", "error")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id          TEXT PRIMARY KEY,
+    type        TEXT NOT NULL,
+    status      TEXT NOT NULL,
+    message     TEXT,
+    file        TEXT,
+    error       TEXT,
+    payload     TEXT,
+    timings     TEXT,
+    progress    TEXT,
+    output      TEXT,
+    batch_id    TEXT,
+    created_at  REAL NOT NULL,
+    started_at  REAL,
+    finished_at REAL,
+    updated_at  REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status_updated ON jobs (status, updated_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_type_status ON jobs (type, status);
+"""
+
+# Colunas adicionadas depois da primeira versão do banco (migração simples)
+MIGRATIONS = {
+    "batch_id": "ALTER TABLE jobs ADD COLUMN batch_id TEXT",
+    "progress": "ALTER TABLE jobs ADD COLUMN progress TEXT",
+    "output": "ALTER TABLE jobs ADD COLUMN output TEXT",
+}
+INDEXES_AFTER_MIGRATION = """
+CREATE INDEX IF NOT EXISTS idx_jobs_batch ON jobs (batch_id);
+"""
+
+JSON_FIELDS = ("payload", "timings", "progress")
+COLUMNS = ("id", "type", "status", "message", "file", "error", "payload", "timings",
+           "progress", "output", "batch_id", "created_at", "started_at", "finished_at", "updated_at")
+
+# ========================================
+# STORE
+# ========================================
+
+class JobStore:
+    """
+    Acesso ao banco de jobs (uma conexão SQLite por thread)
+
+    on_change(job_id), se definido, é chamado após cada escrita - usado pelo
+    servidor para acordar quem espera mudanças (long-poll e SSE).
+    """
+
+    def __init__(self, db_path=JOB_DB_PATH, on_change=None):
+        self.db_path = db_path
+        self.on_change = on_change
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        conn = self._conn()
+        conn.executescript(SCHEMA)
+        existing = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+        for column, ddl in MIGRATIONS.items():
+            if column not in existing:
+                conn.execute(ddl)
+        conn.executescript(INDEXES_AFTER_MIGRATION)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _to_dict(row):
+        if row is None:
+            return None
+        job = dict(row)
+        for field in JSON_FIELDS:
+            job[field] = json.loads(job[field]) if job[field] else None
+        return job
+
+    # ----------------------------------------
+    # Escrita
+    # ----------------------------------------
+
+    def create(self, job_id, job_type, status="queued", message=None, payload=None, batch_id=None):
+        """Cria (ou substitui) o registro de um job"""
+        self._insert(self._conn(), job_id, job_type, status, message, payload, batch_id)
+        self._changed(job_id)
+
+    def enqueue(self, job_id, job_type, admit, message=None, payload=None, batch_id=None):
+        """
+        Cria o job como 'queued' se admit(active_jobs) aceitar
+
+        A leitura dos jobs ativos e o INSERT ficam na mesma transação (BEGIN
+        IMMEDIATE): dois processos não passam juntos pela última vaga da fila.
+        admit recusa levantando exceção; o valor que ele retorna é repassado.
+        """
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = admit(self.active_jobs())
+            self._insert(conn, job_id, job_type, "queued", message, payload, batch_id)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self._changed(job_id)
+        return result
+
+    @staticmethod
+    def _insert(conn, job_id, job_type, status, message, payload, batch_id):
+        now = time.time()
+        conn.execute(
+            "INSERT OR REPLACE INTO jobs (id, type, status, message, payload, timings,"
+            " batch_id, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (job_id, job_type, status, message,
+             json.dumps(payload) if payload is not None else None,
+             json.dumps({}), batch_id, now, now)
+        )
+
+    def update(self, job_id, **fields):
+        """Atualiza campos de um job; 'timings' é mesclado com o existente"""
+        unknown = set(fields) - set(COLUMNS)
+        if unknown:
+            raise ValueError(f"Campos desconhecidos: {unknown}")
+
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if "timings" in fields:
+                row = conn.execute("SELECT timings FROM jobs WHERE id = ?", (job_id,)).fetchone()
+                merged = json.loads(row["timings"]) if row and row["timings"] else {}
+                merged.update(fields["timings"] or {})
+                fields["timings"] = merged
+            fields["updated_at"] = time.time()
+            for field in JSON_FIELDS:
+                if field in fields and fields[field] is not None:
+                    fields[field] = json.dumps(fields[field])
+            assignments = ", ".join(f"{name} = ?" for name in fields)
+            conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?",
+                         (*fields.values(), job_id))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self._changed(job_id)
+
+    def mark_running(self, job_id):
+        now = time.time()
+        job = self.get(job_id)
+        if job is None:
+            return
+        self.update(job_id, status="running", message="Processando...", started_at=now,
+                    timings={"queue_wait": round(now - job["created_at"], 3)})
+
+    def finish(self, job_id, status, message, file=None, error=None, timings=None):
+        """Marca o job como concluído/erro e registra o tempo de execução"""
+        now = time.time()
+        job = self.get(job_id)
+        if status == "error" and error is None:
+            error = message
+        timings = dict(timings or {})
+        if job and job.get("started_at"):
+            timings.setdefault("run", round(now - job["started_at"], 3))
+        if job and job.get("created_at"):
+            timings.setdefault("total", round(now - job["created_at"], 3))
+        self.update(job_id, status=status, message=message, file=file, error=error,
+                    finished_at=now, timings=timings)
+
+    def delete(self, job_id):
+        self._conn().execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+        self._changed(job_id)
+
+    def _changed(self, job_id):
+        if self.on_change is not None:
+            self.on_change(job_id)
+
+    # ----------------------------------------
+    # Leitura
+    # ----------------------------------------
+
+    def get(self, job_id):
+        row = self._conn().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row)
+
+    def is_active(self, job_id):
+        row = self._conn().execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row is not None and row["status"] in ACTIVE_STATES
+
+    def list(self, status=None, job_type=None, batch_id=None, limit=100, offset=0):
+        """Lista jobs (mais recentes primeiro) com filtros opcionais"""
+        where, params = [], []
+        if batch_id:
+            where.append("batch_id = ?")
+            params.append(batch_id)
+        if status:
+            where.append("status = ?")
+            params.append(status)
+        if job_type:
+            where.append("type = ?")
+            params.append(job_type)
+        sql = "SELECT * FROM jobs"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY updated_at DESC LIMIT ? OFFSET ?"
+        rows = self._conn().execute(sql, (*params, limit, offset)).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def count_by_status(self):
+        rows = self._conn().execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {row["status"]: row["n"] for row in rows}
+
+    def batch_summary(self, batch_id):
+        """Contagem por status e por tipo dos jobs de um lote (None se não existir)"""
+        rows = self._conn().execute(
+            "SELECT type, status, COUNT(*) AS n FROM jobs WHERE batch_id = ? GROUP BY type, status",
+            (batch_id,)
+        ).fetchall()
+        if not rows:
+            return None
+        summary = {"total": 0, "by_status": {}, "by_type": {}}
+        for row in rows:
+            summary["total"] += row["n"]
+            summary["by_status"][row["status"]] = summary["by_status"].get(row["status"], 0) + row["n"]
+            by_type = summary["by_type"].setdefault(row["type"], {})
+            by_type[row["status"]] = row["n"]
+        return summary
+
+    def active_jobs(self):
+        """Jobs que estavam na fila ou executando (ordem de criação)"""
+        rows = self._conn().execute(
+            "SELECT * FROM jobs WHERE status IN (?, ?) ORDER BY created_at", ACTIVE_STATES
+        ).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    # ----------------------------------------
+    # Retenção
+    # ----------------------------------------
+
+    def purge(self, older_than_seconds=JOB_RETENTION_HOURS * 3600):
+        """Remove jobs finalizados há mais que o período de retenção"""
+        cutoff = time.time() - older_than_seconds
+        cursor = self._conn().execute(
+            "DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?",
+            (*FINAL_STATES, cutoff)
+        )
+        return cursor.rowcount
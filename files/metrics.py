@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Métricas no formato do Prometheus (GET /metrics)
+Histogramas e contadores ficam em uma tabela do banco de jobs (job_store.py):
+todos os workers do gunicorn gravam e leem os mesmos valores, e os contadores
+continuam crescendo depois de um reinício. Gauges (fila, execução) são
+calculados pelo servidor na hora da coleta.
+
+Os tempos chegam de dois lados:
+  - servidor: espera na fila, execução, cache de áudios, timeouts e falhas
+  - scripts filhos: linhas "@@timings {json}" (progress.emit_timings) com carga
+    do modelo, síntese, pré-processamento de imagens, encode e mux; o servidor
+    soma esses tempos no registro do job (timings, visto em /status)
+"""
+
+import json
+import sqlite3
+import threading
+
+from job_store import JOB_DB_PATH
+
+# ========================================
+# CONFIGURAÇÕES
+# ========================================
+
+METRICS_PREFIX = "video_automation_"
+
+# nome -> (descrição, limites dos buckets em segundos ou razão)
+HISTOGRAMS = {
+    "tts_model_load_seconds": (
+        "Tempo de carga do modelo TTS (worker residente ou subprocesso)",
+        (0.5, 1, 2.5, 5, 10, 20, 40, 60, 120, 300)),
+    "tts_realtime_factor": (
+        "Segundos de síntese por segundo de áudio gerado",
+        (0.05, 0.1, 0.25, 0.5, 0.75, 1, 1.5, 2, 4, 8)),
+    "image_preprocess_seconds": (
+        "Normalização das imagens para o tamanho do vídeo (cache de frames)",
+        (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)),
+    "encode_seconds": (
+        "Codificação do vídeo no ffmpeg (por modo de render)",
+        (0.5, 1, 2.5, 5, 10, 20, 40, 60, 120, 300, 600)),
+    "mux_seconds": (
+        "Mux do áudio / concat final sem re-encode",
+        (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)),
+    "queue_wait_seconds": (
+        "Espera na fila até o job (ou etapa do pipeline) começar",
+        (0.1, 0.5, 1, 5, 10, 30, 60, 120, 300, 600, 1800)),
+    "job_run_seconds": (
+        "Execução do job ou etapa do pipeline, sem a fila",
+        (1, 2.5, 5, 10, 20, 40, 60, 120, 300, 600)),
+}
+
+# nome -> descrição
+COUNTERS = {
+    "cache_hits_total": "Itens servidos do cache (audio, frames, segments)",
+    "cache_misses_total": "Itens gerados por não estarem no cache (audio, frames, segments)",
+    "jobs_completed_total": "Jobs (ou etapas) concluídos",
+    "job_failures_total": "Jobs (ou etapas) que terminaram com erro, timeouts inclusos",
+    "job_timeouts_total": "Jobs (ou etapas) interrompidos pelo timeout (300s áudio, 600s vídeo)",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS metrics (
+    name    TEXT NOT NULL,
+    labels  TEXT NOT NULL,
+    bucket  TEXT NOT NULL,
+    value   REAL NOT NULL,
+    PRIMARY KEY (name, labels, bucket)
+);
+"""
+
+UPSERT = ("INSERT INTO metrics (name, labels, bucket, value) VALUES (?, ?, ?, ?) "
+          "ON CONFLICT (name, labels, bucket) DO UPDATE SET value = value + excluded.value")
+
+# ========================================
+# FORMATO
+# ========================================
+
+def _format_value(value):
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+def _format_bound(bound):
+    return "+Inf" if bound == float("inf") else _format_value(bound)
+
+def _format_labels(labels, **extra):
+    items = sorted(labels.items()) + list(extra.items())
+    if not items:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+               for _, v in items)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(items, escaped)) + "}"
+
+# ========================================
+# STORE
+# ========================================
+
+class MetricsStore:
+    """
+    Histogramas e contadores persistidos no SQLite (uma conexão por thread)
+
+    Gravar métricas nunca derruba um job: erros do banco viram um aviso.
+    """
+
+    def __init__(self, db_path=JOB_DB_PATH):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _write(self, rows):
+        conn = self._conn()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(UPSERT, rows)
+            conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            print(f"⚠️ Erro ao gravar métricas: {e}")
+
+    def observe(self, name, value, **labels):
+        """Registra um valor no histograma 'name'"""
+        if value is None:
+            return
+        value = float(value)
+        key = json.dumps(labels, sort_keys=True)
+        rows = [(name, key, _format_bound(bound), 1) for bound in HISTOGRAMS[name][1] if value <= bound]
+        rows += [(name, key, "+Inf", 1), (name, key, "sum", value)]
+        self._write(rows)
+
+    def inc(self, name, amount=1, **labels):
+        """Soma 'amount' ao contador 'name'"""
+        if name not in COUNTERS:
+            raise KeyError(name)
+        if amount:
+            self._write([(name, json.dumps(labels, sort_keys=True), "", amount)])
+
+    def values(self):
+        """{nome: {labels JSON: {bucket: valor}}} de tudo o que já foi gravado"""
+        result = {}
+        for name, labels, bucket, value in self._conn().execute(
+                "SELECT name, labels, bucket, value FROM metrics ORDER BY name, labels"):
+            result.setdefault(name, {}).setdefault(labels, {})[bucket] = value
+        return result
+
+    def render(self, gauges=()):
+        """
+        Texto no formato de exposição do Prometheus
+
+        Args:
+            gauges: [(nome, descrição, [(labels dict, valor), ...])] calculados na coleta
+        """
+        stored = self.values()
+        lines = []
+        for name, (help_text, bounds) in HISTOGRAMS.items():
+            full = METRICS_PREFIX + name
+            lines += [f"# HELP {full} {help_text}", f"# TYPE {full} histogram"]
+            for key, buckets in stored.get(name, {}).items():
+                labels = json.loads(key)
+                for bound in (*bounds, float("inf")):
+                    le = _format_bound(bound)
+                    lines.append(f"{full}_bucket{_format_labels(labels, le=le)} "
+                                 f"{_format_value(buckets.get(le, 0))}")
+                lines.append(f"{full}_sum{_format_labels(labels)} {_format_value(buckets.get('sum', 0))}")
+                lines.append(f"{full}_count{_format_labels(labels)} {_format_value(buckets.get('+Inf', 0))}")
+        for name, help_text in COUNTERS.items():
+            full = METRICS_PREFIX + name
+            lines += [f"# HELP {full} {help_text}", f"# TYPE {full} counter"]
+            for key, buckets in stored.get(name, {}).items():
+                lines.append(f"{full}{_format_labels(json.loads(key))} {_format_value(buckets.get('', 0))}")
+        for name, help_text, samples in gauges:
+            full = METRICS_PREFIX + name
+            lines += [f"# HELP {full} {help_text}", f"# TYPE {full} gauge"]
+            for labels, value in samples:
+                lines.append(f"{full}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+# ========================================
+# TEMPOS DOS JOBS
+# ========================================
+
+def merge_timings(timings, reported):
+    """Soma os tempos informados pelo script filho (números somam, o resto substitui)"""
+    for name, value in reported.items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool) \
+                and isinstance(timings.get(name), (int, float)):
+            timings[name] = round(timings[name] + value, 3)
+        else:
+            timings[name] = value
+    return timings
+
+def record_job(store, stage, status, timings, run_seconds=None):
+    """
+    Alimenta os histogramas/contadores com o resultado de um job ou etapa
+
+    Args:
+        stage: "audio" ou "video" (etapa do pipeline ou tipo do job)
+        status: "completed" ou "error"
+        timings: tempos do job (sem o prefixo de etapa do pipeline)
+        run_seconds: duração da execução, sem a fila
+    """
+    timings = timings or {}
+    store.inc("jobs_completed_total" if status == "completed" else "job_failures_total", stage=stage)
+    if run_seconds is not None:
+        store.observe("job_run_seconds", run_seconds, stage=stage)
+    if "model_load" in timings:
+        store.observe("tts_model_load_seconds", timings["model_load"], backend="subprocess")
+    if "rtf" in timings:
+        store.observe("tts_realtime_factor", timings["rtf"])
+    if "image_preprocess" in timings:
+        store.observe("image_preprocess_seconds", timings["image_preprocess"])
+    if "encode" in timings:
+        store.observe("encode_seconds", timings["encode"], mode=timings.get("render_mode", "unknown"))
+    if "mux" in timings:
+        store.observe("mux_seconds", timings["mux"])
+    for cache in ("frames", "segments"):
+        store.inc("cache_hits_total", timings.get(f"{cache}_cache_hits", 0), cache=cache)
+        store.inc("cache_misses_total", timings.get(f"{cache}_cache_misses", 0), cache=cache)
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Efeitos de movimento (Ken Burns) e transições (crossfade) com NumPy
+Os frames são gerados em Python sem callbacks por pixel: cada frame é um recorte
+(zoom/pan) de uma imagem pré-escalada, amostrado com índices vetorizados
+(np.take) em buffers alocados uma única vez, e vai cru para o stdin do ffmpeg.
+Enquanto o ffmpeg codifica um frame, o próximo já está sendo gerado.
+
+Os pixels ficam em 4 bytes (RGB + 1 byte de preenchimento, "rgb0" no ffmpeg):
+cada pixel vira um uint32 e a amostragem por colunas fica ~3x mais rápida do
+que com 3 bytes por pixel (rgb24).
+
+As imagens são pré-escaladas para o canvas do vídeo + margem de zoom (cache de
+frames, image_cache.py), então o recorte nunca amplia a imagem.
+
+Configuração (variáveis de ambiente):
+  - KENBURNS_ZOOM: zoom máximo de cada slide (padrão 0.12 = 12%)
+  - CROSSFADE_SECONDS: duração do crossfade entre slides (padrão 0.5; 0 = corte seco)
+"""
+
+import os
+import time
+import threading
+import subprocess
+
+import numpy as np
+
+from image_cache import prepare_frames
+from encoder_profiles import video_codec_args, audio_codec_args, container_args
+from job_logs import RingBuffer
+import progress
+
+# ========================================
+# CONFIGURAÇÕES
+# ========================================
+
+KENBURNS_ZOOM = float(os.environ.get("KENBURNS_ZOOM", "0.12"))
+CROSSFADE_SECONDS = float(os.environ.get("CROSSFADE_SECONDS", "0.5"))
+PROGRESS_INTERVAL = 0.5  # Segundos entre eventos de progresso
+
+# Movimento de cada slide (alterna pela posição): zoom inicial/final e
+# deslocamento do centro (fração da folga disponível, -1 a 1)
+MOTIONS = [
+    {"zoom": (0.0, 1.0), "pan": ((0.0, 0.0), (0.0, 0.0))},    # aproxima no centro
+    {"zoom": (1.0, 0.0), "pan": ((0.0, 0.0), (0.0, 0.0))},    # afasta do centro
+    {"zoom": (0.6, 0.6), "pan": ((-1.0, 0.0), (1.0, 0.0))},   # esquerda -> direita
+    {"zoom": (0.6, 0.6), "pan": ((0.0, -1.0), (0.0, 1.0))},   # cima -> baixo
+]
+
+# ========================================
+# MOTOR DE FRAMES
+# ========================================
+
+def source_size(width, height, zoom=KENBURNS_ZOOM):
+    """Tamanho das imagens pré-escaladas (canvas + margem de zoom, dimensões pares)"""
+    return (int(round(width * (1 + zoom) / 2)) * 2, int(round(height * (1 + zoom) / 2)) * 2)
+
+def _smoothstep(p):
+    return p * p * (3 - 2 * p)
+
+class MotionEngine:
+    """
+    Gera os frames do slideshow com zoom/pan e crossfade
+
+    frames() devolve sempre o MESMO buffer (height, width, 4) uint8 (rgb0),
+    reescrito a cada frame: quem consome precisa usar/gravar o frame antes de
+    pedir o próximo.
+    """
+
+    def __init__(self, sources, durations, width, height, fps,
+                 zoom=KENBURNS_ZOOM, crossfade=CROSSFADE_SECONDS):
+        self.sources = sources
+        self.width, self.height, self.fps = width, height, fps
+        self.zoom = max(0.0, zoom)
+        self.starts = np.concatenate([[0.0], np.cumsum(durations)])
+        self.total_frames = int(round(self.starts[-1] * fps))
+        self.crossfade = min(max(0.0, crossfade), min(durations) / 2) if len(durations) > 1 else 0.0
+
+        # Buffers reaproveitados em todos os frames (uint32 = 1 pixel; view uint8 = canais)
+        self._out = np.empty((height, width), dtype=np.uint32)
+        self._next = np.empty((height, width), dtype=np.uint32)
+        self._out8 = self._out.view(np.uint8).reshape(height, width, 4)
+        self._next8 = self._next.view(np.uint8).reshape(height, width, 4)
+        self._acc = np.empty((height, width, 4), dtype=np.uint16)
+        self._tmp = np.empty((height, width, 4), dtype=np.uint16)
+        self._rows = None
+        self._base_x = (np.arange(width, dtype=np.float64) + 0.5) / width
+        self._base_y = (np.arange(height, dtype=np.float64) + 0.5) / height
+        self._fx = np.empty(width, dtype=np.float64)
+        self._fy = np.empty(height, dtype=np.float64)
+        self._xs = np.empty(width, dtype=np.intp)
+        self._ys = np.empty(height, dtype=np.intp)
+        self._loaded = {}
+
+    def _image(self, index):
+        """Imagem pré-escalada do slide (só o slide atual e o próximo ficam na memória)"""
+        image = self._loaded.get(index)
+        if image is None:
+            from PIL import Image
+            with Image.open(self.sources[index]) as img:
+                rgba = np.ascontiguousarray(np.asarray(img.convert("RGBA")))
+            image = rgba.view(np.uint32).reshape(rgba.shape[:2])
+            for old in [k for k in self._loaded if k < index - 1]:
+                del self._loaded[old]
+            self._loaded[index] = image
+        return image
+
+    def _crop(self, index, p, out):
+        """Recorte do slide 'index' no instante p (0 a 1 da duração) amostrado em out"""
+        src = self._image(index)
+        src_h, src_w = src.shape
+        motion = MOTIONS[index % len(MOTIONS)]
+        e = _smoothstep(min(1.0, max(0.0, p)))
+
+        z0, z1 = motion["zoom"]
+        zoom = 1.0 + self.zoom * (z0 + (z1 - z0) * e)
+        crop_w = min(src_w, src_w / zoom)
+        crop_h = min(src_h, src_h / zoom)
+
+        (px0, py0), (px1, py1) = motion["pan"]
+        slack_x, slack_y = (src_w - crop_w) / 2, (src_h - crop_h) / 2
+        x0 = slack_x + slack_x * (px0 + (px1 - px0) * e)
+        y0 = slack_y + slack_y * (py0 + (py1 - py0) * e)
+
+        # Índices de amostragem (vizinho mais próximo) calculados nos buffers fixos
+        np.multiply(self._base_x, crop_w, out=self._fx)
+        self._fx += x0
+        self._xs[:] = self._fx
+        np.multiply(self._base_y, crop_h, out=self._fy)
+        self._fy += y0
+        self._ys[:] = self._fy
+
+        if self._rows is None or self._rows.shape[1] != src_w:
+            self._rows = np.empty((self.height, src_w), dtype=np.uint32)
+        np.take(src, self._ys, axis=0, out=self._rows, mode="clip")
+        np.take(self._rows, self._xs, axis=1, out=out, mode="clip")
+
+    def _blend(self, alpha):
+        """out = out * (1 - alpha) + next * alpha (aritmética inteira em 8 bits de peso)"""
+        weight = int(round(alpha * 256))
+        np.multiply(self._out8, 256 - weight, out=self._acc, dtype=np.uint16)
+        np.multiply(self._next8, weight, out=self._tmp, dtype=np.uint16)
+        self._acc += self._tmp
+        self._acc >>= 8
+        self._out8[...] = self._acc
+
+    def frame_at(self, n, index):
+        """Gera o frame n (slide atual = index) no buffer de saída"""
+        t = n / self.fps
+        start, end = self.starts[index], self.starts[index + 1]
+        self._crop(index, (t - start) / (end - start), self._out)
+
+        fade_start = end - self.crossfade
+        if self.crossfade > 0 and t >= fade_start and index + 1 < len(self.sources):
+            self._crop(index + 1, 0.0, self._next)
+            self._blend((t - fade_start) / self.crossfade)
+        return self._out8
+
+    def frames(self):
+        index = 0
+        last = len(self.sources) - 1
+        for n in range(self.total_frames):
+            t = n / self.fps
+            while index < last and t >= self.starts[index + 1]:
+                index += 1
+            yield self.frame_at(n, index)
+
+# ========================================
+# RENDER
+# ========================================
+
+def render_motion(images, durations, audio_path, video_path, width, height, fps,
+                  profile=None, codec=None, duration=None, work_dir=None, subtitles=None):
+    """
+    Renderiza o slideshow com Ken Burns + crossfade (frames rgb0 pelo stdin do ffmpeg)
+
+    Args:
+        images: imagens originais dos slides (na ordem; pré-escaladas aqui com cache)
+        durations: segundos de cada slide (mesmo tamanho de images)
+        subtitles: função (caminho .ass, início em s) -> filtro de legenda ou None
+    """
+    t0 = time.time()
+    sources = prepare_frames(images, *source_size(width, height))
+    engine = MotionEngine(sources, durations, width, height, fps)
+
+    ass_path = os.path.join(work_dir or os.path.dirname(video_path),
+                            f"{os.path.splitext(os.path.basename(video_path))[0]}.ass")
+    burn = subtitles(ass_path, 0.0) if subtitles is not None else None
+
+    cmd = [
+        'ffmpeg', '-y', '-loglevel', 'error',
+        '-f', 'rawvideo',
+        '-pix_fmt', 'rgb0',
+        '-s', f'{width}x{height}',
+        '-r', str(fps),
+        '-i', 'pipe:0',
+        '-i', audio_path,
+        '-map', '0:v:0',
+        '-map', '1:a:0',
+        *(['-vf', burn] if burn else []),
+        *video_codec_args(profile, codec, fps),
+        *audio_codec_args(profile),
+        *container_args(profile),
+        '-shortest',
+        video_path
+    ]
+    proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL,
+                            stderr=subprocess.PIPE)
+    stderr_tail = RingBuffer(progress.FFMPEG_STDERR_BYTES)
+    reader = threading.Thread(
+        target=lambda: stderr_tail.extend(line.decode("utf-8", "replace") for line in proc.stderr),
+        daemon=True)
+    reader.start()
+
+    started, last_sent = time.time(), 0.0
+    try:
+        for n, frame in enumerate(engine.frames(), 1):
+            proc.stdin.write(frame.data)
+            now = time.time()
+            if now - last_sent >= PROGRESS_INTERVAL:
+                progress.emit(step="motion", frame=n, total=engine.total_frames,
+                              **progress.estimate(n, engine.total_frames, started))
+                last_sent = now
+    except BrokenPipeError:
+        pass  # ffmpeg saiu antes (erro no stderr)
+    finally:
+        try:
+            proc.stdin.close()
+        except BrokenPipeError:
+            pass
+        proc.wait()
+        reader.join()
+        if burn and os.path.exists(ass_path):
+            os.remove(ass_path)
+
+    if proc.returncode != 0:
+        print(f"❌ Erro ffmpeg (motion): {stderr_tail.text()}")
+        raise Exception("Falha ao renderizar vídeo com efeitos (modo motion)")
+    elapsed = time.time() - t0
+    progress.emit_timings(encode=round(time.time() - started, 3))
+    print(f"🎞️ {engine.total_frames} frames com movimento em {elapsed:.2f}s "
+          f"({engine.total_frames / elapsed:.1f} fps)")
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Renderização em blocos paralelos (vídeos longos)
+Um único x264 não ocupa todos os núcleos da máquina. Aqui a linha do tempo dos
+slides é dividida em K blocos contíguos; cada bloco é codificado por um ffmpeg
+próprio (K processos em paralelo, threads do encoder divididas entre eles). Os
+blocos são unidos pelo concat demuxer com "-c copy" e o áudio é codificado uma
+única vez no mux final.
+
+K sai do número de núcleos e da duração do áudio: blocos curtos demais não
+compensam o custo de abrir mais um ffmpeg.
+
+Configuração (variáveis de ambiente):
+  - PARALLEL_CHUNKS: 0 = automático (padrão), 1 = desligado, N = sempre N blocos
+  - PARALLEL_MIN_CHUNK_SECONDS: duração mínima de cada bloco (padrão 30)
+"""
+
+import os
+import time
+import shutil
+import tempfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from encoder_profiles import video_codec_args, audio_codec_args, container_args
+import progress
+
+# ========================================
+# CONFIGURAÇÕES
+# ========================================
+
+PARALLEL_CHUNKS = int(os.environ.get("PARALLEL_CHUNKS", "0"))
+PARALLEL_MIN_CHUNK_SECONDS = float(os.environ.get("PARALLEL_MIN_CHUNK_SECONDS", "30"))
+MIN_THREADS_PER_CHUNK = 2  # Abaixo disso o x264 perde eficiência (lookahead, slices)
+
+# ========================================
+# DIVISÃO DA LINHA DO TEMPO
+# ========================================
+
+def choose_chunk_count(duration, slides, cores=None):
+    """Quantidade de blocos para esta duração/quantidade de slides (1 = sem paralelismo)"""
+    if PARALLEL_CHUNKS > 0:
+        count = PARALLEL_CHUNKS
+    else:
+        cores = cores or os.cpu_count() or 1
+        by_cores = max(1, cores // MIN_THREADS_PER_CHUNK)
+        by_length = int((duration or 0) // max(1.0, PARALLEL_MIN_CHUNK_SECONDS))
+        count = min(by_cores, by_length)
+    return max(1, min(count, slides))
+
+def split_timeline(durations, chunks, fps):
+    """
+    Divide os slides em blocos contíguos de duração parecida
+
+    Returns:
+        lista de (primeiro slide, slide após o último, quantidade de frames); os
+        cortes caem em frames inteiros, então a soma dos blocos = duração total
+    """
+    starts = [0.0]
+    for seconds in durations:
+        starts.append(starts[-1] + seconds)
+    total = starts[-1]
+
+    cuts = [0]
+    for j in range(1, chunks):
+        target = total * j / chunks
+        index = min(range(cuts[-1] + 1, len(durations)), key=lambda i: abs(starts[i] - target),
+                    default=None)
+        if index is None:
+            break
+        cuts.append(index)
+    cuts.append(len(durations))
+
+    blocks = []
+    for first, end in zip(cuts, cuts[1:]):
+        frames = round(starts[end] * fps) - round(starts[first] * fps)
+        if frames > 0:
+            blocks.append((first, end, frames))
+    return blocks
+
+# ========================================
+# RENDER
+# ========================================
+
+def encode_chunk(frames, durations, chunk_path, frame_count, video_filter, fps, codec_args):
+    """Codifica um bloco de slides (vídeo mudo, frame rate constante)"""
+    filelist_path = f"{os.path.splitext(chunk_path)[0]}.txt"
+    with open(filelist_path, 'w') as f:
+        for frame, seconds in zip(frames, durations):
+            f.write(f"file '{frame}'\n")
+            f.write(f"duration {seconds:.6f}\n")
+        f.write(f"file '{frames[-1]}'\n")
+
+    t0 = time.time()
+    result = subprocess.run([
+        'ffmpeg', '-y', '-loglevel', 'error',
+        '-f', 'concat',
+        '-safe', '0',
+        '-i', filelist_path,
+        '-vf', video_filter,
+        '-r', str(fps),
+        '-frames:v', str(frame_count),
+        *codec_args,
+        '-an',
+        chunk_path
+    ], stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    if result.returncode != 0:
+        raise Exception(f"Falha ao codificar bloco {os.path.basename(chunk_path)}: "
+                        f"{result.stderr[-2000:]}")
+    return time.time() - t0
+
+def render_parallel(frames, durations, audio_path, video_path, video_filter, fps,
+                    profile=None, codec=None, duration=None, chunks=None, work_dir=None,
+                    subtitles=None):
+    """
+    Renderiza o slideshow em blocos paralelos + concat com cópia do vídeo
+
+    Args:
+        frames: imagens dos slides (na ordem)
+        durations: segundos de cada slide (mesmo tamanho de frames)
+        chunks: quantidade de blocos (padrão: choose_chunk_count)
+        work_dir: onde ficam os blocos temporários (padrão: pasta do vídeo)
+        subtitles: função (caminho .ass, início do bloco em s) -> filtro de
+                   legenda do ffmpeg ou None (cada bloco queima o seu trecho)
+    """
+    cores = os.cpu_count() or 1
+    chunks = chunks or choose_chunk_count(duration or sum(durations), len(frames), cores)
+    blocks = split_timeline(durations, chunks, fps)
+    threads = max(1, cores // len(blocks))
+    codec_args = video_codec_args(profile, codec, fps, threads=threads)
+
+    tmp_dir = tempfile.mkdtemp(prefix="chunks_", dir=work_dir or os.path.dirname(video_path))
+    try:
+        print(f"🧱 {len(blocks)} bloco(s) em paralelo ({threads} thread(s) do encoder cada)")
+        t0 = time.time()
+        chunk_paths = [os.path.join(tmp_dir, f"chunk_{i:03d}.mp4") for i in range(len(blocks))]
+        chunk_filters = [video_filter] * len(blocks)
+        if subtitles is not None:
+            first_frame = 0
+            for i, (path, (_, _, frame_count)) in enumerate(zip(chunk_paths, blocks)):
+                burn = subtitles(f"{os.path.splitext(path)[0]}.ass", first_frame / fps)
+                if burn:
+                    # fps antes da legenda: o concat entrega 1 frame por slide
+                    chunk_filters[i] = f"{video_filter},fps={fps},{burn}"
+                first_frame += frame_count
+        progress.emit(step="chunks", current=0, total=len(blocks))
+        with ThreadPoolExecutor(max_workers=len(blocks)) as executor:
+            futures = [executor.submit(encode_chunk, frames[first:end], durations[first:end],
+                                       path, frame_count, chunk_filter, fps, codec_args)
+                       for (first, end, frame_count), path, chunk_filter
+                       in zip(blocks, chunk_paths, chunk_filters)]
+            for done, future in enumerate(as_completed(futures), 1):
+                future.result()
+                progress.emit(step="chunks", current=done, total=len(blocks),
+                              **progress.estimate(done, len(blocks), t0))
+        print(f"⏱️ Blocos codificados em {time.time() - t0:.2f}s")
+        progress.emit_timings(encode=round(time.time() - t0, 3))
+
+        concat_path = os.path.join(tmp_dir, "chunks.txt")
+        with open(concat_path, 'w') as f:
+            for path in chunk_paths:
+                f.write(f"file '{path}'\n")
+
+        t0 = time.time()
+        result = progress.run_ffmpeg([
+            'ffmpeg', '-y',
+            '-f', 'concat',
+            '-safe', '0',
+            '-i', concat_path,
+            '-i', audio_path,
+            '-map', '0:v:0',
+            '-map', '1:a:0',
+            '-c:v', 'copy',
+            *audio_codec_args(profile),
+            *container_args(profile),
+            '-shortest',
+            video_path
+        ], duration=duration, step="mux")
+        if result.returncode != 0:
+            print(f"❌ Erro ffmpeg (concat de blocos): {result.stderr}")
+            raise Exception("Falha ao unir blocos com ffmpeg (modo paralelo)")
+        progress.emit_timings(mux=round(time.time() - t0, 3))
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
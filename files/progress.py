@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Progresso dos jobs em tempo real
+Os scripts filhos (create_audio.py, create_video.py) imprimem linhas
+"@@progress {json}" no stdout; o servidor lê o stdout linha a linha e
+publica o progresso no job (consultado por /status e /events).
+
+Linhas "@@timings {json}" levam os tempos de cada etapa (carga do modelo,
+pré-processamento, encode, mux...) para o registro do job e para o /metrics.
+
+O ffmpeg roda com "-progress pipe:1": os blocos frame=/out_time=/speed= viram
+eventos com porcentagem e ETA, sem esperar o processo terminar.
+"""
+
+import json
+import time
+import threading
+import subprocess
+
+from job_logs import RingBuffer
+
+PROGRESS_PREFIX = "@@progress "
+TIMINGS_PREFIX = "@@timings "
+FFMPEG_PROGRESS_INTERVAL = 0.5  # Segundos entre eventos de progresso do ffmpeg
+FFMPEG_STDERR_BYTES = 32 * 1024  # Final do stderr guardado para mensagens de erro
+
+# Scripts de benchmark desligam os eventos para não poluir a saída
+enabled = True
+
+# ========================================
+# PROTOCOLO (SCRIPT FILHO -> SERVIDOR)
+# ========================================
+
+def emit(**fields):
+    """Publica um evento de progresso no stdout (lido pelo servidor)"""
+    if not enabled:
+        return
+    print(PROGRESS_PREFIX + json.dumps(fields), flush=True)
+
+def emit_timings(**timings):
+    """Publica tempos de etapa (segundos; o servidor soma os repetidos)"""
+    if not enabled:
+        return
+    print(TIMINGS_PREFIX + json.dumps(timings), flush=True)
+
+def _parse(line, prefix):
+    if not line.startswith(prefix):
+        return None
+    try:
+        return json.loads(line[len(prefix):])
+    except ValueError:
+        return None
+
+def parse_line(line):
+    """Evento de progresso contido na linha, ou None se for saída comum"""
+    return _parse(line, PROGRESS_PREFIX)
+
+def parse_timings(line):
+    """Tempos de etapa contidos na linha, ou None"""
+    return _parse(line, TIMINGS_PREFIX)
+
+def estimate(current, total, started):
+    """Porcentagem e ETA (segundos) a partir do andamento desde 'started'"""
+    if not total:
+        return {}
+    percent = round(min(100.0, 100.0 * current / total), 1)
+    result = {"percent": percent}
+    elapsed = time.time() - started
+    if current > 0 and elapsed > 0:
+        result["eta_seconds"] = round(max(0.0, elapsed / current * (total - current)), 1)
+    return result
+
+# ========================================
+# FFMPEG
+# ========================================
+
+def _ffmpeg_event(block, duration, step):
+    event = {"step": step}
+    if block.get("frame", "").isdigit():
+        event["frame"] = int(block["frame"])
+    # out_time_us (ffmpeg novo) ou out_time_ms (também em microssegundos)
+    out_time = block.get("out_time_us") or block.get("out_time_ms")
+    if out_time and out_time.lstrip("-").isdigit():
+        event["time"] = round(max(0, int(out_time)) / 1_000_000, 2)
+    speed = block.get("speed", "").rstrip("x")
+    try:
+        event["speed"] = float(speed)
+    except ValueError:
+        pass
+    if duration and "time" in event:
+        event["duration"] = round(duration, 2)
+        event["percent"] = round(min(100.0, 100.0 * event["time"] / duration), 1)
+        if event.get("speed"):
+            event["eta_seconds"] = round(max(0.0, duration - event["time"]) / event["speed"], 1)
+    if block.get("progress") == "end":
+        event["percent"] = 100.0
+        event["eta_seconds"] = 0.0
+    return event
+
+def run_ffmpeg(cmd, duration=None, step="render", on_progress=emit):
+    """
+    Executa o ffmpeg com -progress pipe:1 e publica o andamento enquanto roda
+
+    Args:
+        cmd: comando ffmpeg completo (cmd[0] = executável)
+        duration: duração esperada da saída em segundos (para porcentagem/ETA)
+        step: nome da etapa nos eventos
+        on_progress: função chamada com cada evento (padrão: emit no stdout)
+
+    Returns:
+        subprocess.CompletedProcess com returncode e o final do stderr (limitado)
+    """
+    full_cmd = [cmd[0], '-progress', 'pipe:1', '-nostats', *cmd[1:]]
+    proc = subprocess.Popen(full_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                            text=True, bufsize=1, errors="replace")
+
+    # stderr lido em paralelo (evita travar com o pipe cheio), só o final é mantido
+    stderr_tail = RingBuffer(FFMPEG_STDERR_BYTES)
+    reader = threading.Thread(target=lambda: stderr_tail.extend(proc.stderr), daemon=True)
+    reader.start()
+
+    block, last_sent = {}, 0.0
+    for line in proc.stdout:
+        key, sep, value = line.strip().partition("=")
+        if not sep:
+            continue
+        block[key] = value
+        if key != "progress":
+            continue
+        now = time.time()
+        if value == "end" or now - last_sent >= FFMPEG_PROGRESS_INTERVAL:
+            on_progress(**_ffmpeg_event(block, duration, step))
+            last_sent = now
+        block = {}
+
+    proc.wait()
+    reader.join()
+    return subprocess.CompletedProcess(full_cmd, proc.returncode, "", stderr_tail.text())
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Síntese paralela por frase
+O texto é dividido em frases, cada frase vira um job no pool de workers TTS e
+os chunks são concatenados em ordem, em streaming, no WAV final.
+
+Cada frase fica no cache de frases (cache/sentences/), então editar uma frase
+do roteiro só re-sintetiza aquela frase.
+
+Configuração (variáveis de ambiente):
+  - TTS_SENTENCE_MODE: "1" ativa o modo por frase por padrão
+  - TTS_SENTENCE_SILENCE_MS: silêncio entre frases (padrão 250ms)
+  - SENTENCE_CACHE_MAX_MB: limite do cache de frases (0 = desativado)
+"""
+
+import os
+import time
+import shutil
+import tempfile
+
+from audio_cache import AudioCache
+from create_audio import split_sentence_pairs, TTS_SENTENCE_SILENCE_MS
+from wav_utils import WavConcatenator
+from alignment import build_alignment, write_alignment
+from progress import estimate
+
+# ========================================
+# CONFIGURAÇÕES
+# ========================================
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+AUDIOS_DIR = os.path.join(BASE_DIR, "audios")
+SENTENCE_CACHE_DIR = os.path.join(BASE_DIR, "cache", "sentences")
+
+TTS_SENTENCE_MODE = os.environ.get("TTS_SENTENCE_MODE", "0") == "1"
+SENTENCE_CACHE_MAX_MB = int(os.environ.get("SENTENCE_CACHE_MAX_MB", "1024"))
+
+sentence_cache = AudioCache(cache_dir=SENTENCE_CACHE_DIR,
+                            max_bytes=SENTENCE_CACHE_MAX_MB * 1024 * 1024)
+
+# ========================================
+# FUNÇÃO PRINCIPAL
+# ========================================
+
+def synthesize_by_sentence(pool, text, audio_id, voice="default",
+                           silence_ms=TTS_SENTENCE_SILENCE_MS, timeout=300, on_progress=None):
+    """
+    Gera audios/audio_<id>.wav sintetizando as frases em paralelo no pool
+
+    Frases já conhecidas vêm do cache; as demais são enviadas todas de uma vez
+    ao pool e anexadas ao WAV final assim que cada uma (em ordem) termina.
+    on_progress(dict) é chamado a cada frase anexada (frase i/N, %, ETA).
+
+    Returns:
+        dict com file, sentences, cached_sentences e segments (frame inicial e
+        nº de frames de cada frase no WAV final, também gravados no sidecar
+        de alinhamento audio_<id>.align.json)
+    """
+    pairs = split_sentence_pairs(text)
+    sentences = [clean for _, clean in pairs]
+    if not sentences:
+        raise ValueError("Texto vazio após sanitização")
+
+    output_path = os.path.join(AUDIOS_DIR, f"audio_{audio_id}.wav")
+    work_dir = tempfile.mkdtemp(prefix=f"sentences_{audio_id}_", dir=AUDIOS_DIR)
+    print(f"🧩 {len(sentences)} frases - síntese paralela no pool TTS")
+    started = time.time()
+    deadline = started + timeout
+
+    try:
+        jobs = []  # (caminho do chunk, chave do cache, future ou None)
+        cached = 0
+        for i, sentence in enumerate(sentences):
+            chunk_path = os.path.join(work_dir, f"{i:04d}.wav")
+            key = sentence_cache.key(sentence, voice) if sentence_cache.enabled else None
+            if key and sentence_cache.lookup(key, chunk_path):
+                cached += 1
+                jobs.append((chunk_path, key, None))
+            else:
+                jobs.append((chunk_path, key, pool.submit_chunk(sentence, chunk_path, voice)))
+
+        print(f"⚡ {cached}/{len(sentences)} frases reaproveitadas do cache")
+
+        writer = WavConcatenator(output_path, silence_ms=silence_ms)
+        try:
+            for i, (chunk_path, key, future) in enumerate(jobs):
+                if future is not None:
+                    future.result(timeout=max(0, deadline - time.time()))
+                    if key:
+                        sentence_cache.store(key, chunk_path)
+                writer.append(chunk_path)
+                os.remove(chunk_path)  # Libera disco à medida que monta
+                print(f"🎙️ Frase {i + 1}/{len(jobs)} anexada")
+                if on_progress:
+                    on_progress({"step": "sentences", "current": i + 1, "total": len(jobs),
+                                 "cached": cached, **estimate(i + 1, len(jobs), started)})
+            writer.close()
+            write_alignment(output_path, build_alignment(
+                [original for original, _ in pairs], writer.segments, writer.sample_rate))
+        except BaseException:
+            writer.abort()
+            for _, _, future in jobs:
+                if future is not None:
+                    future.cancel()
+            raise
+
+        return {
+            "file": output_path,
+            "sentences": len(sentences),
+            "cached_sentences": cached,
+            "sample_rate": writer.sample_rate,
+            "segments": writer.segments,
+        }
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
@@ -6,16 +6,52 @@ Endpoints:
   - POST /create-audio: Gera áudio com clonagem de voz
   - POST /create-video: Gera vídeo com legendas
   - GET /health: Status do servidor
-  - GET /status/<id>: Status de processamento
+  - GET /metrics: Métricas no formato do Prometheus
+  - GET /status/<id>: Status de processamento (long-poll com ?wait=)
+  - GET /events/<id>: Progresso em tempo real (Server-Sent Events)
+  - GET /logs/<id>: Log da saída dos processos do job
+  - GET /jobs: Lista de jobs (filtros: status, type)
+  - POST /batch/create-audio: Vários áudios em uma requisição
+  - POST /batch/create-video: Vários vídeos em uma requisição
+  - GET /batch/<batch_id>: Progresso agregado de um lote
+  - POST /pipeline: Áudio + vídeo encadeados em um job (callback opcional)
+  - POST /images: Envia imagens para a biblioteca (referência por hash)
+  - GET /images: Imagens de imagens/ pelo índice (dimensões, formato, validação)
   - GET /download/audios/<filename>: Baixar áudio
   - GET /download/videos/<filename>: Baixar vídeo
+
+Execução:
+  - python3 server.py: servidor de desenvolvimento do Flask (um processo)
+  - gunicorn -c gunicorn.conf.py wsgi:app: produção, vários workers HTTP
+    compartilhando o banco de jobs; um deles é eleito executor (job_dispatch.py)
 """
 
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, request, jsonify
 import subprocess
 import os
+import json
 import threading
 import time
+import uuid
+from concurrent.futures import Future, TimeoutError as FuturesTimeoutError
+
+from tts_worker import TTSWorkerPool, TTS_WORKERS, TTS_BACKEND
+from speaker_cache import DEFAULT_VOICE, voice_sample_path
+from audio_cache import AudioCache
+from sentence_synth import synthesize_by_sentence, TTS_SENTENCE_MODE, TTS_SENTENCE_SILENCE_MS
+from job_queue import JobScheduler, QueueFullError
+from job_dispatch import RunnerLock, StoreQueue, JobDispatcher
+from job_store import JobStore, FINAL_STATES, JOB_RETENTION_HOURS
+from progress import parse_line as parse_progress_line, parse_timings
+from metrics import MetricsStore, merge_timings, record_job
+from wav_utils import audio_duration_us
+from job_logs import stream_process, read_log_tail, purge_logs
+from webhook import send_callback, validate_callback_url
+from encoder_profiles import validate_profile
+from slide_timing import validate_timing
+from file_serving import resolve_download, serve_file
+from workspace import (resolve_images, store_upload, create_workspace, prepare_workspace,
+                       remove_workspace, purge_workspaces, evict_library, image_index, REF_PREFIX)
 
 # ========================================
 # CONFIGURAÇÕES
@@ -24,7 +60,7 @@ import time
 app = Flask(__name__)
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-PYTHON_PATH = "/opt/tts-env/bin/python3"
+PYTHON_PATH = os.environ.get("TTS_PYTHON", "/opt/tts-env/bin/python3")
 AUDIO_SCRIPT = os.path.join(BASE_DIR, "create_audio.py")
 VIDEO_SCRIPT = os.path.join(BASE_DIR, "create_video.py")
 AUDIOS_DIR = os.path.join(BASE_DIR, "audios")
@@ -32,114 +68,788 @@ VIDEOS_DIR = os.path.join(BASE_DIR, "videos")
 IMGS_DIR = os.path.join(BASE_DIR, "imagens")
 VOICE_SAMPLE = os.path.join(BASE_DIR, "voice_sample.wav")
 
-# Controle de processos ativos
-active_processes = {}
+# Controle de processos (persistente em SQLite - sobrevive a reinícios)
+jobs = JobStore()
+
+# Acorda long-polls e streams SSE a cada escrita no banco de jobs
+job_changes = threading.Condition()
+
+def notify_job_change(job_id):
+    with job_changes:
+        job_changes.notify_all()
+
+jobs.on_change = notify_job_change
+
+# Histogramas e contadores do /metrics (mesmo banco: iguais em todos os workers)
+metrics = MetricsStore(jobs.db_path)
+
+# Pool de workers TTS residentes (None = modo subprocesso legado)
+tts_pool = None
+
+# Pool compartilhado pelos lotes quando TTS_WORKERS=0 (criado no primeiro lote)
+batch_tts_pool = None
+batch_pool_lock = threading.Lock()
+
+# Cache de áudios por conteúdo (texto + voz + idioma + modelo; índice no banco de jobs)
+audio_cache = AudioCache(db_path=jobs.db_path)
+
+# Filas de jobs: concorrência máxima e tamanho máximo por tipo
+QUEUE_ORDERING = os.environ.get("QUEUE_ORDERING", "fifo")  # ou "priority"
+AUDIO_MAX_CONCURRENCY = int(os.environ.get("AUDIO_MAX_CONCURRENCY", str(max(1, TTS_WORKERS))))
+AUDIO_QUEUE_SIZE = int(os.environ.get("AUDIO_QUEUE_SIZE", "50"))
+VIDEO_MAX_CONCURRENCY = int(os.environ.get("VIDEO_MAX_CONCURRENCY", "1"))
+VIDEO_QUEUE_SIZE = int(os.environ.get("VIDEO_QUEUE_SIZE", "50"))
+CLEANUP_MAX_CONCURRENCY = 1
+CLEANUP_QUEUE_SIZE = 5
+
+# Progresso: long-poll, SSE e frequência máxima de gravação no banco
+STATUS_MAX_WAIT = 60
+SSE_HEARTBEAT_SECONDS = 15
+PROGRESS_MIN_INTERVAL = 0.5
+last_progress_write = {}
+
+# Lotes: máximo de jobs por requisição
+BATCH_MAX_JOBS = int(os.environ.get("BATCH_MAX_JOBS", "200"))
+batch_lock = threading.Lock()
+
+# Modo multi-worker (gunicorn): papel deste processo e encerramento gracioso
+# "standalone" = python3 server.py; "api" = só atende HTTP; "runner" = também executa jobs
+server_role = "standalone"
+DRAIN_TIMEOUT = int(os.environ.get("DRAIN_TIMEOUT", "600"))  # Espera jobs em execução ao parar
+runner_lock = None
+executor = None    # Filas em memória do executor (modo multi-worker)
+dispatcher = None
 
 # ========================================
 # FUNÇÕES AUXILIARES
 # ========================================
 
-def run_audio_creation(audio_id, text):
+def has_tts_pool():
+    """Workers TTS residentes disponíveis (no modo multi-worker ficam no executor)"""
+    if server_role == "standalone":
+        return tts_pool is not None
+    return TTS_WORKERS > 0
+
+def run_audio_creation(audio_id, text, voice=DEFAULT_VOICE, cache_key=None,
+                       sentence_mode=False, silence_ms=TTS_SENTENCE_SILENCE_MS, use_pool=False):
     """Executa criação de áudio em processo separado"""
     try:
         print(f"\n🎤 Iniciando criação de áudio - ID: {audio_id}")
         print(f"📝 Texto: {text[:100]}...")
         
-        # Executa o script de criação de áudio
-        result = subprocess.run([
+        pool = tts_pool
+        if pool is None and use_pool:
+            pool = get_batch_pool()
+        if pool is not None:
+            run_audio_in_pool(pool, audio_id, text, voice, cache_key, sentence_mode, silence_ms)
+            return
+        
+        # Executa o script de criação de áudio (progresso e tempos lidos do stdout)
+        timings = {}
+        result = run_script([
             PYTHON_PATH,
             AUDIO_SCRIPT,
             text,
-            audio_id
-        ], capture_output=True, text=True, timeout=300)  # 5 minutos timeout
+            audio_id,
+            voice
+        ], audio_id, "audio", timeout=300, timings=timings)  # 5 minutos timeout
         
         if result.returncode == 0:
             audio_path = os.path.join(AUDIOS_DIR, f"audio_{audio_id}.wav")
             print(f"✅ Áudio {audio_id} criado com sucesso!")
-            active_processes[audio_id] = {
-                "type": "audio",
-                "status": "completed", 
-                "message": "Áudio criado com sucesso!",
-                "file": audio_path,
-                "timestamp": time.time()
-            }
+            if cache_key:
+                audio_cache.store(cache_key, audio_path)
+            complete_job(audio_id, "completed", "Áudio criado com sucesso!", file=audio_path,
+                         timings=synthesis_timings(audio_path, timings))
         else:
             print(f"❌ Erro na criação do áudio {audio_id}:")
             print(f"STDOUT: {result.stdout}")
             print(f"STDERR: {result.stderr}")
-            active_processes[audio_id] = {
-                "type": "audio",
-                "status": "error", 
-                "message": result.stderr or result.stdout,
-                "timestamp": time.time()
-            }
+            complete_job(audio_id, "error", result.stderr or result.stdout, timings=timings)
             
     except subprocess.TimeoutExpired:
         print(f"⏰ Timeout na criação do áudio {audio_id}")
-        active_processes[audio_id] = {
-            "type": "audio",
-            "status": "error", 
-            "message": "Timeout - áudio demorou mais que 5 minutos",
-            "timestamp": time.time()
-        }
+        metrics.inc("job_timeouts_total", stage="audio")
+        complete_job(audio_id, "error", "Timeout - áudio demorou mais que 5 minutos")
     except Exception as e:
         print(f"❌ Erro inesperado: {str(e)}")
-        active_processes[audio_id] = {
-            "type": "audio",
-            "status": "error", 
-            "message": str(e),
-            "timestamp": time.time()
-        }
+        complete_job(audio_id, "error", str(e))
+
+def run_audio_in_pool(pool, audio_id, text, voice=DEFAULT_VOICE, cache_key=None,
+                      sentence_mode=False, silence_ms=TTS_SENTENCE_SILENCE_MS):
+    """Envia o job para os workers TTS residentes (modelo já carregado)"""
+    if sentence_mode:
+        # Uma frase por job, em paralelo, montadas em ordem no WAV final
+        started = time.time()
+        try:
+            result = synthesize_by_sentence(
+                pool, text, audio_id, voice, silence_ms=silence_ms, timeout=300,
+                on_progress=lambda event: report_progress(audio_id, "audio", event))
+        except FuturesTimeoutError:
+            raise subprocess.TimeoutExpired(AUDIO_SCRIPT, 300)
+        result["synth_time"] = time.time() - started
+    else:
+        report_progress(audio_id, "audio", {"step": "synthesis"})
+        future = pool.submit(text, audio_id, voice)
+        try:
+            result = future.result(timeout=300)  # 5 minutos timeout
+        except FuturesTimeoutError:
+            future.cancel()
+            raise subprocess.TimeoutExpired(AUDIO_SCRIPT, 300)
+    
+    print(f"✅ Áudio {audio_id} criado com sucesso! (síntese: {result['synth_time']:.1f}s)")
+    if cache_key:
+        audio_cache.store(cache_key, result["file"])
+    complete_job(audio_id, "completed", "Áudio criado com sucesso!", file=result["file"],
+                 timings=synthesis_timings(result["file"], {"synth": round(result["synth_time"], 3)}))
+
+def synthesis_timings(audio_path, timings):
+    """Acrescenta a duração do áudio gerado e o fator de tempo real (síntese / duração)"""
+    try:
+        seconds = audio_duration_us(audio_path) / 1_000_000
+    except (OSError, ValueError):
+        return timings
+    timings["audio_seconds"] = round(seconds, 3)
+    if seconds > 0 and "synth" in timings:
+        timings["rtf"] = round(timings["synth"] / seconds, 4)
+    return timings
 
-def run_video_creation(video_id):
+def record_model_load(info):
+    """Carga do modelo em um worker TTS residente (callback do pool)"""
+    metrics.observe("tts_model_load_seconds", info["load_time"], backend=TTS_BACKEND)
+
+def run_script(cmd, job_id, stage, timeout, timings=None):
+    """
+    Executa um script filho lendo o stdout linha a linha: eventos de progresso
+    vão para o job na hora; tempos de etapa ("@@timings") são somados em
+    timings; o resto vai para o log do job e o final da saída (limitado) fica
+    salvo no registro do job
+    """
+    def on_line(line):
+        reported = parse_timings(line)
+        if reported is not None:
+            if timings is not None:
+                merge_timings(timings, reported)
+            return True
+        event = parse_progress_line(line)
+        if event is None:
+            return False
+        report_progress(job_id, stage, event)
+        return True
+    
+    try:
+        result = stream_process(cmd, job_id, timeout=timeout, on_line=on_line,
+                                env={**os.environ, "PYTHONUNBUFFERED": "1"})
+    except subprocess.TimeoutExpired as e:
+        jobs.update(job_id, output=e.output)
+        raise
+    finally:
+        last_progress_write.pop(job_id, None)
+    jobs.update(job_id, output=result.stdout)
+    return result
+
+def report_progress(job_id, stage, event):
+    """
+    Grava o último evento de progresso do job. Eventos com porcentagem são
+    limitados a um a cada PROGRESS_MIN_INTERVAL; mudanças de etapa sempre entram.
+    """
+    now = time.time()
+    percent = event.get("percent")
+    if percent is not None and percent < 100:
+        if now - last_progress_write.get(job_id, 0.0) < PROGRESS_MIN_INTERVAL:
+            return
+    last_progress_write[job_id] = now
+    try:
+        jobs.update(job_id, progress={"stage": stage, **event, "updated_at": now})
+    except Exception as e:
+        print(f"⚠️ Erro ao gravar progresso de {job_id}: {e}")
+
+def get_batch_pool():
+    """
+    Pool TTS de um worker para os lotes quando TTS_WORKERS=0: o modelo é
+    carregado uma vez e reaproveitado por todos os áudios do lote
+    """
+    global batch_tts_pool
+    with batch_pool_lock:
+        if batch_tts_pool is None:
+            print("🔥 Lote de áudios: iniciando worker TTS compartilhado")
+            batch_tts_pool = TTSWorkerPool(size=1, on_ready=record_model_load).start()
+        return batch_tts_pool
+
+def run_video_creation(video_id, images=None, clean=False, profile=None, codec=None, subtitles=False,
+                       timing=None):
     """Executa criação de vídeo em processo separado"""
     try:
         print(f"\n🎬 Iniciando criação de vídeo - ID: {video_id}")
         
+        timings = {}
+        if clean:
+            # Etapa de limpeza do pipeline: imagens corrompidas antes do render
+            started = time.time()
+            payload, status_code = clean_images()
+            timings["cleanup"] = round(time.time() - started, 3)
+            if status_code != 200:
+                complete_job(video_id, "error", payload["message"], timings=timings)
+                return
+        
+        # Imagens isoladas do job (work/<id>/, montado no pedido)
+        workdir = prepare_workspace(video_id, images)
+        
         # Executa o script de criação de vídeo
-        result = subprocess.run([
+        encoder_args = []
+        if profile:
+            encoder_args += ["--profile", profile]
+        if codec:
+            encoder_args += ["--codec", codec]
+        if subtitles:
+            encoder_args.append("--subtitles")
+        if timing:
+            encoder_args += ["--timing", timing]
+        result = run_script([
             PYTHON_PATH,
             VIDEO_SCRIPT,
+            *encoder_args,
+            "--workspace", workdir,
+            "--",
             video_id
-        ], capture_output=True, text=True, timeout=600)  # 10 minutos timeout
+        ], video_id, "video", timeout=600, timings=timings)  # 10 minutos timeout
         
         if result.returncode == 0:
             video_path = os.path.join(VIDEOS_DIR, f"video_{video_id}.mp4")
             print(f"✅ Vídeo {video_id} criado com sucesso!")
-            active_processes[video_id] = {
-                "type": "video",
-                "status": "completed", 
-                "message": "Vídeo criado com sucesso!",
-                "file": video_path,
-                "timestamp": time.time()
-            }
+            complete_job(video_id, "completed", "Vídeo criado com sucesso!", file=video_path,
+                         timings=timings)
         else:
             print(f"❌ Erro na criação do vídeo {video_id}:")
             print(f"STDOUT: {result.stdout}")
             print(f"STDERR: {result.stderr}")
-            active_processes[video_id] = {
-                "type": "video",
-                "status": "error", 
-                "message": result.stderr or result.stdout,
-                "timestamp": time.time()
-            }
+            complete_job(video_id, "error", result.stderr or result.stdout, timings=timings)
             
     except subprocess.TimeoutExpired:
         print(f"⏰ Timeout na criação do vídeo {video_id}")
-        active_processes[video_id] = {
-            "type": "video",
-            "status": "error", 
-            "message": "Timeout - vídeo demorou mais que 10 minutos",
-            "timestamp": time.time()
-        }
+        metrics.inc("job_timeouts_total", stage="video")
+        complete_job(video_id, "error", "Timeout - vídeo demorou mais que 10 minutos", timings=timings)
     except Exception as e:
         print(f"❌ Erro inesperado: {str(e)}")
-        active_processes[video_id] = {
-            "type": "video",
-            "status": "error", 
-            "message": str(e),
-            "timestamp": time.time()
-        }
+        complete_job(video_id, "error", str(e))
+
+def clean_images():
+    """Executa o script de limpeza de imagens; retorna (payload, status HTTP)"""
+    try:
+        # Executa o script de limpeza
+        CLEAN_SCRIPT = os.path.join(BASE_DIR, "clean_images.py")
+        
+        if not os.path.exists(CLEAN_SCRIPT):
+            return {
+                "status": "error",
+                "message": f"Script de limpeza não encontrado: {CLEAN_SCRIPT}"
+            }, 400
+        
+        result = stream_process([
+            PYTHON_PATH,
+            CLEAN_SCRIPT
+        ], "cleanup", timeout=60)
+        
+        if result.returncode == 0:
+            # Extrair informações do output
+            output_lines = result.stdout.split('\n')
+            cleaned_count = 0
+            removed_count = 0
+            invalid_count = 0
+            
+            for line in output_lines:
+                if "Arquivos limpos:" in line:
+                    cleaned_count = int(line.split(":")[1].strip())
+                elif "Arquivos removidos:" in line:
+                    removed_count = int(line.split(":")[1].strip())
+                elif "Imagens inválidas:" in line:
+                    invalid_count = int(line.split(":")[1].strip())
+            
+            print(f"🧹 Limpeza de imagens executada com sucesso!")
+            print(f"📊 Limpos: {cleaned_count}, Removidos: {removed_count}, Inválidas: {invalid_count}")
+            
+            return {
+                "status": "success",
+                "message": "Limpeza de imagens concluída com sucesso!",
+                "cleaned_count": cleaned_count,
+                "removed_count": removed_count,
+                "invalid_count": invalid_count,
+                "output": result.stdout
+            }, 200
+        else:
+            print(f"❌ Erro na limpeza de imagens:")
+            print(f"STDOUT: {result.stdout}")
+            print(f"STDERR: {result.stderr}")
+            
+            return {
+                "status": "error",
+                "message": f"Erro na limpeza: {result.stderr or result.stdout}"
+            }, 400
+            
+    except subprocess.TimeoutExpired:
+        metrics.inc("job_timeouts_total", stage="cleanup")
+        return {
+            "status": "error",
+            "message": "Timeout - limpeza demorou mais que 1 minuto"
+        }, 400
+    except Exception as e:
+        print(f"❌ Erro inesperado na limpeza: {str(e)}")
+        return {
+            "status": "error",
+            "message": f"Erro no servidor: {str(e)}"
+        }, 500
+
+def run_clean_images(future):
+    """Executa o script de limpeza e entrega (payload, status HTTP) no future"""
+    try:
+        future.set_result(clean_images())
+    except Exception as e:
+        future.set_exception(e)
+
+def mark_running(job_id):
+    """Chamado pelo agendador quando o job sai da fila e começa a executar"""
+    job = jobs.get(job_id)
+    if job is not None and job["type"] == "pipeline":
+        mark_stage_running(job)
+        return
+    jobs.mark_running(job_id)
+    if job is not None:
+        wait = round(time.time() - job["created_at"], 3)
+        jobs.update(job_id, timings={"queue_wait": wait})
+        metrics.observe("queue_wait_seconds", wait, queue=job["type"])
+
+def queue_full_response(error):
+    """Resposta 429 padrão para fila cheia"""
+    response = jsonify({
+        "status": "rejected",
+        "message": f"{error}. Tente novamente em instantes.",
+        "queue": scheduler.queues[error.job_type].stats()
+    })
+    response.headers["Retry-After"] = "30"
+    return response, 429
+
+def job_queue_type(job_type, payload):
+    """Fila onde o job executa (pipelines usam a fila da etapa atual)"""
+    if job_type == "pipeline":
+        return payload["stage"]
+    return job_type
+
+def job_args(job_type, job_id, payload):
+    """Argumentos do handler a partir do payload salvo no job"""
+    queue_type = job_queue_type(job_type, payload)
+    if queue_type == "audio":
+        return (job_id, payload["text"], payload["voice"], payload["cache_key"],
+                payload["sentence_mode"], payload["silence_ms"], payload.get("use_pool", False))
+    return (job_id, payload.get("images"), payload.get("clean_images", False),
+            payload.get("encoder_profile"), payload.get("codec"), payload.get("subtitles", False),
+            payload.get("slide_timing"))
+
+def enqueue_job(job_type, job_id, payload, priority=0, batch_id=None):
+    """
+    Registra o job como 'queued' e coloca na fila do tipo
+    Retorna a posição na fila; levanta QueueFullError se estiver cheia.
+    """
+    previous = jobs.get(job_id)
+    payload.setdefault("priority", priority)
+    queue_type = job_queue_type(job_type, payload)
+    if payload.get("images"):
+        # Hardlinks no workspace seguram as imagens enquanto o job espera na fila
+        create_workspace(job_id, payload["images"])
+    
+    queue = scheduler.queues[queue_type]
+    if queue.persistent:
+        # Multi-worker: o banco é a fila - vaga e gravação na mesma transação
+        # (os workers do gunicorn não furam o limite); o executor busca o job
+        try:
+            return queue.enqueue(job_id, job_type, payload, priority,
+                                 message="Aguardando na fila...", batch_id=batch_id)
+        except QueueFullError:
+            remove_workspace(job_id)
+            raise
+    
+    jobs.create(job_id, job_type, status="queued", message="Aguardando na fila...",
+                payload=payload, batch_id=batch_id)
+    try:
+        return scheduler.submit(queue_type, job_id, job_args(job_type, job_id, payload), priority)
+    except QueueFullError:
+        remove_workspace(job_id)
+        if previous is None:
+            jobs.delete(job_id)
+        else:
+            jobs.update(job_id, **{k: v for k, v in previous.items() if k != "id"})
+        raise
+
+# ========================================
+# PIPELINE (ÁUDIO -> VÍDEO)
+# ========================================
+
+PIPELINE_STAGE_MESSAGES = {
+    "audio": "Etapa 1/2: gerando áudio...",
+    "video": "Etapa 2/2: gerando vídeo...",
+}
+
+def complete_job(job_id, status, message, file=None, timings=None):
+    """Finaliza um job avulso ou encerra a etapa atual de um pipeline"""
+    job = jobs.get(job_id)
+    if job is not None:
+        record_job_metrics(job, status, timings)
+    if job is not None and job["type"] == "pipeline":
+        finish_stage(job, status, message, file, timings)
+        return
+    jobs.finish(job_id, status, message, file=file, timings=timings)
+    if job is not None and job["type"] == "video":
+        remove_workspace(job_id)
+
+def record_job_metrics(job, status, timings):
+    """Resultado e tempos do job (ou da etapa do pipeline) no /metrics"""
+    payload = job.get("payload") or {}
+    if job["type"] == "pipeline":
+        stage, started = payload.get("stage"), payload.get("stage_started_at")
+    else:
+        stage, started = job["type"], job.get("started_at")
+    run_seconds = round(time.time() - started, 3) if started else None
+    record_job(metrics, stage, status, timings, run_seconds)
+
+def mark_stage_running(job):
+    """Registra o início da etapa (tempo de fila da etapa incluso)"""
+    payload = job["payload"]
+    stage = payload["stage"]
+    now = time.time()
+    payload["stage_started_at"] = now
+    fields = {
+        "status": "running",
+        "message": PIPELINE_STAGE_MESSAGES[stage],
+        "payload": payload,
+        "timings": {f"{stage}_queue_wait": round(now - payload["stage_queued_at"], 3)},
+    }
+    if not job.get("started_at"):
+        fields["started_at"] = now
+    jobs.update(job["id"], **fields)
+    metrics.observe("queue_wait_seconds", fields["timings"][f"{stage}_queue_wait"], queue=stage)
+
+def finish_stage(job, status, message, file=None, timings=None):
+    """
+    Fim de uma etapa do pipeline: o áudio pronto coloca o vídeo na fila na
+    mesma hora; vídeo pronto (ou qualquer erro) finaliza o job e dispara o callback
+    """
+    payload = job["payload"]
+    stage = payload["stage"]
+    now = time.time()
+    stage_timings = {f"{stage}_{name}": value for name, value in (timings or {}).items()}
+    if payload.get("stage_started_at"):
+        stage_timings[f"{stage}_run"] = round(now - payload["stage_started_at"], 3)
+    
+    if status == "completed" and stage == "audio":
+        payload.update(stage="video", stage_queued_at=now, stage_started_at=None, audio_file=file)
+        jobs.update(job["id"], status="queued", message="Áudio pronto - vídeo na fila...",
+                    payload=payload, timings=stage_timings, progress=None)
+        try:
+            scheduler.submit("video", job["id"], job_args("pipeline", job["id"], payload),
+                             payload.get("priority", 0))
+            print(f"🔗 Pipeline {job['id']}: áudio pronto, vídeo enfileirado")
+            return
+        except QueueFullError as e:
+            status, message, file, stage_timings = "error", f"{e}. Etapa de vídeo não agendada.", None, {}
+    
+    jobs.finish(job["id"], status, message, file=file, timings=stage_timings)
+    remove_workspace(job["id"])
+    print(f"🏁 Pipeline {job['id']} finalizado: {status}")
+    if payload.get("callback_url"):
+        send_callback(payload["callback_url"], job_status_payload(jobs.get(job["id"])))
+
+def job_status_payload(job):
+    """Resposta de /status (também enviada nos callbacks)"""
+    response = {
+        "id": job["id"],
+        "type": job.get("type"),
+        "status": job.get("status"),
+        "message": job.get("message"),
+        "file": job.get("file"),
+        "timings": job.get("timings")
+    }
+    if job.get("type") == "pipeline" and job.get("payload"):
+        response["stage"] = job["payload"].get("stage")
+        if job.get("status") == "completed" and job.get("file"):
+            response["video_path"] = f"/videos/{os.path.basename(job['file'])}"
+            response["audio_path"] = f"/audios/audio_{job['id']}.wav"
+    if job.get("progress"):
+        response["progress"] = job["progress"]
+    if job.get("error"):
+        response["error"] = job["error"]
+    response["updated_at"] = job.get("updated_at")
+    return response
+
+def wait_for_job_change(job_id, since, timeout):
+    """
+    Bloqueia até o job mudar depois de 'since' (updated_at), terminar ou o
+    timeout vencer. Retorna o job atual (None se não existir).
+    """
+    deadline = time.time() + timeout
+    while True:
+        job = jobs.get(job_id)
+        if job is None or job["updated_at"] > since or job["status"] in FINAL_STATES:
+            return job
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            return job
+        # Acordado por notify_job_change; o limite de 1s cobre escritas de outros processos
+        with job_changes:
+            job_changes.wait(min(remaining, 1.0))
+
+class RequestError(Exception):
+    """Payload de job inválido (HTTP 400)"""
+
+def parse_audio_job(data):
+    """Valida o payload de um áudio e retorna os campos normalizados"""
+    if not isinstance(data, dict):
+        raise RequestError("Cada job deve ser um objeto JSON")
+    audio_id = data.get("id")
+    text = data.get("text")
+    voice = data.get("voice") or DEFAULT_VOICE
+    sentence_mode = bool(data.get("sentence_mode", TTS_SENTENCE_MODE))
+    silence_ms = data.get("silence_ms", TTS_SENTENCE_SILENCE_MS)
+    
+    if not audio_id or not text:
+        raise RequestError("Campos obrigatórios: 'id' e 'text'")
+    
+    # Verifica se já existe processo para este ID
+    if jobs.is_active(audio_id):
+        raise RequestError(f"Já existe um processo para o ID {audio_id}")
+    
+    # Verifica se voice_sample existe
+    try:
+        voice_sample = voice_sample_path(voice)
+    except ValueError as e:
+        raise RequestError(str(e))
+    if not os.path.exists(voice_sample):
+        raise RequestError(f"Voice sample não encontrado: {voice_sample}")
+    
+    if not isinstance(silence_ms, int) or not 0 <= silence_ms <= 5000:
+        raise RequestError("'silence_ms' deve ser um inteiro entre 0 e 5000")
+    
+    try:
+        priority = int(data.get("priority", 0))
+    except (TypeError, ValueError):
+        raise RequestError("'priority' deve ser um inteiro")
+    
+    return {"id": audio_id, "text": text, "voice": voice, "sentence_mode": sentence_mode,
+            "silence_ms": silence_ms, "priority": priority}
+
+def parse_video_job(data):
+    """Valida o payload de um vídeo e retorna os campos normalizados"""
+    if not isinstance(data, dict):
+        raise RequestError("Cada job deve ser um objeto JSON")
+    video_id = data.get("id")
+    if not video_id:
+        raise RequestError("Campo obrigatório: 'id'")
+    
+    # Verifica se já existe processo para este ID
+    if jobs.is_active(video_id):
+        raise RequestError(f"Já existe um processo para o ID {video_id}")
+    
+    # Verifica se áudio existe
+    audio_path = os.path.join(AUDIOS_DIR, f"audio_{video_id}.wav")
+    if not os.path.exists(audio_path):
+        raise RequestError(f"Áudio não encontrado: {audio_path}. Crie o áudio primeiro com /create-audio")
+    
+    try:
+        priority = int(data.get("priority", 0))
+    except (TypeError, ValueError):
+        raise RequestError("'priority' deve ser um inteiro")
+    
+    return {"id": video_id, "priority": priority, "images": parse_images(data),
+            "subtitles": parse_flag(data, "subtitles"), "slide_timing": parse_slide_timing(data),
+            **parse_encoder_options(data)}
+
+def parse_slide_timing(data):
+    """Modo de tempo dos slides (opcional: uniform, sentences, silence)"""
+    try:
+        return validate_timing(data.get("slide_timing"))
+    except ValueError as e:
+        raise RequestError(str(e))
+
+def parse_flag(data, name):
+    """Campo booleano opcional (JSON ou texto do formulário multipart)"""
+    value = data.get(name, False)
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    return bool(value)
+
+def parse_encoder_options(data):
+    """Perfil de encoder e codec do vídeo (opcionais)"""
+    try:
+        profile, codec = validate_profile(data.get("encoder_profile"), data.get("codec"))
+    except ValueError as e:
+        raise RequestError(str(e))
+    return {"encoder_profile": profile, "codec": codec}
+
+def parse_images(data):
+    """
+    Lista de imagens do job resolvida para referências "sha256:<hash>"
+    (nomes em imagens/ entram na biblioteca agora; sem lista = todas de imagens/)
+    """
+    images = data.get("images")
+    if images is not None and (not isinstance(images, list)
+                               or not all(isinstance(name, str) and name for name in images)):
+        raise RequestError("'images' deve ser uma lista de nomes em imagens/ ou referências sha256:<hash>")
+    try:
+        return resolve_images(images or None)
+    except ValueError as e:
+        raise RequestError(str(e))
+
+def parse_pipeline_job(data):
+    """Valida o payload do pipeline (campos de áudio + imagens + callback)"""
+    job = parse_audio_job(data)
+    job["images"] = parse_images(data)
+    job["clean_images"] = bool(data.get("clean_images", False))
+    job["subtitles"] = parse_flag(data, "subtitles")
+    job["slide_timing"] = parse_slide_timing(data)
+    job.update(parse_encoder_options(data))
+    
+    callback_url = data.get("callback_url")
+    if callback_url:
+        try:
+            validate_callback_url(callback_url)
+        except ValueError as e:
+            raise RequestError(str(e))
+    job["callback_url"] = callback_url
+    return job
+
+def video_payload(job):
+    """Payload salvo no job de vídeo (re-enfileirado após reinício)"""
+    return {"images": job["images"], "encoder_profile": job["encoder_profile"], "codec": job["codec"],
+            "subtitles": job["subtitles"], "slide_timing": job["slide_timing"]}
+
+def request_job_data():
+    """
+    Corpo da requisição: JSON ou multipart/form-data (campos do formulário +
+    arquivos "images", gravados na biblioteca e anexados à lista na ordem do envio)
+    """
+    if not request.files:
+        return request.json
+    data = request.form.to_dict()
+    uploads = []
+    for upload in request.files.getlist("images"):
+        try:
+            uploads.append(REF_PREFIX + store_upload(upload.stream, upload.filename)["sha256"])
+        except ValueError as e:
+            raise RequestError(str(e))
+    data["images"] = request.form.getlist("images") + uploads
+    return data
+
+def schedule_audio(job, batch_id=None, use_pool=False):
+    """
+    Serve o áudio do cache ou coloca na fila
+    Retorna (status, posição na fila); levanta QueueFullError se estiver cheia.
+    """
+    audio_id, text, voice = job["id"], job["text"], job["voice"]
+    sentence_mode = job["sentence_mode"]
+    if sentence_mode and not has_tts_pool() and not use_pool:
+        print("⚠️ sentence_mode requer TTS_WORKERS > 0 - usando modo subprocesso")
+        sentence_mode = False
+    
+    # Mesmo texto/voz já sintetizado antes? Reaproveita sem rodar o TTS
+    audio_path = os.path.join(AUDIOS_DIR, f"audio_{audio_id}.wav")
+    cache_key = (audio_cache.key(text, voice, sentence_mode, job["silence_ms"])
+                 if audio_cache.enabled else None)
+    if cache_key and audio_cache.lookup(cache_key, audio_path):
+        metrics.inc("cache_hits_total", cache="audio")
+        jobs.create(audio_id, "audio", status="running", batch_id=batch_id)
+        jobs.finish(audio_id, "completed", "Áudio reaproveitado do cache!", file=audio_path,
+                    timings={"cache_hit": True})
+        print(f"⚡ Áudio {audio_id} servido do cache ({cache_key[:12]})")
+        return "completed", None
+    if cache_key:
+        metrics.inc("cache_misses_total", cache="audio")
+    
+    # Coloca na fila de áudio (limite de concorrência por tipo)
+    position = enqueue_job(
+        "audio", audio_id,
+        {"text": text, "voice": voice, "cache_key": cache_key,
+         "sentence_mode": sentence_mode, "silence_ms": job["silence_ms"], "use_pool": use_pool},
+        priority=job["priority"], batch_id=batch_id
+    )
+    starts_now = scheduler.queues["audio"].will_start_now()
+    return ("started" if starts_now else "queued"), position
+
+def parse_batch(data, parse_job):
+    """
+    Valida todos os jobs do lote de uma vez
+    Retorna (jobs válidos, erros por índice); IDs repetidos no lote são erro.
+    """
+    items = data.get("jobs") if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items:
+        raise RequestError("Campo obrigatório: 'jobs' (lista não vazia)")
+    if len(items) > BATCH_MAX_JOBS:
+        raise RequestError(f"Lote com {len(items)} jobs - máximo {BATCH_MAX_JOBS}")
+    
+    default_priority = data.get("priority", 0)
+    parsed, errors, seen = [], [], set()
+    for index, item in enumerate(items):
+        if isinstance(item, dict) and "priority" not in item:
+            item = dict(item, priority=default_priority)
+        try:
+            job = parse_job(item)
+        except RequestError as e:
+            errors.append({"index": index, "id": item.get("id") if isinstance(item, dict) else None,
+                           "message": str(e)})
+            continue
+        if job["id"] in seen:
+            errors.append({"index": index, "id": job["id"], "message": "ID repetido no lote"})
+            continue
+        seen.add(job["id"])
+        parsed.append(job)
+    return parsed, errors
+
+def batch_rejected_response(job_type, needed):
+    """Resposta 429 quando o lote inteiro não cabe na fila"""
+    queue = scheduler.queues[job_type]
+    response = jsonify({
+        "status": "rejected",
+        "message": f"Lote com {needed} jobs não cabe na fila de '{job_type}' "
+                   f"({queue.free_slots()} vagas). Tente novamente em instantes.",
+        "queue": queue.stats()
+    })
+    response.headers["Retry-After"] = "30"
+    return response, 429
+
+def new_batch_id():
+    return f"batch_{uuid.uuid4().hex[:12]}"
+
+def recover_jobs():
+    """Re-enfileira jobs que estavam na fila/executando quando o servidor parou"""
+    for job in jobs.active_jobs():
+        if job["type"] not in ("audio", "video", "pipeline") or job["payload"] is None:
+            jobs.finish(job["id"], "error", "Interrompido por reinício do servidor")
+            continue
+        try:
+            if job["type"] == "pipeline":
+                job["payload"]["stage_queued_at"] = time.time()
+                jobs.update(job["id"], payload=job["payload"])
+            scheduler.submit(job_queue_type(job["type"], job["payload"]), job["id"],
+                             job_args(job["type"], job["id"], job["payload"]),
+                             job["payload"].get("priority", 0))
+            jobs.update(job["id"], status="queued", message="Recuperado após reinício - aguardando na fila...")
+            print(f"♻️ Job recuperado: {job['type']} {job['id']}")
+        except QueueFullError:
+            jobs.finish(job["id"], "error", "Interrompido por reinício do servidor (fila cheia)")
+
+# Filas de áudio/vídeo: (concorrência, tamanho, duração padrão p/ estimativa)
+JOB_QUEUES = {
+    "audio": (run_audio_creation, AUDIO_MAX_CONCURRENCY, AUDIO_QUEUE_SIZE, 60.0),
+    "video": (run_video_creation, VIDEO_MAX_CONCURRENCY, VIDEO_QUEUE_SIZE, 120.0),
+}
+
+def register_job_queues(target):
+    """Registra as filas de áudio e vídeo (em memória) no agendador"""
+    for job_type, (handler, concurrency, max_queue, duration) in JOB_QUEUES.items():
+        target.register(job_type, handler, max_concurrency=concurrency, max_queue=max_queue,
+                        ordering=QUEUE_ORDERING, default_duration=duration, on_start=mark_running)
+    return target
+
+scheduler = register_job_queues(JobScheduler())
+scheduler.register("cleanup", run_clean_images, max_concurrency=CLEANUP_MAX_CONCURRENCY,
+                   max_queue=CLEANUP_QUEUE_SIZE, default_duration=10.0)
 
 # ========================================
 # ROTAS DA API
@@ -148,12 +858,42 @@ def run_video_creation(video_id):
 @app.route("/health", methods=["GET"])
 def health():
     """Verifica se o servidor está funcionando"""
+    counts = jobs.count_by_status()
     return jsonify({
         "status": "ok", 
         "message": "Video Automation Server is running",
-        "active_processes": len([p for p in active_processes.values() if p.get("status") == "running"])
+        "role": server_role,
+        "pid": os.getpid(),
+        "runner_pid": runner_lock.owner() if runner_lock is not None else os.getpid(),
+        "active_processes": counts.get("running", 0),
+        "queued_processes": counts.get("queued", 0),
+        "queues": scheduler.stats(),
+        "executor": executor.stats() if server_role == "runner" else None,
+        "tts_pool": tts_pool.stats() if tts_pool is not None else None,
+        "batch_tts_pool": batch_tts_pool.stats() if batch_tts_pool is not None else None,
+        "audio_cache": audio_cache.stats()
     }), 200
 
+@app.route("/metrics", methods=["GET"])
+def metrics_endpoint():
+    """
+    Métricas no formato texto do Prometheus
+    Histogramas/contadores vêm do banco (iguais em qualquer worker); fila e
+    jobs em execução são lidos das filas na hora da coleta.
+    """
+    queues = scheduler.stats()
+    gauges = [
+        ("queue_depth", "Jobs aguardando na fila",
+         [({"queue": name}, q["queued"]) for name, q in queues.items()]),
+        ("jobs_running", "Jobs em execução",
+         [({"queue": name}, q["running"]) for name, q in queues.items()]),
+        ("queue_capacity", "Tamanho máximo da fila",
+         [({"queue": name}, q["max_queue"]) for name, q in queues.items()]),
+        ("queue_max_concurrency", "Jobs simultâneos permitidos",
+         [({"queue": name}, q["max_concurrency"]) for name, q in queues.items()]),
+    ]
+    return Response(metrics.render(gauges), mimetype="text/plain; version=0.0.4; charset=utf-8")
+
 @app.route('/create-audio', methods=['POST'])
 def create_audio_endpoint():
     """
@@ -162,68 +902,60 @@ def create_audio_endpoint():
     Payload JSON:
     {
         "id": "audio_001",
-        "text": "Texto para sintetizar"
+        "text": "Texto para sintetizar",
+        "voice": "default",  (opcional - voices/<voz>.wav)
+        "sentence_mode": true,  (opcional - síntese paralela por frase)
+        "silence_ms": 250,  (opcional - silêncio entre frases)
+        "priority": 0  (opcional - usado com QUEUE_ORDERING=priority)
     }
     
     Retorna:
     {
-        "status": "started",
+        "status": "started" | "queued",
         "audio_id": "audio_001",
-        "message": "Criação de áudio iniciada"
+        "message": "Criação de áudio iniciada",
+        "queue_position": 0
     }
+    
+    Fila cheia: HTTP 429
     """
     try:
-        data = request.json
-        audio_id = data.get("id")
-        text = data.get("text")
-        
-        # Validação
-        if not audio_id or not text:
+        try:
+            job = parse_audio_job(request.json)
+        except RequestError as e:
             return jsonify({
                 "status": "error",
-                "message": "Campos obrigatórios: 'id' e 'text'"
+                "message": str(e)
             }), 400
+        audio_id, text = job["id"], job["text"]
         
-        # Verifica se já existe processo para este ID
-        if audio_id in active_processes and active_processes[audio_id].get("status") == "running":
-            return jsonify({
-                "status": "error",
-                "message": f"Já existe um processo para o ID {audio_id}"
-            }), 400
+        try:
+            status, position = schedule_audio(job)
+        except QueueFullError as e:
+            return queue_full_response(e)
         
-        # Verifica se voice_sample existe
-        if not os.path.exists(VOICE_SAMPLE):
+        if status == "completed":
             return jsonify({
-                "status": "error",
-                "message": f"Voice sample não encontrado: {VOICE_SAMPLE}"
-            }), 400
-        
-        # Marca processo como iniciado
-        active_processes[audio_id] = {
-            "type": "audio",
-            "status": "running", 
-            "message": "Processando...",
-            "timestamp": time.time()
-        }
-        
-        # Inicia criação em thread separada
-        thread = threading.Thread(
-            target=run_audio_creation,
-            args=(audio_id, text),
-            daemon=True
-        )
-        thread.start()
+                "status": "completed",
+                "audio_id": audio_id,
+                "message": "Áudio reaproveitado do cache!",
+                "audio_path": f"/audios/audio_{audio_id}.wav",
+                "cached": True
+            }), 200
+        starts_now = status == "started"
         
         print(f"\n{'='*60}")
         print(f"🚀 NOVA REQUISIÇÃO ÁUDIO - ID: {audio_id}")
         print(f"📝 Texto: {text[:100]}...")
+        print(f"📥 Posição na fila: {position}")
         print(f"{'='*60}\n")
         
         return jsonify({
-            "status": "started",
+            "status": status,
             "audio_id": audio_id,
-            "message": "Criação de áudio iniciada com sucesso!",
-            "audio_path": f"/audios/audio_{audio_id}.wav"
+            "message": "Criação de áudio iniciada com sucesso!" if starts_now else "Áudio na fila de processamento",
+            "audio_path": f"/audios/audio_{audio_id}.wav",
+            "queue_position": position
         }), 200
         
     except Exception as e:
@@ -240,83 +972,476 @@ def create_video_endpoint():
     
     Payload JSON:
     {
-        "id": "video_001"
+        "id": "video_001",
+        "images": ["01.jpg", "sha256:9f86d0..."],  (opcional - padrão: todas de imagens/)
+        "encoder_profile": "social",  (opcional - draft, social, archive)
+        "codec": "h264",  (opcional - h264 ou h265)
+        "subtitles": false,  (opcional - queima legendas do alinhamento do áudio)
+        "slide_timing": "uniform",  (opcional - uniform, sentences ou silence)
+        "priority": 0  (opcional - usado com QUEUE_ORDERING=priority)
     }
     
+    Também aceita multipart/form-data: os mesmos campos no formulário e as
+    imagens enviadas em arquivos "images" (na ordem do envio).
+    
+    As imagens são fixadas no pedido (work/<id>/): mudanças posteriores em
+    imagens/ não afetam este vídeo.
+    
     Retorna:
     {
-        "status": "started",
+        "status": "started" | "queued",
         "video_id": "video_001",
-        "message": "Criação de vídeo iniciada"
+        "message": "Criação de vídeo iniciada",
+        "queue_position": 0
     }
+    
+    Fila cheia: HTTP 429
     """
     try:
-        data = request.json
-        video_id = data.get("id")
-        
-        # Validação
-        if not video_id:
+        try:
+            job = parse_video_job(request_job_data())
+            img_count = len(job["images"])
+        except RequestError as e:
             return jsonify({
                 "status": "error",
-                "message": "Campo obrigatório: 'id'"
+                "message": str(e)
             }), 400
+        video_id = job["id"]
+        
+        # Coloca na fila de vídeo (limite de concorrência por tipo)
+        try:
+            position = enqueue_job("video", video_id, video_payload(job), priority=job["priority"])
+        except QueueFullError as e:
+            return queue_full_response(e)
+        starts_now = scheduler.queues["video"].will_start_now()
+        
+        print(f"\n{'='*60}")
+        print(f"🚀 NOVA REQUISIÇÃO VÍDEO - ID: {video_id}")
+        print(f"🖼️ Imagens encontradas: {img_count}")
+        print(f"📥 Posição na fila: {position}")
+        print(f"{'='*60}\n")
         
-        # Verifica se já existe processo para este ID
-        if video_id in active_processes and active_processes[video_id].get("status") == "running":
+        return jsonify({
+            "status": "started" if starts_now else "queued",
+            "video_id": video_id,
+            "message": "Criação de vídeo iniciada com sucesso!" if starts_now else "Vídeo na fila de processamento",
+            "images_found": img_count,
+            "queue_position": position
+        }), 200
+        
+    except Exception as e:
+        print(f"\n❌ ERRO NO SERVIDOR: {str(e)}\n")
+        return jsonify({
+            "status": "error",
+            "message": f"Erro no servidor: {str(e)}"
+        }), 500
+
+@app.route('/status/<resource_id>', methods=["GET"])
+def get_status(resource_id):
+    """
+    Verifica status de um áudio ou vídeo específico
+    
+    Long-poll: ?wait=<segundos> (máx. 60) segura a resposta até o job mudar.
+    Passe em ?since= o "updated_at" da última resposta para receber só
+    mudanças posteriores; jobs finalizados respondem na hora.
+    """
+    try:
+        wait = min(float(request.args.get("wait", 0)), STATUS_MAX_WAIT)
+        since = request.args.get("since")
+        since = float(since) if since is not None else None
+    except ValueError:
+        return jsonify({
+            "status": "error",
+            "message": "'wait' e 'since' devem ser números"
+        }), 400
+    
+    process_data = jobs.get(resource_id)
+    if process_data is not None and wait > 0:
+        process_data = wait_for_job_change(
+            resource_id, since if since is not None else process_data["updated_at"], wait)
+    if process_data is None:
+        return jsonify({
+            "status": "not_found",
+            "message": f"ID {resource_id} não encontrado"
+        }), 404
+    
+    return jsonify(status_response(process_data)), 200
+
+def status_response(process_data):
+    """Status do job com posição/estimativa de fila quando aguardando"""
+    response = job_status_payload(process_data)
+    
+    # Jobs na fila: posição e estimativa de início
+    queue = scheduler.queues.get(job_queue_type(process_data["type"], process_data.get("payload")))
+    if process_data.get("status") == "queued" and queue is not None:
+        response["queue_position"] = queue.position(process_data["id"])
+        estimated = queue.estimated_start(process_data["id"])
+        if estimated is not None:
+            response["estimated_start"] = estimated
+            response["estimated_wait_seconds"] = round(max(0.0, estimated - time.time()), 1)
+    elif process_data.get("started_at"):
+        response["started_at"] = process_data["started_at"]
+    
+    return response
+
+@app.route('/events/<resource_id>', methods=["GET"])
+def job_events(resource_id):
+    """
+    Progresso em tempo real via Server-Sent Events
+    
+    Cada mudança do job (fila, etapa, frase i/N, progresso do ffmpeg) gera um
+    evento "status" com o mesmo JSON de /status/<id>. O stream termina com o
+    evento "end" quando o job finaliza. Reconexões com Last-Event-ID só
+    recebem mudanças posteriores.
+    """
+    if jobs.get(resource_id) is None:
+        return jsonify({
+            "status": "not_found",
+            "message": f"ID {resource_id} não encontrado"
+        }), 404
+    try:
+        since = float(request.headers.get("Last-Event-ID", 0))
+    except ValueError:
+        since = 0.0
+    
+    def stream(since):
+        yield "retry: 3000\n\n"
+        while True:
+            job = wait_for_job_change(resource_id, since, SSE_HEARTBEAT_SECONDS)
+            if job is None:
+                yield "event: end\ndata: {\"status\": \"not_found\"}\n\n"
+                return
+            if job["updated_at"] > since:
+                since = job["updated_at"]
+                data = json.dumps(status_response(job), ensure_ascii=False)
+                yield f"id: {since!r}\nevent: status\ndata: {data}\n\n"
+            elif job["status"] not in FINAL_STATES:
+                yield ": keep-alive\n\n"
+            if job["status"] in FINAL_STATES:
+                yield f"event: end\ndata: {json.dumps({'status': job['status']})}\n\n"
+                return
+    
+    return Response(stream(since), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.route('/jobs', methods=["GET"])
+def list_jobs():
+    """
+    Lista jobs do banco (mais recentes primeiro)
+    
+    Query string: status, type, limit (máx. 1000), offset
+    """
+    try:
+        limit = min(int(request.args.get("limit", 100)), 1000)
+        offset = int(request.args.get("offset", 0))
+    except ValueError:
+        return jsonify({
+            "status": "error",
+            "message": "'limit' e 'offset' devem ser inteiros"
+        }), 400
+    
+    result = jobs.list(status=request.args.get("status"), job_type=request.args.get("type"),
+                       limit=limit, offset=offset)
+    for job in result:
+        job.pop("payload", None)
+        job.pop("output", None)
+    return jsonify({
+        "count": len(result),
+        "limit": limit,
+        "offset": offset,
+        "jobs": result
+    }), 200
+
+@app.route('/batch/create-audio', methods=['POST'])
+def batch_create_audio_endpoint():
+    """
+    Cria vários áudios em uma requisição (todos validados antes de agendar)
+    
+    Payload JSON:
+    {
+        "jobs": [
+            {"id": "audio_001", "text": "...", "voice": "default"},
+            {"id": "audio_002", "text": "..."}
+        ],
+        "priority": 0  (opcional - padrão para os jobs sem "priority")
+    }
+    
+    Os áudios do lote compartilham o modelo TTS já carregado (pool de
+    workers; com TTS_WORKERS=0 um worker compartilhado é criado no 1º lote).
+    
+    Retorna:
+    {
+        "status": "accepted",
+        "batch_id": "batch_1a2b3c4d5e6f",
+        "total": 2,
+        "cached": 0,
+        "jobs": [{"id": "audio_001", "status": "queued", "queue_position": 0}, ...]
+    }
+    
+    Algum job inválido: HTTP 400 com "errors" (nada é agendado)
+    Lote não cabe na fila: HTTP 429
+    """
+    try:
+        try:
+            parsed, errors = parse_batch(request.json, parse_audio_job)
+        except RequestError as e:
             return jsonify({
                 "status": "error",
-                "message": f"Já existe um processo para o ID {video_id}"
+                "message": str(e)
             }), 400
-        
-        # Verifica se áudio existe
-        audio_path = os.path.join(AUDIOS_DIR, f"audio_{video_id}.wav")
-        if not os.path.exists(audio_path):
+        if errors:
             return jsonify({
                 "status": "error",
-                "message": f"Áudio não encontrado: {audio_path}. Crie o áudio primeiro com /create-audio"
+                "message": f"{len(errors)} job(s) inválido(s) no lote - nada foi agendado",
+                "errors": errors
             }), 400
         
-        # Verifica se existem imagens
-        if not os.path.exists(IMGS_DIR):
+        batch_id = new_batch_id()
+        results = []
+        with batch_lock:
+            if len(parsed) > scheduler.queues["audio"].free_slots():
+                return batch_rejected_response("audio", len(parsed))
+            for job in parsed:
+                try:
+                    status, position = schedule_audio(job, batch_id=batch_id, use_pool=True)
+                except QueueFullError as e:
+                    # Fila encheu por requisições avulsas no meio do lote
+                    jobs.create(job["id"], "audio", status="running", batch_id=batch_id)
+                    jobs.finish(job["id"], "error", f"{e}. Job do lote não agendado.")
+                    status, position = "error", None
+                results.append({"id": job["id"], "status": status, "queue_position": position})
+        
+        cached = sum(1 for r in results if r["status"] == "completed")
+        print(f"\n{'='*60}")
+        print(f"📦 NOVO LOTE DE ÁUDIOS - {batch_id}")
+        print(f"🎤 Jobs: {len(results)} ({cached} do cache)")
+        print(f"{'='*60}\n")
+        
+        return jsonify({
+            "status": "accepted",
+            "batch_id": batch_id,
+            "total": len(results),
+            "cached": cached,
+            "jobs": results
+        }), 200
+        
+    except Exception as e:
+        print(f"\n❌ ERRO NO SERVIDOR: {str(e)}\n")
+        return jsonify({
+            "status": "error",
+            "message": f"Erro no servidor: {str(e)}"
+        }), 500
+
+@app.route('/batch/create-video', methods=['POST'])
+def batch_create_video_endpoint():
+    """
+    Cria vários vídeos em uma requisição (todos validados antes de agendar)
+    
+    Payload JSON:
+    {
+        "jobs": [{"id": "video_001"}, {"id": "video_002", "images": ["01.jpg"]}],
+        "priority": 0  (opcional - padrão para os jobs sem "priority")
+    }
+    
+    Retorna:
+    {
+        "status": "accepted",
+        "batch_id": "batch_1a2b3c4d5e6f",
+        "total": 2,
+        "images_found": 12,
+        "jobs": [{"id": "video_001", "status": "queued", "queue_position": 0}, ...]
+    }
+    
+    Algum job inválido: HTTP 400 com "errors" (nada é agendado)
+    Lote não cabe na fila: HTTP 429
+    """
+    try:
+        try:
+            parsed, errors = parse_batch(request.json, parse_video_job)
+        except RequestError as e:
             return jsonify({
                 "status": "error",
-                "message": f"Pasta de imagens não encontrada: {IMGS_DIR}"
+                "message": str(e)
             }), 400
+        if errors:
+            return jsonify({
+                "status": "error",
+                "message": f"{len(errors)} job(s) inválido(s) no lote - nada foi agendado",
+                "errors": errors
+            }), 400
+        
+        batch_id = new_batch_id()
+        results = []
+        with batch_lock:
+            if len(parsed) > scheduler.queues["video"].free_slots():
+                return batch_rejected_response("video", len(parsed))
+            for job in parsed:
+                try:
+                    position = enqueue_job("video", job["id"], video_payload(job),
+                                           priority=job["priority"], batch_id=batch_id)
+                    status = "started" if scheduler.queues["video"].will_start_now() else "queued"
+                except QueueFullError as e:
+                    jobs.create(job["id"], "video", status="running", batch_id=batch_id)
+                    jobs.finish(job["id"], "error", f"{e}. Job do lote não agendado.")
+                    status, position = "error", None
+                results.append({"id": job["id"], "status": status, "queue_position": position,
+                                "images_found": len(job["images"])})
+        
+        img_count = len({ref for job in parsed for ref in job["images"]})
+        print(f"\n{'='*60}")
+        print(f"📦 NOVO LOTE DE VÍDEOS - {batch_id}")
+        print(f"🎬 Jobs: {len(results)} | 🖼️ Imagens: {img_count}")
+        print(f"{'='*60}\n")
         
-        img_count = len([f for f in os.listdir(IMGS_DIR) 
-                        if f.lower().endswith(('.jpg', '.jpeg', '.png'))])
-        if img_count == 0:
+        return jsonify({
+            "status": "accepted",
+            "batch_id": batch_id,
+            "total": len(results),
+            "images_found": img_count,
+            "jobs": results
+        }), 200
+        
+    except Exception as e:
+        print(f"\n❌ ERRO NO SERVIDOR: {str(e)}\n")
+        return jsonify({
+            "status": "error",
+            "message": f"Erro no servidor: {str(e)}"
+        }), 500
+
+@app.route('/batch/<batch_id>', methods=["GET"])
+def get_batch_status(batch_id):
+    """
+    Progresso agregado de um lote
+    
+    status: "queued" | "running" | "completed" | "completed_with_errors"
+    progress: fração de jobs finalizados (0.0 a 1.0)
+    """
+    summary = jobs.batch_summary(batch_id)
+    if summary is None:
+        return jsonify({
+            "status": "not_found",
+            "message": f"Lote {batch_id} não encontrado"
+        }), 404
+    
+    by_status = summary["by_status"]
+    active = by_status.get("queued", 0) + by_status.get("running", 0)
+    finished = summary["total"] - active
+    if active:
+        status = "queued" if active == by_status.get("queued", 0) and not finished else "running"
+    else:
+        status = "completed_with_errors" if by_status.get("error") else "completed"
+    
+    batch_jobs = jobs.list(batch_id=batch_id, limit=summary["total"])
+    batch_jobs.sort(key=lambda job: job["created_at"])
+    return jsonify({
+        "batch_id": batch_id,
+        "status": status,
+        "total": summary["total"],
+        "finished": finished,
+        "progress": round(finished / summary["total"], 3),
+        "counts": by_status,
+        "by_type": summary["by_type"],
+        "jobs": [{
+            "id": job["id"],
+            "type": job["type"],
+            "status": job["status"],
+            "message": job["message"],
+            "file": job["file"],
+            "error": job["error"],
+            "timings": job["timings"]
+        } for job in batch_jobs]
+    }), 200
+
+@app.route('/pipeline', methods=['POST'])
+def pipeline_endpoint():
+    """
+    Áudio + vídeo em um único job: o vídeo começa assim que o áudio fica
+    pronto, sem o cliente precisar consultar /status entre as etapas
+    
+    Payload JSON:
+    {
+        "id": "video_001",
+        "text": "Texto para sintetizar",
+        "voice": "default",  (opcional)
+        "images": ["01.jpg", "sha256:9f86d0..."],  (opcional - padrão: todas de imagens/)
+        "clean_images": false,  (opcional - limpa imagens antes do vídeo)
+        "encoder_profile": "social",  (opcional - draft, social, archive)
+        "subtitles": false,  (opcional - legendas a partir do alinhamento da síntese)
+        "slide_timing": "sentences",  (opcional - cortes entre slides nas pausas)
+        "callback_url": "http://n8n:5678/webhook/video",  (opcional - POST ao terminar)
+        "priority": 0  (opcional)
+    }
+    
+    Retorna:
+    {
+        "status": "queued",
+        "id": "video_001",
+        "stage": "audio" | "video",
+        "queue_position": 0
+    }
+    
+    O callback recebe o mesmo JSON de /status/<id> (status, timings por etapa,
+    video_path). Fila cheia: HTTP 429
+    """
+    try:
+        try:
+            job = parse_pipeline_job(request.json)
+            img_count = len(job["images"])
+        except RequestError as e:
             return jsonify({
                 "status": "error",
-                "message": "Nenhuma imagem encontrada na pasta imagens/"
+                "message": str(e)
             }), 400
+        job_id, text, voice = job["id"], job["text"], job["voice"]
+        
+        sentence_mode = job["sentence_mode"]
+        if sentence_mode and not has_tts_pool():
+            print("⚠️ sentence_mode requer TTS_WORKERS > 0 - usando modo subprocesso")
+            sentence_mode = False
         
-        # Marca processo como iniciado
-        active_processes[video_id] = {
-            "type": "video",
-            "status": "running", 
-            "message": "Processando...",
-            "timestamp": time.time()
+        payload = {
+            "text": text, "voice": voice, "cache_key": None,
+            "sentence_mode": sentence_mode, "silence_ms": job["silence_ms"],
+            "images": job["images"], "clean_images": job["clean_images"],
+            "encoder_profile": job["encoder_profile"], "codec": job["codec"],
+            "subtitles": job["subtitles"], "slide_timing": job["slide_timing"],
+            "callback_url": job["callback_url"], "priority": job["priority"],
+            "stage": "audio", "stage_queued_at": time.time(),
         }
         
-        # Inicia criação em thread separada
-        thread = threading.Thread(
-            target=run_video_creation,
-            args=(video_id,),
-            daemon=True
-        )
-        thread.start()
+        # Áudio já no cache: o pipeline começa direto na etapa de vídeo
+        audio_path = os.path.join(AUDIOS_DIR, f"audio_{job_id}.wav")
+        if audio_cache.enabled:
+            payload["cache_key"] = audio_cache.key(text, voice, sentence_mode, job["silence_ms"])
+            if audio_cache.lookup(payload["cache_key"], audio_path):
+                print(f"⚡ Pipeline {job_id}: áudio servido do cache ({payload['cache_key'][:12]})")
+                payload.update(stage="video", audio_file=audio_path)
+                metrics.inc("cache_hits_total", cache="audio")
+            else:
+                metrics.inc("cache_misses_total", cache="audio")
+        
+        try:
+            position = enqueue_job("pipeline", job_id, payload, priority=job["priority"])
+        except QueueFullError as e:
+            return queue_full_response(e)
+        if payload["stage"] == "video":
+            jobs.update(job_id, timings={"audio_cache_hit": True})
         
         print(f"\n{'='*60}")
-        print(f"🚀 NOVA REQUISIÇÃO VÍDEO - ID: {video_id}")
-        print(f"🖼️ Imagens encontradas: {img_count}")
+        print(f"🔗 NOVO PIPELINE - ID: {job_id}")
+        print(f"📝 Texto: {text[:100]}...")
+        print(f"🖼️ Imagens: {img_count}")
+        print(f"📥 Etapa inicial: {payload['stage']} | Posição na fila: {position}")
         print(f"{'='*60}\n")
         
         return jsonify({
-            "status": "started",
-            "video_id": video_id,
-            "message": "Criação de vídeo iniciada com sucesso!",
-            "images_found": img_count
+            "status": "queued",
+            "id": job_id,
+            "message": "Pipeline na fila de processamento",
+            "stage": payload["stage"],
+            "images_found": img_count,
+            "queue_position": position,
+            "callback": bool(job["callback_url"])
         }), 200
         
     except Exception as e:
@@ -326,38 +1451,126 @@ def create_video_endpoint():
             "message": f"Erro no servidor: {str(e)}"
         }), 500
 
-@app.route('/status/<resource_id>', methods=["GET"])
-def get_status(resource_id):
-    """Verifica status de um áudio ou vídeo específico"""
-    if resource_id not in active_processes:
+@app.route('/images', methods=['POST'])
+def upload_images_endpoint():
+    """
+    Envia imagens para a biblioteca compartilhada (multipart/form-data, campo "images")
+    
+    Retorna as referências para usar na lista "images" de /create-video,
+    /pipeline e dos lotes - a mesma imagem enviada de novo não ocupa mais espaço:
+    {
+        "status": "success",
+        "images": [{"filename": "01.jpg", "ref": "sha256:9f86d0...",
+                    "width": 1080, "height": 1920, "format": "JPEG"}, ...]
+    }
+    
+    Cada imagem é decodificada antes de entrar: arquivo corrompido/truncado = HTTP 400
+    """
+    uploads = request.files.getlist("images")
+    if not uploads:
         return jsonify({
-            "status": "not_found",
-            "message": f"ID {resource_id} não encontrado"
+            "status": "error",
+            "message": "Envie os arquivos no campo 'images' (multipart/form-data)"
+        }), 400
+    
+    stored = []
+    try:
+        for upload in uploads:
+            info = store_upload(upload.stream, upload.filename)
+            stored.append({"filename": upload.filename, "ref": REF_PREFIX + info["sha256"],
+                           "width": info["width"], "height": info["height"], "format": info["format"]})
+    except ValueError as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e),
+            "images": stored
+        }), 400
+    
+    print(f"🖼️ {len(stored)} imagem(ns) recebidas na biblioteca")
+    return jsonify({
+        "status": "success",
+        "images": stored
+    }), 200
+
+@app.route('/images', methods=['GET'])
+def list_images_endpoint():
+    """
+    Imagens de imagens/ consultadas pelo índice (image_index.py)
+    
+    Só arquivos novos ou modificados desde a última consulta são lidos; imagens
+    inválidas aparecem com "valid": false e o erro, e não entram nos vídeos:
+    {
+        "status": "success",
+        "count": 2, "valid": 1,
+        "images": [{"name": "01.jpg", "sha256": "9f86d0...", "width": 1080,
+                    "height": 1920, "format": "JPEG", "size": 245123,
+                    "valid": true, "error": null}, ...]
+    }
+    """
+    if not os.path.isdir(IMGS_DIR):
+        return jsonify({
+            "status": "error",
+            "message": f"Pasta de imagens não encontrada: {IMGS_DIR}"
         }), 404
     
-    process_data = active_processes[resource_id]
+    entries = image_index().sync(IMGS_DIR)
     return jsonify({
-        "id": resource_id,
-        "type": process_data.get("type"),
-        "status": process_data.get("status"),
-        "message": process_data.get("message"),
-        "file": process_data.get("file")
+        "status": "success",
+        "count": len(entries),
+        "valid": sum(1 for entry in entries if entry["verified"]),
+        "images": [{
+            "name": entry["name"],
+            "sha256": entry["sha256"],
+            "width": entry["width"],
+            "height": entry["height"],
+            "format": entry["format"],
+            "size": entry["size"],
+            "valid": bool(entry["verified"]),
+            "error": entry["error"]
+        } for entry in entries]
     }), 200
 
+@app.route('/logs/<resource_id>', methods=["GET"])
+def job_log(resource_id):
+    """
+    Log da saída dos processos do job (texto puro)
+    
+    Query string: max_kb (final do log, padrão 64, máx. 1024)
+    Sem arquivo de log, devolve o final da saída salvo no registro do job.
+    """
+    try:
+        max_kb = min(max(int(request.args.get("max_kb", 64)), 1), 1024)
+    except ValueError:
+        return jsonify({
+            "status": "error",
+            "message": "'max_kb' deve ser um inteiro"
+        }), 400
+    
+    text = read_log_tail(resource_id, max_kb * 1024)
+    if text is None:
+        job = jobs.get(resource_id)
+        text = job.get("output") if job else None
+    if text is None:
+        return jsonify({
+            "status": "not_found",
+            "message": f"Log de {resource_id} não encontrado"
+        }), 404
+    return Response(text, mimetype="text/plain; charset=utf-8")
+
 @app.route('/download/audios/<filename>', methods=["GET"])
 def download_audio(filename):
-    """Download de arquivos de áudio"""
-    file_path = os.path.join(AUDIOS_DIR, filename)
-    if os.path.exists(file_path):
-        return send_file(file_path, as_attachment=True)
+    """Download de arquivos de áudio (Range, ETag/304 - ver file_serving.py)"""
+    file_path = resolve_download(AUDIOS_DIR, filename)
+    if file_path:
+        return serve_file(file_path)
     return jsonify({"error": "Arquivo não encontrado"}), 404
 
 @app.route('/download/videos/<filename>', methods=["GET"])
 def download_video(filename):
-    """Download de arquivos de vídeo"""
-    file_path = os.path.join(VIDEOS_DIR, filename)
-    if os.path.exists(file_path):
-        return send_file(file_path, as_attachment=True)
+    """Download de arquivos de vídeo (Range, ETag/304 - ver file_serving.py)"""
+    file_path = resolve_download(VIDEOS_DIR, filename)
+    if file_path:
+        return serve_file(file_path)
     return jsonify({"error": "Arquivo não encontrado"}), 404
 
 @app.route('/clean-images', methods=['POST'])
@@ -370,60 +1583,23 @@ def clean_images_endpoint():
         "status": "success",
         "message": "Limpeza concluída",
         "cleaned_count": 5,
-        "removed_count": 0
+        "removed_count": 0,
+        "invalid_count": 1  (imagens que não decodificam - ficam fora dos vídeos)
     }
     """
+    future = Future()
     try:
-        # Executa o script de limpeza
-        CLEAN_SCRIPT = os.path.join(BASE_DIR, "clean_images.py")
-        
-        if not os.path.exists(CLEAN_SCRIPT):
-            return jsonify({
-                "status": "error",
-                "message": f"Script de limpeza não encontrado: {CLEAN_SCRIPT}"
-            }), 400
-        
-        result = subprocess.run([
-            PYTHON_PATH,
-            CLEAN_SCRIPT
-        ], capture_output=True, text=True, timeout=60)
-        
-        if result.returncode == 0:
-            # Extrair informações do output
-            output_lines = result.stdout.split('\n')
-            cleaned_count = 0
-            removed_count = 0
-            
-            for line in output_lines:
-                if "Arquivos limpos:" in line:
-                    cleaned_count = int(line.split(":")[1].strip())
-                elif "Arquivos removidos:" in line:
-                    removed_count = int(line.split(":")[1].strip())
-            
-            print(f"🧹 Limpeza de imagens executada com sucesso!")
-            print(f"📊 Limpos: {cleaned_count}, Removidos: {removed_count}")
-            
-            return jsonify({
-                "status": "success",
-                "message": "Limpeza de imagens concluída com sucesso!",
-                "cleaned_count": cleaned_count,
-                "removed_count": removed_count,
-                "output": result.stdout
-            }), 200
-        else:
-            print(f"❌ Erro na limpeza de imagens:")
-            print(f"STDOUT: {result.stdout}")
-            print(f"STDERR: {result.stderr}")
-            
-            return jsonify({
-                "status": "error",
-                "message": f"Erro na limpeza: {result.stderr or result.stdout}"
-            }), 400
-            
-    except subprocess.TimeoutExpired:
+        scheduler.submit("cleanup", f"cleanup_{time.time_ns()}", (future,))
+    except QueueFullError as e:
+        return queue_full_response(e)
+    
+    try:
+        payload, status_code = future.result(timeout=120)
+        return jsonify(payload), status_code
+    except FuturesTimeoutError:
         return jsonify({
             "status": "error",
-            "message": "Timeout - limpeza demorou mais que 1 minuto"
+            "message": "Timeout - limpeza não concluída a tempo"
         }), 400
     except Exception as e:
         print(f"❌ Erro inesperado na limpeza: {str(e)}")
@@ -437,21 +1613,102 @@ def clean_images_endpoint():
 # ========================================
 
 def cleanup_old_processes():
-    """Remove processos antigos da memória (completados há mais de 1 hora)"""
+    """
+    Aplica a retenção do banco de jobs (finalizados há mais de JOB_RETENTION_HOURS),
+    dos logs, dos workspaces órfãos e os limites da biblioteca de imagens
+    """
     while True:
         time.sleep(300)  # 5 minutos
-        current_time = time.time()
-        for resource_id in list(active_processes.keys()):
-            process = active_processes[resource_id]
-            if (process.get("status") in ["completed", "error"] and
-                current_time - process.get("timestamp", 0) > 3600):
-                del active_processes[resource_id]
-                print(f"🧹 Removido processo antigo: {resource_id}")
+        try:
+            removed = jobs.purge()
+            if removed:
+                print(f"🧹 {removed} job(s) antigos removidos do banco")
+            removed = purge_logs(JOB_RETENTION_HOURS * 3600)
+            if removed:
+                print(f"🧹 {removed} log(s) de jobs antigos removidos")
+            removed = purge_workspaces(job["id"] for job in jobs.active_jobs())
+            if removed:
+                print(f"🧹 {removed} workspace(s) de jobs finalizados removidos")
+            evict_library()
+        except Exception as e:
+            print(f"⚠️ Erro na retenção de jobs: {e}")
 
 # ========================================
 # INICIALIZAÇÃO
 # ========================================
 
+def start_background(job_scheduler):
+    """Parte executora do servidor: filas, jobs interrompidos, workers TTS e limpeza"""
+    global tts_pool
+    os.makedirs(AUDIOS_DIR, exist_ok=True)
+    os.makedirs(VIDEOS_DIR, exist_ok=True)
+    os.makedirs(IMGS_DIR, exist_ok=True)
+    
+    # Sobe os workers TTS residentes (modelo carregado uma vez por worker) antes
+    # das filas: jobs de áudio recuperados precisam encontrar o pool pronto
+    if TTS_WORKERS > 0:
+        tts_pool = TTSWorkerPool(size=TTS_WORKERS, on_ready=record_model_load).start()
+    else:
+        print("ℹ️ TTS_WORKERS=0: áudio será gerado em subprocesso (modelo recarregado a cada job)")
+    
+    # Inicia as filas de jobs e recupera jobs interrompidos
+    job_scheduler.start()
+    recover_jobs()
+    
+    # Inicia thread de limpeza
+    cleanup_thread = threading.Thread(target=cleanup_old_processes, daemon=True)
+    cleanup_thread.start()
+
+def start_worker():
+    """
+    Inicialização de cada worker do gunicorn (wsgi.py): a API passa a usar o
+    banco como fila e o worker disputa o papel de executor de jobs
+    """
+    global server_role, runner_lock, executor
+    server_role = "api"
+    executor = register_job_queues(JobScheduler())
+    for job_type, (_, concurrency, max_queue, duration) in JOB_QUEUES.items():
+        scheduler.queues[job_type] = StoreQueue(jobs, job_type, job_queue_type, concurrency,
+                                                max_queue, QUEUE_ORDERING, duration)
+    scheduler.queues["cleanup"].start()
+    
+    runner_lock = RunnerLock()
+    if runner_lock.acquire(blocking=False):
+        become_runner()
+    else:
+        # Fica de reserva: assume quando o executor atual sair (ou morrer)
+        threading.Thread(target=wait_for_runner_role, name="runner-election", daemon=True).start()
+
+def wait_for_runner_role():
+    runner_lock.acquire(blocking=True)
+    become_runner()
+
+def become_runner():
+    global server_role, dispatcher
+    server_role = "runner"
+    print(f"👑 Worker {os.getpid()} é o executor de jobs")
+    start_background(executor)
+    dispatcher = JobDispatcher(jobs, executor, job_queue_type, job_args, wakeup=job_changes).start()
+
+def shutdown_worker():
+    """
+    Encerramento gracioso (gunicorn worker_exit): o executor para de iniciar
+    jobs e espera os que estão em execução por até DRAIN_TIMEOUT segundos.
+    Jobs que ficam na fila continuam no banco e são retomados pelo próximo executor.
+    """
+    if server_role != "runner":
+        return
+    dispatcher.stop()
+    print(f"⏳ Aguardando jobs em execução terminarem (até {DRAIN_TIMEOUT}s)...")
+    unfinished = executor.drain(DRAIN_TIMEOUT)
+    if unfinished:
+        print(f"⚠️ Jobs ainda em execução: {', '.join(unfinished)} - serão recuperados no próximo início")
+    else:
+        print("✅ Nenhum job em execução")
+    if tts_pool is not None:
+        tts_pool.shutdown()
+    runner_lock.release()
+
 if __name__ == '__main__':
     print("\n" + "="*60)
     print("🌐 VIDEO AUTOMATION SERVER")
@@ -465,20 +1722,21 @@ if __name__ == '__main__':
     print(f"   - POST /create-video")
     print(f"   - POST /clean-images")
     print(f"   - GET /status/<id>")
+    print(f"   - GET /events/<id>")
+    print(f"   - GET /logs/<id>")
+    print(f"   - GET /jobs")
+    print(f"   - POST /batch/create-audio")
+    print(f"   - POST /batch/create-video")
+    print(f"   - GET /batch/<batch_id>")
+    print(f"   - POST /pipeline")
+    print(f"   - POST /images")
+    print(f"   - GET /images")
     print(f"   - GET /health")
+    print(f"   - GET /metrics")
     print(f"   - GET /download/audios/<filename>")
     print(f"   - GET /download/videos/<filename>")
     print("="*60 + "\n")
     
-    # Cria diretórios se não existirem
-    os.makedirs(AUDIOS_DIR, exist_ok=True)
-    os.makedirs(VIDEOS_DIR, exist_ok=True)
-    os.makedirs(IMGS_DIR, exist_ok=True)
-    
-    # Inicia thread de limpeza
-    cleanup_thread = threading.Thread(target=cleanup_old_processes, daemon=True)
-    cleanup_thread.start()
-    
     # Verifica se os scripts existem
     if not os.path.exists(AUDIO_SCRIPT):
         print(f"❌ ERRO: Script de áudio não encontrado: {AUDIO_SCRIPT}")
@@ -493,5 +1751,10 @@ if __name__ == '__main__':
         print(f"❌ ERRO: Python não encontrado: {PYTHON_PATH}")
         exit(1)
     
+    # Filas (audio, video, cleanup), jobs interrompidos, workers TTS e limpeza
+    start_background(scheduler)
+    
     print("✅ Servidor iniciado com sucesso!")
-    app.run(host='0.0.0.0', port=5005, debug=False)
+    print("ℹ️ Servidor de desenvolvimento - em produção use: gunicorn -c gunicorn.conf.py wsgi:app")
+    app.run(host='0.0.0.0', port=int(os.environ.get("PORT", "5005")), debug=False,
+            threaded=True)  # long-poll/SSE seguram uma thread cada
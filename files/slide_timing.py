@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tempo de cada slide a partir do áudio
+Em vez de dividir a duração igualmente entre as imagens, os cortes entre
+slides podem cair nas pausas da narração:
+
+  - "uniform": duração dividida igualmente (padrão, comportamento anterior)
+  - "sentences": fronteiras entre frases do alinhamento da síntese (alignment.py)
+  - "silence": pausas detectadas no próprio WAV (varredura de energia com NumPy
+               sobre o arquivo mapeado em memória, em blocos)
+
+Cada corte parte da posição uniforme e é "puxado" para a pausa mais próxima,
+se houver uma dentro da tolerância; senão fica na posição uniforme. Assim o
+número de slides não muda e nenhum slide fica curto demais.
+
+Configuração (variáveis de ambiente):
+  - SLIDE_TIMING: uniform, sentences ou silence (padrão uniform)
+  - SLIDE_MIN_SECONDS: duração mínima de um slide (padrão 1.0)
+  - SLIDE_SNAP_TOLERANCE: distância máxima do corte uniforme até a pausa,
+                          em fração da duração uniforme (padrão 0.5)
+  - SILENCE_THRESHOLD_DB: janela é silêncio abaixo do pico menos X dB (padrão 35)
+  - SILENCE_MIN_MS: pausa mínima para virar corte (padrão 200)
+"""
+
+import os
+
+from wav_utils import wav_info
+
+# ========================================
+# CONFIGURAÇÕES
+# ========================================
+
+SLIDE_TIMING_MODES = ("uniform", "sentences", "silence")
+SLIDE_TIMING = os.environ.get("SLIDE_TIMING", "uniform")
+SLIDE_MIN_SECONDS = float(os.environ.get("SLIDE_MIN_SECONDS", "1.0"))
+SLIDE_SNAP_TOLERANCE = float(os.environ.get("SLIDE_SNAP_TOLERANCE", "0.5"))
+SILENCE_THRESHOLD_DB = float(os.environ.get("SILENCE_THRESHOLD_DB", "35"))
+SILENCE_MIN_MS = int(os.environ.get("SILENCE_MIN_MS", "200"))
+SILENCE_WINDOW_MS = 10          # Resolução da varredura de energia
+SCAN_BLOCK_WINDOWS = 6000       # Janelas por bloco (60s com janelas de 10ms)
+
+SAMPLE_DTYPES = {1: "u1", 2: "<i2", 4: "<i4"}
+
+def validate_timing(mode=None):
+    """Modo de tempo dos slides validado (ValueError se desconhecido)"""
+    mode = mode or SLIDE_TIMING
+    if mode not in SLIDE_TIMING_MODES:
+        raise ValueError(f"Modo de tempo dos slides inválido: '{mode}' "
+                         f"(use {', '.join(SLIDE_TIMING_MODES)})")
+    return mode
+
+# ========================================
+# PAUSAS
+# ========================================
+
+def wav_samples(audio_path):
+    """Amostras do WAV mapeadas em memória: array (frames, canais), sem leitura antecipada"""
+    import numpy as np
+    info = wav_info(audio_path)
+    dtype = SAMPLE_DTYPES.get(info["sampwidth"])
+    if dtype is None:
+        raise ValueError(f"WAV com {info['sampwidth'] * 8} bits não suportado na detecção de pausas")
+    if not info["frames"]:
+        return np.zeros((0, info["channels"]), dtype=dtype), info["sample_rate"]
+    samples = np.memmap(audio_path, dtype=dtype, mode="r", offset=info["data_offset"],
+                        shape=(info["frames"], info["channels"]))
+    return samples, info["sample_rate"]
+
+def window_energy_db(samples, window):
+    """Energia (dB, média dos quadrados) de cada janela de 'window' frames"""
+    import numpy as np
+    n_windows = len(samples) // window
+    energy = np.empty(n_windows, dtype=np.float64)
+    center = 128.0 if samples.dtype == np.uint8 else 0.0
+    for first in range(0, n_windows, SCAN_BLOCK_WINDOWS):
+        last = min(n_windows, first + SCAN_BLOCK_WINDOWS)
+        block = np.asarray(samples[first * window:last * window], dtype=np.float32)
+        if center:
+            block -= center
+        block = block.reshape(last - first, -1)
+        energy[first:last] = np.einsum("ij,ij->i", block, block) / block.shape[1]
+    return 10.0 * np.log10(energy + 1e-12)
+
+def silence_gaps(audio_path, threshold_db=SILENCE_THRESHOLD_DB, min_ms=SILENCE_MIN_MS):
+    """
+    Pausas internas do áudio (início, fim) em segundos
+    Silêncio no começo e no fim do arquivo não conta (não separa slides).
+    """
+    import numpy as np
+    samples, sample_rate = wav_samples(audio_path)
+    window = max(1, sample_rate * SILENCE_WINDOW_MS // 1000)
+    db = window_energy_db(samples, window)
+    if not len(db):
+        return []
+
+    quiet = db < db.max() - threshold_db
+    edges = np.diff(np.concatenate(([0], quiet.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    min_windows = max(1, int(np.ceil(min_ms / SILENCE_WINDOW_MS)))
+    keep = (ends - starts >= min_windows) & (starts > 0) & (ends < len(db))
+    seconds = window / sample_rate
+    return [(float(s * seconds), float(e * seconds)) for s, e in zip(starts[keep], ends[keep])]
+
+def sentence_gaps(audio_path):
+    """Intervalos entre frases consecutivas do alinhamento (vazio sem alinhamento)"""
+    from alignment import load_alignment
+    alignment = load_alignment(audio_path)
+    if not alignment:
+        return []
+    sentences = alignment.get("sentences", [])
+    return [(prev["end"], cur["start"]) for prev, cur in zip(sentences, sentences[1:])]
+
+# ========================================
+# CORTES
+# ========================================
+
+def place_cuts(duration, slides, candidates, min_slide=SLIDE_MIN_SECONDS,
+               tolerance=SLIDE_SNAP_TOLERANCE):
+    """
+    Instantes dos cortes entre slides (slides - 1 valores, crescentes)
+
+    Cada corte uniforme vai para o candidato mais próximo dentro de
+    tolerance * (duration / slides), respeitando a duração mínima dos slides
+    de antes e de depois; sem candidato válido, fica na posição uniforme.
+    """
+    step = duration / slides
+    min_slide = min(min_slide, step / 2)
+    max_shift = tolerance * step
+    cuts, prev, snapped = [], 0.0, 0
+    for k in range(1, slides):
+        ideal = k * step
+        lo = prev + min_slide
+        hi = duration - (slides - k) * min_slide
+        options = [c for c in candidates if lo <= c <= hi and abs(c - ideal) <= max_shift]
+        if options:
+            cut = min(options, key=lambda c: abs(c - ideal))
+            snapped += 1
+        else:
+            cut = min(max(ideal, lo), hi)
+        cuts.append(cut)
+        prev = cut
+    return cuts, snapped
+
+def slide_durations(audio_path, slides, duration, mode=None):
+    """
+    Duração de cada slide (soma = duration)
+
+    Args:
+        audio_path: WAV da narração
+        slides: número de imagens
+        duration: duração do áudio em segundos
+        mode: uniform, sentences ou silence (padrão SLIDE_TIMING)
+    """
+    mode = validate_timing(mode)
+    if mode == "uniform" or slides < 2:
+        return [duration / slides] * slides
+
+    try:
+        gaps = sentence_gaps(audio_path) if mode == "sentences" else silence_gaps(audio_path)
+    except (ValueError, OSError, ImportError) as e:
+        print(f"⚠️ Pausas não detectadas ({e}) - slides com duração uniforme")
+        return [duration / slides] * slides
+    if not gaps:
+        print(f"⚠️ Nenhuma pausa encontrada (modo {mode}) - slides com duração uniforme")
+        return [duration / slides] * slides
+
+    # Corte no meio da pausa: a troca de imagem acontece no silêncio
+    candidates = [(start + end) / 2 for start, end in gaps]
+    cuts, snapped = place_cuts(duration, slides, candidates)
+    bounds = [0.0] + cuts + [duration]
+    print(f"✂️ Tempo dos slides ({mode}): {snapped}/{slides - 1} cortes em pausas "
+          f"({len(gaps)} pausas encontradas)")
+    return [end - start for start, end in zip(bounds, bounds[1:])]
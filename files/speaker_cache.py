@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cache de latentes de condicionamento do locutor (XTTS_v2)
+O XTTS deriva o embedding do locutor e os latentes GPT do voice sample a cada
+síntese. Como o sample não muda entre jobs, calculamos uma vez e guardamos em
+disco ao lado do sample (.npz), indexado pelo hash do conteúdo do arquivo.
+
+Vozes nomeadas:
+  - "default" -> voice_sample.wav
+  - "<nome>"  -> voices/<nome>.wav
+"""
+
+import os
+import re
+import glob
+import threading
+
+from hashing import file_sha256
+
+# ========================================
+# CONFIGURAÇÕES
+# ========================================
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+VOICE_SAMPLE = os.path.join(BASE_DIR, "voice_sample.wav")
+VOICES_DIR = os.path.join(BASE_DIR, "voices")
+DEFAULT_VOICE = "default"
+
+VOICE_NAME_RE = re.compile(r"^[A-Za-z0-9_-]+$")
+
+# ========================================
+# VOZES
+# ========================================
+
+def voice_sample_path(voice=DEFAULT_VOICE):
+    """Caminho do sample de uma voz nomeada"""
+    if not voice or voice == DEFAULT_VOICE:
+        return VOICE_SAMPLE
+    if not VOICE_NAME_RE.match(voice):
+        raise ValueError(f"Nome de voz inválido: {voice}")
+    return os.path.join(VOICES_DIR, f"{voice}.wav")
+
+def list_voices():
+    """Vozes disponíveis (default + arquivos .wav em voices/)"""
+    voices = [DEFAULT_VOICE] if os.path.exists(VOICE_SAMPLE) else []
+    if os.path.isdir(VOICES_DIR):
+        voices += sorted(os.path.splitext(f)[0] for f in os.listdir(VOICES_DIR)
+                         if f.lower().endswith(".wav") and VOICE_NAME_RE.match(os.path.splitext(f)[0]))
+    return voices
+
+def latents_path(sample_path, digest):
+    """Arquivo .npz dos latentes, ao lado do sample"""
+    base, _ = os.path.splitext(sample_path)
+    return f"{base}.latents.{digest[:16]}.npz"
+
+# ========================================
+# CACHE
+# ========================================
+
+class SpeakerLatentCache:
+    """
+    Latentes do locutor em memória + disco
+
+    A chave é o sha256 do sample: se o arquivo .wav for trocado, o hash muda,
+    os latentes são recalculados e o .npz antigo é removido.
+    """
+
+    def __init__(self, model):
+        self.model = model  # tts.synthesizer.tts_model (Xtts)
+        self._mem = {}
+        self._lock = threading.Lock()
+
+    def preload(self, voices=None):
+        """Carrega (ou calcula) os latentes de todas as vozes na inicialização"""
+        for voice in voices or list_voices():
+            try:
+                self.get(voice)
+            except Exception as e:
+                print(f"⚠️ Não foi possível carregar latentes da voz '{voice}': {e}")
+
+    def get(self, voice=DEFAULT_VOICE):
+        """Retorna (gpt_cond_latent, speaker_embedding) da voz"""
+        sample_path = voice_sample_path(voice)
+        if not os.path.exists(sample_path):
+            raise FileNotFoundError(f"❌ Voice sample não encontrado: {sample_path}")
+        digest = file_sha256(sample_path)
+
+        with self._lock:
+            cached = self._mem.get(voice)
+            if cached and cached[0] == digest:
+                return cached[1]
+
+            npz_path = latents_path(sample_path, digest)
+            latents = self._load(npz_path)
+            if latents is None:
+                latents = self._compute(sample_path, npz_path)
+            self._mem[voice] = (digest, latents)
+            return latents
+
+    def _load(self, npz_path):
+        if not os.path.exists(npz_path):
+            return None
+        import numpy as np
+        import torch
+
+        try:
+            with np.load(npz_path) as data:
+                latents = (torch.from_numpy(data["gpt_cond_latent"]),
+                           torch.from_numpy(data["speaker_embedding"]))
+            print(f"⚡ Latentes do locutor carregados do cache: {os.path.basename(npz_path)}")
+            return latents
+        except Exception as e:
+            print(f"⚠️ Cache de latentes corrompido ({e}), recalculando...")
+            return None
+
+    def _compute(self, sample_path, npz_path):
+        import numpy as np
+
+        print(f"🧮 Calculando latentes do locutor: {os.path.basename(sample_path)}")
+        gpt_cond_latent, speaker_embedding = self.model.get_conditioning_latents(
+            audio_path=[sample_path]
+        )
+
+        # Remove latentes de versões antigas do sample
+        base, _ = os.path.splitext(sample_path)
+        for stale in glob.glob(f"{glob.escape(base)}.latents.*.npz"):
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+
+        tmp_path = npz_path + ".tmp.npz"
+        np.savez(tmp_path,
+                 gpt_cond_latent=gpt_cond_latent.cpu().numpy(),
+                 speaker_embedding=speaker_embedding.cpu().numpy())
+        os.replace(tmp_path, npz_path)
+        print(f"💾 Latentes salvos em: {npz_path}")
+        return gpt_cond_latent, speaker_embedding
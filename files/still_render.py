@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Renderização otimizada para slides (imagens paradas)
+Em vez de entregar ao x264 um fluxo de 24 fps com a mesma imagem repetida,
+cada slide é codificado UMA vez como um segmento de 1 frame (keyframe) e os
+segmentos são unidos pelo concat demuxer com "-c copy". As diretivas
+"duration" da lista viram timestamps (frame rate variável): o vídeo final tem
+um frame por slide, então o tempo de render praticamente não depende da
+duração do áudio.
+
+Os segmentos ficam em cache/segments/ com chave = conteúdo do frame +
+parâmetros do encoder, e são reaproveitados entre vídeos.
+
+Configuração (variáveis de ambiente):
+  - SEGMENT_CACHE_MAX_MB: limite do cache de segmentos (padrão 1024)
+  - SEGMENT_CACHE_MAX_AGE_DAYS: idade máxima sem uso (padrão 30)
+  - SEGMENT_THREADS: segmentos codificados em paralelo (padrão nº de CPUs)
+"""
+
+import os
+import time
+import tempfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+from hashing import file_sha256, text_sha256
+from image_cache import evict_cache_dir
+from encoder_profiles import video_codec_args, audio_codec_args, container_args
+import progress
+
+# ========================================
+# CONFIGURAÇÕES
+# ========================================
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SEGMENT_CACHE_DIR = os.path.join(BASE_DIR, "cache", "segments")
+SEGMENT_CACHE_MAX_MB = int(os.environ.get("SEGMENT_CACHE_MAX_MB", "1024"))
+SEGMENT_CACHE_MAX_AGE_DAYS = float(os.environ.get("SEGMENT_CACHE_MAX_AGE_DAYS", "30"))
+SEGMENT_THREADS = int(os.environ.get("SEGMENT_THREADS", str(os.cpu_count() or 1)))
+
+# ========================================
+# SEGMENTOS
+# ========================================
+
+def segment_path(frame_path, codec_args, video_filter, fps):
+    """Caminho no cache do segmento de um slide para estes parâmetros de encode"""
+    params = text_sha256(" ".join(codec_args), video_filter, str(fps))[:16]
+    return os.path.join(SEGMENT_CACHE_DIR, f"{file_sha256(frame_path)}_{params}.mp4")
+
+def encode_segment(frame_path, dst_path, codec_args, video_filter, fps):
+    """Codifica um único frame (keyframe) do slide"""
+    tmp_path = f"{dst_path}.tmp{os.getpid()}_{id(dst_path)}.mp4"
+    result = subprocess.run([
+        'ffmpeg', '-y', '-loglevel', 'error',
+        '-i', frame_path,
+        '-frames:v', '1',
+        '-vf', video_filter,
+        '-r', str(fps),
+        *codec_args,
+        '-an',
+        tmp_path
+    ], stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    if result.returncode != 0:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise Exception(f"Falha ao codificar segmento de {os.path.basename(frame_path)}: "
+                        f"{result.stderr[-2000:]}")
+    os.replace(tmp_path, dst_path)
+
+def _prepare_segment(frame_path, codec_args, video_filter, fps):
+    dst_path = segment_path(frame_path, codec_args, video_filter, fps)
+    if os.path.exists(dst_path):
+        os.utime(dst_path)  # Marca uso recente para a política de idade
+        return dst_path, True
+    encode_segment(frame_path, dst_path, codec_args, video_filter, fps)
+    return dst_path, False
+
+def prepare_segments(frames, codec_args, video_filter, fps):
+    """Segmentos dos slides (mesma ordem), codificando em paralelo só os que faltam"""
+    os.makedirs(SEGMENT_CACHE_DIR, exist_ok=True)
+    t0 = time.time()
+
+    unique = list(dict.fromkeys(frames))
+    with ThreadPoolExecutor(max_workers=max(1, SEGMENT_THREADS)) as executor:
+        results = dict(zip(unique, executor.map(
+            lambda f: _prepare_segment(f, codec_args, video_filter, fps), unique)))
+
+    hits = sum(1 for _, cached in results.values() if cached)
+    elapsed = time.time() - t0
+    print(f"🧩 Segmentos prontos em {elapsed:.2f}s "
+          f"({hits}/{len(unique)} do cache, {len(unique) - hits} codificados)")
+    progress.emit_timings(encode=round(elapsed, 3), segments_cache_hits=hits,
+                          segments_cache_misses=len(unique) - hits)
+
+    segments = [results[f][0] for f in frames]
+    evict_cache_dir(SEGMENT_CACHE_DIR, SEGMENT_CACHE_MAX_MB * 1024 * 1024,
+                    SEGMENT_CACHE_MAX_AGE_DAYS * 86400, keep=set(segments), label="segmento(s)")
+    return segments
+
+# ========================================
+# RENDER
+# ========================================
+
+def render_still(frames, durations, audio_path, video_path, video_filter, fps,
+                 profile=None, codec=None, duration=None, work_dir=None):
+    """
+    Renderiza o slideshow: segmentos em cache + concat com cópia do vídeo
+
+    Args:
+        frames: imagens dos slides (na ordem)
+        durations: segundos de cada slide (mesmo tamanho de frames)
+        video_filter: filtro aplicado ao codificar cada slide (escala/pad)
+        duration: duração total esperada (para progresso)
+        work_dir: onde fica a lista do concat (padrão: diretório temporário)
+    """
+    codec_args = video_codec_args(profile, codec, fps)
+    progress.emit(step="segments", total=len(set(frames)))
+    segments = prepare_segments(frames, codec_args, video_filter, fps)
+
+    # O último slide é repetido 1 frame antes do fim: assim a faixa de vídeo
+    # termina junto com o áudio (senão acabaria no início do último slide)
+    durations = list(durations)
+    if durations[-1] > 2.0 / fps:
+        durations[-1] -= 1.0 / fps
+
+    # Lista própria de cada render: nada de arquivo fixo em videos/ por ID
+    fd, filelist_path = tempfile.mkstemp(prefix="segments_", suffix=".txt", dir=work_dir)
+    with os.fdopen(fd, 'w') as f:
+        for segment, seconds in zip(segments, durations):
+            f.write(f"file '{segment}'\n")
+            f.write(f"duration {seconds:.6f}\n")
+        f.write(f"file '{segments[-1]}'\n")
+
+    t0 = time.time()
+    try:
+        result = progress.run_ffmpeg([
+            'ffmpeg', '-y',
+            '-f', 'concat',
+            '-safe', '0',
+            '-i', filelist_path,
+            '-i', audio_path,
+            '-map', '0:v:0',
+            '-map', '1:a:0',
+            '-c:v', 'copy',
+            '-vsync', 'passthrough',  # Mantém 1 frame por slide (sem duplicar para CFR)
+            *audio_codec_args(profile),
+            *container_args(profile),
+            '-shortest',
+            video_path
+        ], duration=duration, step="concat")
+    finally:
+        try:
+            os.remove(filelist_path)
+        except OSError:
+            pass
+
+    if result.returncode != 0:
+        print(f"❌ Erro ffmpeg (concat de segmentos): {result.stderr}")
+        raise Exception("Falha ao unir segmentos com ffmpeg (modo still)")
+    progress.emit_timings(mux=round(time.time() - t0, 3))
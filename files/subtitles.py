@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Legendas ASS a partir do alinhamento da síntese (alignment.py)
+As palavras de cada frase são agrupadas em blocos curtos (estilo Reels) e
+gravadas em um arquivo .ass com uma fonte de files/fonts/. O filtro "ass" do
+ffmpeg queima a legenda no mesmo passo em que o vídeo é codificado.
+
+Configuração (variáveis de ambiente):
+  - SUBTITLE_FONT: arquivo em fonts/ (padrão anton.ttf)
+  - SUBTITLE_FONT_SIZE: tamanho da fonte em pixels do vídeo (padrão 90)
+  - SUBTITLE_MAX_WORDS: palavras por bloco de legenda (padrão 3)
+  - SUBTITLE_MARGIN_V: distância da base do vídeo em pixels (padrão 480)
+"""
+
+import os
+
+# ========================================
+# CONFIGURAÇÕES
+# ========================================
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+FONTS_DIR = os.path.join(BASE_DIR, "fonts")
+SUBTITLE_FONT = os.environ.get("SUBTITLE_FONT", "anton.ttf")
+SUBTITLE_FONT_SIZE = int(os.environ.get("SUBTITLE_FONT_SIZE", "90"))
+SUBTITLE_MAX_WORDS = int(os.environ.get("SUBTITLE_MAX_WORDS", "3"))
+SUBTITLE_MARGIN_V = int(os.environ.get("SUBTITLE_MARGIN_V", "480"))
+
+# ========================================
+# FUNÇÕES AUXILIARES
+# ========================================
+
+def font_family(font_file=SUBTITLE_FONT):
+    """Nome da família da fonte (é por ele que o libass encontra o arquivo em fonts/)"""
+    path = os.path.join(FONTS_DIR, font_file)
+    try:
+        from PIL import ImageFont
+        return ImageFont.truetype(path, 20).getname()[0]
+    except (ImportError, OSError):
+        return os.path.splitext(font_file)[0]
+
+def ass_time(seconds):
+    """Segundos -> H:MM:SS.cc (formato do ASS)"""
+    centis = int(round(max(0.0, seconds) * 100))
+    hours, centis = divmod(centis, 360000)
+    minutes, centis = divmod(centis, 6000)
+    secs, centis = divmod(centis, 100)
+    return f"{hours}:{minutes:02d}:{secs:02d}.{centis:02d}"
+
+def _ass_text(text):
+    return text.replace("\\", "").replace("{", "(").replace("}", ")").replace("\n", " ")
+
+# ========================================
+# LEGENDAS
+# ========================================
+
+def build_cues(alignment, max_words=SUBTITLE_MAX_WORDS, offset=0.0):
+    """
+    Blocos de legenda (início, fim, texto) com até max_words palavras, sem
+    atravessar frases. offset desloca os tempos (blocos de vídeo paralelos).
+    """
+    cues = []
+    for sentence in alignment.get("sentences", []):
+        words = sentence.get("words") or []
+        groups = [words[i:i + max(1, max_words)] for i in range(0, len(words), max(1, max_words))]
+        for i, group in enumerate(groups):
+            start = group[0]["start"]
+            end = groups[i + 1][0]["start"] if i + 1 < len(groups) else sentence["end"]
+            start, end = start - offset, end - offset
+            if end <= 0 or end <= start:
+                continue
+            cues.append((max(0.0, start), end, " ".join(w["word"] for w in group)))
+    return cues
+
+def write_ass(alignment, ass_path, width, height, offset=0.0):
+    """Grava o arquivo .ass; retorna o nº de blocos de legenda"""
+    cues = build_cues(alignment, offset=offset)
+    with open(ass_path, "w", encoding="utf-8") as f:
+        f.write("[Script Info]\n")
+        f.write("ScriptType: v4.00+\n")
+        f.write(f"PlayResX: {width}\n")
+        f.write(f"PlayResY: {height}\n")
+        f.write("WrapStyle: 0\n")
+        f.write("ScaledBorderAndShadow: yes\n\n")
+        f.write("[V4+ Styles]\n")
+        f.write("Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, "
+                "BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, "
+                "BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding\n")
+        f.write(f"Style: Default,{font_family()},{SUBTITLE_FONT_SIZE},&H00FFFFFF,&H00FFFFFF,"
+                f"&H00000000,&H80000000,0,0,0,0,100,100,0,0,1,6,2,2,60,60,{SUBTITLE_MARGIN_V},1\n\n")
+        f.write("[Events]\n")
+        f.write("Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text\n")
+        for start, end, text in cues:
+            f.write(f"Dialogue: 0,{ass_time(start)},{ass_time(end)},Default,,0,0,0,,{_ass_text(text)}\n")
+    return len(cues)
+
+def subtitle_filter(alignment, ass_path, width, height, offset=0.0):
+    """
+    Grava o .ass e retorna o filtro do ffmpeg que queima a legenda
+    (None se não houver nenhum bloco neste trecho)
+    """
+    if not write_ass(alignment, ass_path, width, height, offset):
+        return None
+    return f"ass=filename='{ass_path}':fontsdir='{FONTS_DIR}'"
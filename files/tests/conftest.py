@@ -0,0 +1,9 @@
+# -*- coding: utf-8 -*-
+"""Os scripts ficam na raiz de files/ (sem pacote): entram no sys.path dos testes"""
+
+import os
+import sys
+
+FILES_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if FILES_DIR not in sys.path:
+    sys.path.insert(0, FILES_DIR)
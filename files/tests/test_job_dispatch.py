@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""Fila lida do banco (modo gunicorn): o limite vale mesmo com vários processos gravando"""
+
+import threading
+
+import pytest
+
+from job_queue import QueueFullError
+from job_store import JobStore
+from job_dispatch import StoreQueue
+
+def video_queue(store, max_queue):
+    return StoreQueue(store, "video", lambda job_type, payload: job_type, max_queue=max_queue)
+
+def test_enqueue_rejects_when_full(tmp_path):
+    queue = video_queue(JobStore(str(tmp_path / "jobs.db")), max_queue=2)
+    assert queue.enqueue("a", "video", {}) == 0
+    assert queue.enqueue("b", "video", {}) == 1
+    with pytest.raises(QueueFullError):
+        queue.enqueue("c", "video", {})
+    assert queue.store.get("c") is None
+    assert queue.stats()["queued"] == 2
+
+def test_concurrent_enqueue_respects_limit(tmp_path):
+    # Um JobStore por thread simula os workers do gunicorn: conexões separadas no mesmo banco
+    db_path = str(tmp_path / "jobs.db")
+    JobStore(db_path)
+    accepted, rejected = [], []
+    barrier = threading.Barrier(20)
+
+    def submit(i):
+        queue = video_queue(JobStore(db_path), max_queue=5)
+        barrier.wait()
+        try:
+            queue.enqueue(f"job_{i}", "video", {})
+            accepted.append(i)
+        except QueueFullError:
+            rejected.append(i)
+
+    threads = [threading.Thread(target=submit, args=(i,)) for i in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(60)
+
+    assert len(accepted) == 5
+    assert len(rejected) == 15
+    assert JobStore(db_path).count_by_status() == {"queued": 5}
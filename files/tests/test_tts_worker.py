@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+Pool de workers TTS com o backend stub: reciclagem, crash e timeout
+O stub lê STUB_TTS_RTF ao importar tts_worker, então os processos (spawn)
+herdam o valor definido no ambiente antes de o pool subir.
+"""
+
+import os
+import glob
+import time
+import signal
+import multiprocessing
+
+import pytest
+
+import create_audio
+from tts_worker import TTSWorkerPool, WorkerCrashedError
+
+SLOW_TEXT = "uma frase longa o bastante para o stub demorar alguns segundos"  # 11 palavras
+AUDIO_PREFIX = "pytest_pool"
+
+def wait_for(condition, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+def busy_pid(pool):
+    """pid do worker do slot 0 assim que ele estiver executando um job"""
+    assert wait_for(lambda: pool.stats()["workers"]["0"]["state"] == "busy")
+    return pool.stats()["workers"]["0"]["pid"]
+
+def live_children():
+    """pids dos processos filhos ainda vivos (active_children já recolhe os zumbis)"""
+    return {proc.pid for proc in multiprocessing.active_children()}
+
+@pytest.fixture
+def start_pool(monkeypatch):
+    """Sobe um pool de 1 worker stub e, no fim, encerra e apaga os WAVs do teste"""
+    pools = []
+
+    def start(rtf=0, **kwargs):
+        monkeypatch.setenv("STUB_TTS_RTF", str(rtf))
+        pool = TTSWorkerPool(size=1, backend="stub", **kwargs).start()
+        pools.append(pool)
+        return pool
+
+    yield start
+    for pool in pools:
+        pool.shutdown()
+    for path in glob.glob(os.path.join(create_audio.AUDIOS_DIR, f"audio_{AUDIO_PREFIX}_*")):
+        os.remove(path)
+
+def test_job_is_synthesized(start_pool):
+    pool = start_pool()
+    result = pool.submit("olá mundo", f"{AUDIO_PREFIX}_ok").result(timeout=60)
+    assert os.path.basename(result["file"]) == f"audio_{AUDIO_PREFIX}_ok.wav"
+    assert os.path.getsize(result["file"]) > 44  # Cabeçalho WAV + amostras
+    assert pool.stats()["jobs_completed"] == 1
+
+def test_worker_is_recycled_after_max_jobs(start_pool):
+    pool = start_pool(max_jobs=2)
+    pids = set()
+    for i in range(5):
+        pool.submit("olá", f"{AUDIO_PREFIX}_{i}").result(timeout=60)
+        pids.add(pool.stats()["workers"]["0"]["pid"])
+    assert wait_for(lambda: pool.stats()["workers_started"] == 3)
+    stats = pool.stats()
+    assert stats["workers_recycled"] == 2
+    assert stats["jobs_completed"] == 5
+    assert stats["workers_crashed"] == 0
+    assert len(pids - {None}) == 3
+
+def test_crashed_worker_fails_job_and_restarts(start_pool):
+    pool = start_pool(rtf=2)
+    future = pool.submit(SLOW_TEXT, f"{AUDIO_PREFIX}_slow")
+    pid = busy_pid(pool)
+    os.kill(pid, signal.SIGKILL)
+    with pytest.raises(WorkerCrashedError):
+        future.result(timeout=60)
+
+    # Novo processo no lugar do que morreu atende o próximo job
+    pool.submit("olá", f"{AUDIO_PREFIX}_next").result(timeout=60)
+    stats = pool.stats()
+    assert stats["workers_crashed"] == 1
+    assert stats["jobs_failed"] == 1
+    assert stats["workers_started"] == 2
+    assert stats["workers"]["0"]["pid"] not in (None, pid)
+    assert live_children() == {stats["workers"]["0"]["pid"]}
+
+def test_failed_send_discards_live_worker(start_pool, monkeypatch):
+    # O pipe falha com o worker ainda vivo: o slot precisa matar o processo
+    # antigo antes de subir outro (senão ele fica órfão segurando o modelo)
+    spawned = []
+    original_spawn = TTSWorkerPool._spawn
+
+    class BrokenPipe:
+        def __init__(self, conn):
+            self.conn = conn
+
+        def send(self, job):
+            if job is not None:
+                raise OSError("pipe quebrado")
+            self.conn.send(job)
+
+        def __getattr__(self, name):
+            return getattr(self.conn, name)
+
+    def spawn(self, slot):
+        proc, conn = original_spawn(self, slot)
+        spawned.append((proc, conn))  # Mantém o pipe aberto, como um fd vazado
+        return proc, BrokenPipe(conn) if len(spawned) == 1 else conn
+
+    monkeypatch.setattr(TTSWorkerPool, "_spawn", spawn)
+    pool = start_pool()
+    with pytest.raises(OSError):
+        pool.submit("olá", f"{AUDIO_PREFIX}_broken").result(timeout=60)
+
+    pool.submit("olá", f"{AUDIO_PREFIX}_after").result(timeout=60)
+    first, _ = spawned[0]
+    assert not first.is_alive()
+    assert len(spawned) == 2
+    assert live_children() == {spawned[1][0].pid}
+    assert pool.stats()["workers"]["0"]["pid"] == spawned[1][0].pid
+
+def test_job_timeout_kills_worker_and_restarts(start_pool):
+    pool = start_pool(rtf=2, job_timeout=1)
+    future = pool.submit(SLOW_TEXT, f"{AUDIO_PREFIX}_slow")
+    pid = busy_pid(pool)
+    with pytest.raises(TimeoutError):
+        future.result(timeout=60)
+    assert wait_for(lambda: pool.stats()["workers"]["0"]["pid"] not in (None, pid))
+    assert pool.stats()["jobs_failed"] == 1
+
+def test_shutdown_cancels_pending_jobs(start_pool):
+    pool = start_pool(rtf=2)
+    running = pool.submit(SLOW_TEXT, f"{AUDIO_PREFIX}_slow")
+    busy_pid(pool)
+    pending = pool.submit("olá", f"{AUDIO_PREFIX}_pending")
+    pool.shutdown(timeout=30)
+    assert pending.cancelled()
+    assert running.done()
+    assert live_children() == set()
+    with pytest.raises(RuntimeError):
+        pool.submit("olá", f"{AUDIO_PREFIX}_late")
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+Entrega de callbacks contra um servidor HTTP local (http.server)
+Confere o corpo, a assinatura HMAC e as novas tentativas após respostas 5xx.
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import webhook
+
+class CallbackStub:
+    """Servidor local que grava cada POST e responde com os status da fila 'responses'"""
+
+    def __init__(self, responses=()):
+        self.requests = []
+        self.responses = list(responses)
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                stub.requests.append({"path": self.path, "headers": dict(self.headers), "body": body})
+                status = stub.responses.pop(0) if stub.responses else 200
+                self.send_response(status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/webhook/video"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+@pytest.fixture
+def stub_server(monkeypatch):
+    monkeypatch.setattr(webhook, "WEBHOOK_BACKOFF", 0.01)
+    servers = []
+
+    def factory(responses=()):
+        server = CallbackStub(responses)
+        servers.append(server)
+        return server
+
+    yield factory
+    for server in servers:
+        server.close()
+
+PAYLOAD = {"id": "video_001", "status": "completed", "timings": {"audio_run": 1.5, "total": 3.2}}
+
+def test_callback_delivers_json_payload(stub_server, monkeypatch):
+    monkeypatch.setattr(webhook, "WEBHOOK_SECRET", "")
+    server = stub_server()
+    webhook.send_callback(server.url, PAYLOAD).join(10)
+
+    assert len(server.requests) == 1
+    request = server.requests[0]
+    assert request["path"] == "/webhook/video"
+    assert request["headers"]["Content-Type"] == "application/json"
+    assert json.loads(request["body"]) == PAYLOAD
+    assert webhook.SIGNATURE_HEADER not in request["headers"]
+
+def test_callback_is_signed_with_secret(stub_server, monkeypatch):
+    monkeypatch.setattr(webhook, "WEBHOOK_SECRET", "segredo")
+    server = stub_server()
+    webhook.send_callback(server.url, PAYLOAD).join(10)
+
+    request = server.requests[0]
+    signature = request["headers"][webhook.SIGNATURE_HEADER]
+    assert signature == webhook.sign(request["body"], "segredo")
+    assert signature != webhook.sign(request["body"], "outro")
+    assert signature.startswith("sha256=") and len(signature) == 7 + 64
+
+def test_callback_retries_on_server_error(stub_server):
+    server = stub_server(responses=[500, 503])
+    thread = webhook.send_callback(server.url, PAYLOAD, retries=3)
+    thread.join(10)
+
+    assert len(server.requests) == 3
+    assert all(json.loads(r["body"]) == PAYLOAD for r in server.requests)
+
+def test_callback_gives_up_after_retries(stub_server):
+    server = stub_server(responses=[500, 500, 500, 500])
+    assert webhook._deliver(server.url, PAYLOAD, 2) is False
+    assert len(server.requests) == 2
+
+def test_unreachable_callback_returns_false(monkeypatch):
+    monkeypatch.setattr(webhook, "WEBHOOK_BACKOFF", 0.01)
+    monkeypatch.setattr(webhook, "WEBHOOK_TIMEOUT", 1)
+    assert webhook._deliver("http://127.0.0.1:9/webhook", PAYLOAD, 2) is False
+
+@pytest.mark.parametrize("url", ["ftp://host/x", "http://", "not a url", None])
+def test_invalid_callback_url_is_rejected(url):
+    with pytest.raises(ValueError):
+        webhook.validate_callback_url(url)
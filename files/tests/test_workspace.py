@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""Nomes de workspace e de log por job: IDs diferentes nunca compartilham diretório/arquivo"""
+
+import os
+
+import pytest
+
+import job_logs
+import workspace
+from hashing import safe_name
+
+COLLIDING_IDS = [("a/b", "a_b"), ("x y", "x_y"), ("a/b", "a b"), ("..", "_."), ("ação", "a__o")]
+
+@pytest.mark.parametrize("first, second", COLLIDING_IDS)
+def test_different_ids_get_different_names(first, second):
+    assert safe_name(first) != safe_name(second)
+    assert workspace.workspace_dir(first) != workspace.workspace_dir(second)
+    assert job_logs.log_path(first) != job_logs.log_path(second)
+
+@pytest.mark.parametrize("job_id", ["video_001", "lote-2024.10", "ABC123"])
+def test_safe_ids_keep_their_name(job_id):
+    assert safe_name(job_id) == job_id
+    assert os.path.basename(workspace.workspace_dir(job_id)) == job_id
+
+@pytest.mark.parametrize("job_id", ["..", ".", "../etc", "a/../../b", ""])
+def test_names_stay_inside_their_directory(job_id):
+    path = workspace.workspace_dir(job_id)
+    assert os.path.dirname(path) == workspace.WORKSPACES_DIR
+    assert os.path.basename(path) not in (".", "..", "")
+    assert os.path.dirname(job_logs.log_path(job_id)) == job_logs.JOB_LOG_DIR
+
+def test_long_ids_fit_in_a_file_name():
+    assert len(safe_name("é" * 1000).encode("utf-8")) < 255
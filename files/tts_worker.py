@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pool de workers TTS residentes
+Cada worker é um processo que carrega o modelo UMA vez e atende vários jobs,
+evitando o custo de carregar o XTTS_v2 a cada requisição.
+
+Configuração (variáveis de ambiente):
+  - TTS_WORKERS: quantidade de processos residentes (0 = modo subprocesso legado)
+  - TTS_WORKER_MAX_JOBS: jobs por worker antes de reciclar (0 = nunca recicla)
+  - TTS_BACKEND: "xtts" (modelo real) ou "stub" (sem pesos, para testes)
+"""
+
+import os
+import sys
+import time
+import queue
+import threading
+import traceback
+import multiprocessing
+from concurrent.futures import Future
+
+# ========================================
+# CONFIGURAÇÕES
+# ========================================
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+TTS_WORKERS = int(os.environ.get("TTS_WORKERS", "0"))
+TTS_WORKER_MAX_JOBS = int(os.environ.get("TTS_WORKER_MAX_JOBS", "50"))
+TTS_BACKEND = os.environ.get("TTS_BACKEND", "xtts")
+
+# Backend stub: tempo de carga simulado e fator de tempo real (segundos de
+# processamento por segundo de áudio gerado)
+STUB_LOAD_SECONDS = float(os.environ.get("STUB_TTS_LOAD_SECONDS", "0"))
+STUB_RTF = float(os.environ.get("STUB_TTS_RTF", "0"))
+STUB_SAMPLE_RATE = 24000
+STUB_SECONDS_PER_WORD = 0.35  # Duração do áudio gerado pelo stub
+
+WORKER_START_TIMEOUT = 600  # Carga do modelo em CPU pode ser lenta
+RESTART_BACKOFF = 5
+
+class WorkerCrashedError(Exception):
+    """Processo worker morreu durante a execução de um job"""
+
+# ========================================
+# BACKENDS
+# ========================================
+
+class XTTSBackend:
+    """Backend real: XTTS_v2 via create_audio.generate_audio"""
+
+    name = "xtts"
+
+    def load(self):
+        import create_audio
+        self.create_audio = create_audio
+        create_audio.ensure_audio_dir()
+        self.tts = create_audio.load_tts_model()
+        self.latents = create_audio.create_latent_cache(self.tts)
+
+    def synthesize(self, text, audio_id, voice):
+        output_path = self.create_audio.generate_audio(
+            text, audio_id, tts=self.tts, voice=voice, latents=self.latents
+        )
+        return {"file": output_path}
+
+    def synthesize_chunk(self, text, output_path, voice):
+        self.create_audio.synthesize_to_file(
+            self.tts, text, output_path, voice=voice, latents=self.latents
+        )
+        return {"file": output_path}
+
+class StubBackend:
+    """Backend falso: gera um tom senoidal com duração proporcional ao texto"""
+
+    name = "stub"
+
+    def load(self):
+        import create_audio
+        self.create_audio = create_audio
+        self.audios_dir = create_audio.AUDIOS_DIR
+        create_audio.ensure_audio_dir()
+        time.sleep(STUB_LOAD_SECONDS)
+
+    def synthesize(self, text, audio_id, voice):
+        """Um tom por frase, como o XTTS (WAV final + sidecar de alinhamento)"""
+        from wav_utils import WavConcatenator
+        from alignment import build_alignment, write_alignment
+
+        output_path = os.path.join(self.audios_dir, f"audio_{audio_id}.wav")
+        pairs = self.create_audio.split_sentence_pairs(text)
+        writer = WavConcatenator(output_path, silence_ms=self.create_audio.TTS_SENTENCE_SILENCE_MS)
+        chunk_path = f"{output_path}.chunk{os.getpid()}.wav"
+        try:
+            for _, clean in pairs:
+                self.synthesize_chunk(clean, chunk_path, voice)
+                writer.append(chunk_path)
+            writer.close()
+        except BaseException:
+            writer.abort()
+            raise
+        finally:
+            if os.path.exists(chunk_path):
+                os.remove(chunk_path)
+        write_alignment(output_path, build_alignment(
+            [original for original, _ in pairs], writer.segments, writer.sample_rate))
+        return {"file": output_path}
+
+    def synthesize_chunk(self, text, output_path, voice):
+        import math
+        import wave
+        from array import array
+
+        duration = max(0.5, STUB_SECONDS_PER_WORD * len(text.split()))
+        n_samples = int(duration * STUB_SAMPLE_RATE)
+        step = 2 * math.pi * 220 / STUB_SAMPLE_RATE
+        samples = array("h", (int(8000 * math.sin(i * step)) for i in range(n_samples)))
+
+        time.sleep(duration * STUB_RTF)
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        with wave.open(output_path, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(STUB_SAMPLE_RATE)
+            wav.writeframes(samples.tobytes())
+        return {"file": output_path}
+
+BACKENDS = {
+    XTTSBackend.name: XTTSBackend,
+    StubBackend.name: StubBackend,
+}
+
+# ========================================
+# PROCESSO WORKER
+# ========================================
+
+def _worker_main(conn, backend_name):
+    """Loop do processo worker: carrega o backend e atende jobs pelo pipe"""
+    if BASE_DIR not in sys.path:
+        sys.path.insert(0, BASE_DIR)
+
+    try:
+        started = time.time()
+        backend = BACKENDS[backend_name]()
+        backend.load()
+        conn.send(("ready", {"pid": os.getpid(), "load_time": time.time() - started}))
+    except Exception as e:
+        conn.send(("load_error", f"{e}\n{traceback.format_exc()}"))
+        return
+
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+
+        started = time.time()
+        try:
+            kind = job.pop("kind")
+            result = getattr(backend, kind)(**job)
+            result["synth_time"] = time.time() - started
+            conn.send(("ok", result))
+        except Exception as e:
+            conn.send(("error", f"{e}\n{traceback.format_exc()}"))
+
+# ========================================
+# POOL
+# ========================================
+
+class TTSWorkerPool:
+    """
+    Mantém N processos TTS residentes e distribui jobs entre eles
+
+    Cada slot do pool tem uma thread supervisora que:
+      - inicia o processo e espera o modelo carregar
+      - envia um job por vez e aguarda o resultado
+      - recicla o processo após max_jobs jobs
+      - reinicia o processo se ele morrer (o job em andamento falha)
+    """
+
+    def __init__(self, size=None, max_jobs=None, backend=None, job_timeout=300, on_ready=None):
+        self.size = size if size is not None else max(1, TTS_WORKERS)
+        self.max_jobs = max_jobs if max_jobs is not None else TTS_WORKER_MAX_JOBS
+        self.backend = backend or TTS_BACKEND
+        self.job_timeout = job_timeout
+        self.on_ready = on_ready  # on_ready(info) após cada carga do modelo (pid, load_time)
+
+        if self.backend not in BACKENDS:
+            raise ValueError(f"Backend TTS desconhecido: {self.backend}")
+
+        self._ctx = multiprocessing.get_context("spawn")
+        self._pending = queue.Queue()
+        self._stopping = threading.Event()
+        self._threads = []
+        self._lock = threading.Lock()
+        self._stats = {
+            "jobs_completed": 0,
+            "jobs_failed": 0,
+            "workers_started": 0,
+            "workers_recycled": 0,
+            "workers_crashed": 0,
+        }
+        self._slots = {}
+
+    def start(self):
+        """Inicia as threads supervisoras (cada uma sobe seu processo)"""
+        for slot in range(self.size):
+            self._slots[slot] = {"pid": None, "state": "starting", "jobs": 0}
+            thread = threading.Thread(target=self._run_slot, args=(slot,), daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        print(f"🔥 Pool TTS iniciado: {self.size} worker(s), backend={self.backend}, "
+              f"reciclagem a cada {self.max_jobs or '∞'} jobs")
+        return self
+
+    def submit(self, text, audio_id, voice="default"):
+        """Enfileira um job de síntese e retorna um Future com o resultado"""
+        return self._submit({"kind": "synthesize", "text": text, "audio_id": audio_id, "voice": voice})
+
+    def submit_chunk(self, text, output_path, voice="default"):
+        """Enfileira a síntese de um trecho (texto já sanitizado) em output_path"""
+        return self._submit({"kind": "synthesize_chunk", "text": text,
+                             "output_path": output_path, "voice": voice})
+
+    def _submit(self, job):
+        if self._stopping.is_set():
+            raise RuntimeError("Pool TTS está sendo encerrado")
+        future = Future()
+        self._pending.put((future, job))
+        return future
+
+    def stats(self):
+        """Resumo do estado do pool para o /health"""
+        with self._lock:
+            return {
+                "size": self.size,
+                "backend": self.backend,
+                "pending": self._pending.qsize(),
+                "workers": {str(k): dict(v) for k, v in self._slots.items()},
+                **self._stats,
+            }
+
+    def shutdown(self, timeout=10):
+        """Encerra os workers (jobs pendentes são cancelados)"""
+        self._stopping.set()
+        while True:
+            try:
+                future, _ = self._pending.get_nowait()
+                future.cancel()
+            except queue.Empty:
+                break
+        for thread in self._threads:
+            thread.join(timeout)
+
+    # ----------------------------------------
+    # Internos
+    # ----------------------------------------
+
+    def _set_slot(self, slot, **fields):
+        with self._lock:
+            self._slots[slot].update(fields)
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    def _spawn(self, slot):
+        """Sobe um processo worker e aguarda o modelo carregar"""
+        parent_conn, child_conn = self._ctx.Pipe()
+        proc = self._ctx.Process(
+            target=_worker_main,
+            args=(child_conn, self.backend),
+            name=f"tts-worker-{slot}",
+            daemon=True
+        )
+        proc.start()
+        child_conn.close()
+        self._set_slot(slot, pid=proc.pid, state="loading", jobs=0)
+
+        if not parent_conn.poll(WORKER_START_TIMEOUT):
+            proc.kill()
+            raise WorkerCrashedError("Timeout carregando o modelo")
+        try:
+            kind, info = parent_conn.recv()
+        except EOFError:
+            raise WorkerCrashedError("Worker morreu carregando o modelo")
+        if kind != "ready":
+            proc.join(5)
+            raise WorkerCrashedError(f"Falha ao carregar modelo: {info}")
+
+        self._count("workers_started")
+        self._set_slot(slot, state="idle")
+        print(f"✅ Worker TTS {slot} pronto (pid {proc.pid}, carga {info['load_time']:.1f}s)")
+        if self.on_ready is not None:
+            try:
+                self.on_ready(info)
+            except Exception as e:
+                print(f"⚠️ Worker TTS {slot}: erro no callback de carga: {e}")
+        return proc, parent_conn
+
+    def _stop_process(self, proc, conn):
+        try:
+            conn.send(None)
+        except (OSError, EOFError):
+            pass
+        proc.join(10)
+        if proc.is_alive():
+            proc.kill()
+            proc.join()
+        conn.close()
+
+    def _discard(self, proc, conn):
+        """Descarta um worker que falhou: mata se ainda estiver vivo e fecha o pipe"""
+        if proc.is_alive():
+            proc.kill()
+        proc.join()
+        conn.close()
+
+    def _wait_result(self, proc, conn):
+        """Aguarda o resultado do job atual, detectando crash e timeout"""
+        deadline = time.time() + self.job_timeout
+        while time.time() < deadline:
+            if conn.poll(0.5):
+                try:
+                    return conn.recv()
+                except EOFError:
+                    break
+            if not proc.is_alive():
+                break
+        else:
+            proc.kill()
+            proc.join()
+            raise TimeoutError(f"Job TTS excedeu {self.job_timeout}s")
+        raise WorkerCrashedError(f"Worker TTS (pid {proc.pid}) morreu durante o job "
+                                 f"(exitcode {proc.exitcode})")
+
+    def _run_slot(self, slot):
+        proc = conn = None
+        jobs_done = 0
+
+        while not self._stopping.is_set():
+            if proc is None:
+                try:
+                    proc, conn = self._spawn(slot)
+                    jobs_done = 0
+                except WorkerCrashedError as e:
+                    print(f"❌ Worker TTS {slot}: {e}")
+                    self._count("workers_crashed")
+                    self._set_slot(slot, pid=None, state="restarting")
+                    self._stopping.wait(RESTART_BACKOFF)
+                    continue
+
+            try:
+                future, job = self._pending.get(timeout=0.5)
+            except queue.Empty:
+                if not proc.is_alive():
+                    print(f"⚠️ Worker TTS {slot} morreu ocioso, reiniciando...")
+                    self._count("workers_crashed")
+                    self._discard(proc, conn)
+                    proc = conn = None
+                continue
+
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            self._set_slot(slot, state="busy")
+            try:
+                conn.send(job)
+                kind, payload = self._wait_result(proc, conn)
+            except (WorkerCrashedError, TimeoutError, OSError) as e:
+                print(f"💥 Worker TTS {slot}: {e}")
+                self._count("workers_crashed")
+                self._count("jobs_failed")
+                future.set_exception(e)
+                self._discard(proc, conn)
+                proc = conn = None
+                self._set_slot(slot, pid=None, state="restarting")
+                continue
+
+            jobs_done += 1
+            self._set_slot(slot, state="idle", jobs=jobs_done)
+            if kind == "ok":
+                self._count("jobs_completed")
+                future.set_result(payload)
+            else:
+                self._count("jobs_failed")
+                future.set_exception(RuntimeError(payload))
+
+            if self.max_jobs and jobs_done >= self.max_jobs:
+                print(f"♻️ Reciclando worker TTS {slot} após {jobs_done} jobs")
+                self._count("workers_recycled")
+                self._stop_process(proc, conn)
+                proc = conn = None
+
+        if proc is not None:
+            self._stop_process(proc, conn)
+        self._set_slot(slot, pid=None, state="stopped")
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Utilitários de WAV (PCM) usando só a biblioteca padrão
+A concatenação é feita em streaming, bloco a bloco, sem carregar os chunks
+inteiros em memória. A duração sai do cabeçalho (chunks "fmt " e "data"),
+sem ler as amostras; formatos que não são WAV PCM usam o ffprobe.
+"""
+
+import os
+import wave
+import struct
+import subprocess
+
+BLOCK_FRAMES = 64 * 1024
+PCM_FORMATS = (1, 0xFFFE)  # WAVE_FORMAT_PCM, WAVE_FORMAT_EXTENSIBLE
+
+# ========================================
+# CABEÇALHO E DURAÇÃO
+# ========================================
+
+def wav_info(path):
+    """
+    Lê o cabeçalho de um WAV PCM sem carregar as amostras
+
+    Returns:
+        dict com channels, sampwidth, sample_rate, data_offset e frames
+
+    Raises:
+        ValueError: não é um WAV PCM válido
+    """
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        riff = f.read(12)
+        if len(riff) < 12 or riff[:4] != b"RIFF" or riff[8:12] != b"WAVE":
+            raise ValueError(f"Não é um arquivo WAV: {path}")
+        fmt = None
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                raise ValueError(f"WAV sem chunk de dados: {path}")
+            chunk_id, chunk_size = struct.unpack("<4sI", header)
+            if chunk_id == b"fmt ":
+                fmt = struct.unpack("<HHIIHH", f.read(16))
+                f.seek(chunk_size - 16 + (chunk_size & 1), os.SEEK_CUR)
+            elif chunk_id == b"data":
+                if fmt is None:
+                    raise ValueError(f"WAV sem chunk 'fmt ': {path}")
+                data_offset = f.tell()
+                break
+            else:
+                f.seek(chunk_size + (chunk_size & 1), os.SEEK_CUR)
+
+    format_tag, channels, sample_rate, _, block_align, bits = fmt
+    if format_tag not in PCM_FORMATS or not channels or not sample_rate or not block_align:
+        raise ValueError(f"WAV não é PCM (formato {format_tag}): {path}")
+    # Tamanho real limitado ao arquivo (WAVs gravados em streaming podem ter 0 ou 0xFFFFFFFF)
+    data_size = size - data_offset if chunk_size in (0, 0xFFFFFFFF) else min(chunk_size, size - data_offset)
+    return {
+        "channels": channels,
+        "sampwidth": block_align // channels,
+        "sample_rate": sample_rate,
+        "data_offset": data_offset,
+        "frames": data_size // block_align,
+    }
+
+def ffprobe_duration_us(path):
+    """Duração em microssegundos pelo ffprobe (qualquer formato de áudio)"""
+    result = subprocess.run([
+        'ffprobe', '-v', 'error',
+        '-show_entries', 'format=duration',
+        '-of', 'default=noprint_wrappers=1:nokey=1',
+        path
+    ], capture_output=True, text=True)
+    if result.returncode != 0 or not result.stdout.strip():
+        raise ValueError(f"ffprobe não conseguiu ler a duração de {path}: {result.stderr.strip()}")
+    return int(round(float(result.stdout.strip()) * 1_000_000))
+
+def audio_duration_us(path):
+    """Duração do áudio em microssegundos (cabeçalho do WAV; ffprobe nos demais formatos)"""
+    try:
+        info = wav_info(path)
+        return info["frames"] * 1_000_000 // info["sample_rate"]
+    except ValueError:
+        try:
+            return ffprobe_duration_us(path)
+        except FileNotFoundError:
+            raise ValueError(f"Formato de áudio não suportado sem ffprobe: {path}")
+
+# ========================================
+# CONCATENAÇÃO
+# ========================================
+
+class WavConcatenator:
+    """
+    Escreve um WAV final a partir de vários WAVs, na ordem em que são anexados
+
+    O arquivo é escrito em <destino>.partial e só é movido para o destino em
+    close(), então quem lê o destino nunca vê um WAV pela metade.
+    """
+
+    def __init__(self, output_path, silence_ms=0):
+        self.output_path = output_path
+        self.silence_ms = silence_ms
+        self.segments = []  # (frame inicial, nº de frames) de cada chunk
+        self._tmp_path = output_path + ".partial"
+        self._out = None
+        self._params = None
+        self._frames = 0
+
+    def append(self, chunk_path):
+        """Anexa um chunk (com silêncio antes, exceto no primeiro)"""
+        with wave.open(chunk_path, "rb") as chunk:
+            params = (chunk.getnchannels(), chunk.getsampwidth(), chunk.getframerate())
+            if self._out is None:
+                self._params = params
+                self._out = wave.open(self._tmp_path, "wb")
+                self._out.setnchannels(params[0])
+                self._out.setsampwidth(params[1])
+                self._out.setframerate(params[2])
+            elif params != self._params:
+                raise ValueError(f"Formato incompatível em {chunk_path}: {params} != {self._params}")
+            elif self.silence_ms > 0:
+                self._write_silence()
+
+            start = self._frames
+            while True:
+                data = chunk.readframes(BLOCK_FRAMES)
+                if not data:
+                    break
+                self._out.writeframesraw(data)
+                self._frames += len(data) // (params[0] * params[1])
+            self.segments.append((start, self._frames - start))
+
+    def _write_silence(self):
+        channels, sampwidth, rate = self._params
+        remaining = int(rate * self.silence_ms / 1000)
+        block = b"\0" * (min(remaining, BLOCK_FRAMES) * channels * sampwidth)
+        self._frames += remaining
+        while remaining > 0:
+            n = min(remaining, BLOCK_FRAMES)
+            self._out.writeframesraw(block[:n * channels * sampwidth])
+            remaining -= n
+
+    @property
+    def sample_rate(self):
+        return self._params[2] if self._params else None
+
+    def close(self):
+        """Finaliza o cabeçalho e publica o arquivo no destino"""
+        if self._out is None:
+            raise ValueError("Nenhum chunk foi anexado")
+        self._out.close()  # wave atualiza o cabeçalho com o total de frames
+        os.replace(self._tmp_path, self.output_path)
+
+    def abort(self):
+        if self._out is not None:
+            self._out.close()
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
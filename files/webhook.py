@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Callbacks de conclusão (webhooks)
+Quando um job termina, o servidor faz POST do status em JSON para a URL
+informada pelo cliente - o n8n pode esperar o callback em vez de consultar
+/status em loop.
+
+Configuração (variáveis de ambiente):
+  - WEBHOOK_TIMEOUT: timeout de cada tentativa em segundos (padrão 10)
+  - WEBHOOK_RETRIES: tentativas antes de desistir (padrão 3)
+  - WEBHOOK_SECRET: se definido, cada callback leva o cabeçalho
+    X-Webhook-Signature: sha256=<HMAC-SHA256 do corpo com o segredo>
+"""
+
+import os
+import hmac
+import json
+import time
+import hashlib
+import threading
+import urllib.request
+from urllib.parse import urlparse
+
+# ========================================
+# CONFIGURAÇÕES
+# ========================================
+
+WEBHOOK_TIMEOUT = float(os.environ.get("WEBHOOK_TIMEOUT", "10"))
+WEBHOOK_RETRIES = int(os.environ.get("WEBHOOK_RETRIES", "3"))
+WEBHOOK_SECRET = os.environ.get("WEBHOOK_SECRET", "")
+WEBHOOK_BACKOFF = 2.0  # Segundos antes da 2ª tentativa (dobra a cada falha)
+SIGNATURE_HEADER = "X-Webhook-Signature"
+
+# ========================================
+# ENVIO
+# ========================================
+
+def validate_callback_url(url):
+    """Aceita apenas URLs http(s) com host; levanta ValueError caso contrário"""
+    parsed = urlparse(url) if isinstance(url, str) else None
+    if parsed is None or parsed.scheme not in ("http", "https") or not parsed.netloc:
+        raise ValueError("'callback_url' deve ser uma URL http:// ou https://")
+    return url
+
+def sign(body, secret):
+    """Valor do cabeçalho de assinatura: sha256=<HMAC-SHA256 hex do corpo>"""
+    return "sha256=" + hmac.new(secret.encode("utf-8"), body, hashlib.sha256).hexdigest()
+
+def post_json(url, payload, timeout=None):
+    """POST síncrono; retorna o status HTTP (levanta exceção em erro de rede/HTTP)"""
+    if timeout is None:
+        timeout = WEBHOOK_TIMEOUT
+    data = json.dumps(payload).encode("utf-8")
+    headers = {"Content-Type": "application/json", "User-Agent": "video-automation-webhook"}
+    if WEBHOOK_SECRET:
+        headers[SIGNATURE_HEADER] = sign(data, WEBHOOK_SECRET)
+    req = urllib.request.Request(url, data=data, method="POST", headers=headers)
+    with urllib.request.urlopen(req, timeout=timeout) as response:
+        return response.status
+
+def _deliver(url, payload, retries):
+    delay = WEBHOOK_BACKOFF
+    for attempt in range(1, retries + 1):
+        try:
+            status = post_json(url, payload)
+            print(f"📨 Callback entregue ({status}) para job {payload.get('id')}: {url}")
+            return True
+        except Exception as e:
+            print(f"⚠️ Callback falhou (tentativa {attempt}/{retries}) para {url}: {e}")
+            if attempt < retries:
+                time.sleep(delay)
+                delay *= 2
+    return False
+
+def send_callback(url, payload, retries=WEBHOOK_RETRIES):
+    """Envia o callback em segundo plano (não bloqueia a fila de jobs)"""
+    thread = threading.Thread(target=_deliver, args=(url, payload, max(1, retries)),
+                              name="webhook", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Workspaces por job e biblioteca de imagens por conteúdo
+Cada vídeo renderiza em work/<id>/ com a PRÓPRIA lista de imagens, então jobs
+em paralelo não enxergam (nem apagam) os arquivos uns dos outros.
+
+As imagens ficam uma única vez em cache/library/<sha256>.<ext> (enviadas por
+upload ou importadas de imagens/ - cada conteúdo é copiado só na primeira vez).
+O workspace só tem hardlinks para a biblioteca, numerados na ordem do vídeo.
+
+Referências aceitas na lista "images" de um job:
+  - "foto.jpg": arquivo em imagens/ (importado para a biblioteca no pedido)
+  - "sha256:<hash>": imagem já presente na biblioteca (ex.: enviada em POST /images)
+
+Os arquivos de imagens/ são consultados pelo índice (image_index.py): hash e
+validação (decodificação completa) só rodam para arquivos novos ou modificados,
+e uploads são decodificados antes de entrar na biblioteca.
+
+Configuração (variáveis de ambiente):
+  - IMAGE_LIBRARY_MAX_MB: limite da biblioteca (padrão 4096)
+  - IMAGE_LIBRARY_MAX_AGE_DAYS: idade máxima sem uso (padrão 30)
+"""
+
+import os
+import re
+import time
+import shutil
+import hashlib
+import threading
+
+from hashing import CHUNK_SIZE, safe_name
+from image_cache import evict_cache_dir
+from image_index import ImageIndex, decode_image, IMAGE_EXTENSIONS
+
+# ========================================
+# CONFIGURAÇÕES
+# ========================================
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+IMGS_DIR = os.path.join(BASE_DIR, "imagens")
+IMAGE_LIBRARY_DIR = os.path.join(BASE_DIR, "cache", "library")
+WORKSPACES_DIR = os.path.join(BASE_DIR, "work")
+IMAGE_LIBRARY_MAX_MB = int(os.environ.get("IMAGE_LIBRARY_MAX_MB", "4096"))
+IMAGE_LIBRARY_MAX_AGE_DAYS = float(os.environ.get("IMAGE_LIBRARY_MAX_AGE_DAYS", "30"))
+
+REF_PREFIX = "sha256:"
+WORKSPACE_MIN_AGE = 600  # Segundos antes de um workspace órfão poder ser removido
+
+_SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+
+_index = None
+_index_lock = threading.Lock()
+
+# ========================================
+# FUNÇÕES AUXILIARES
+# ========================================
+
+def _link(src, dst):
+    """Hardlink atômico de src em dst (cópia se o filesystem não suportar)"""
+    tmp = f"{dst}.tmp{os.getpid()}.{threading.get_ident()}"
+    try:
+        os.link(src, tmp)
+    except OSError:
+        shutil.copyfile(src, tmp)
+    os.replace(tmp, dst)
+
+def _extension(filename):
+    ext = os.path.splitext(filename)[1].lower()
+    return ".jpg" if ext == ".jpeg" else ext
+
+# ========================================
+# BIBLIOTECA DE IMAGENS
+# ========================================
+
+def library_path(sha):
+    """Arquivo da biblioteca com este hash (None se não existir)"""
+    if not _SHA256_RE.match(sha):
+        return None
+    for ext in (".jpg", ".png"):
+        path = os.path.join(IMAGE_LIBRARY_DIR, f"{sha}{ext}")
+        if os.path.exists(path):
+            return path
+    return None
+
+def image_index():
+    """Índice de imagens no banco de jobs (aberto no primeiro uso)"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = ImageIndex()
+        return _index
+
+def _store_stream(stream, ext, expected_sha=None):
+    """
+    Copia o conteúdo para a biblioteca calculando o sha256; retorna (sha, tmp ou None)
+    Se o hash diferir de expected_sha (ou sem expected_sha), a imagem é
+    decodificada antes de entrar - ValueError se estiver corrompida.
+    """
+    os.makedirs(IMAGE_LIBRARY_DIR, exist_ok=True)
+    tmp = os.path.join(IMAGE_LIBRARY_DIR, f".upload{os.getpid()}.{threading.get_ident()}{ext}")
+    h = hashlib.sha256()
+    size = 0
+    try:
+        with open(tmp, "wb") as f:
+            for chunk in iter(lambda: stream.read(CHUNK_SIZE), b""):
+                h.update(chunk)
+                f.write(chunk)
+                size += len(chunk)
+        if size == 0:
+            raise ValueError("imagem vazia")
+        sha = h.hexdigest()
+        info = decode_image(tmp) if sha != expected_sha else None
+        if library_path(sha) is None:
+            os.replace(tmp, os.path.join(IMAGE_LIBRARY_DIR, f"{sha}{ext}"))
+        return sha, info
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+def import_image(path, sha=None):
+    """
+    Coloca a imagem na biblioteca e retorna o sha256
+    É cópia (não hardlink): o n8n pode sobrescrever o arquivo em imagens/ e o
+    conteúdo da biblioteca não pode mudar depois de indexado. Com o sha do
+    índice e a imagem já na biblioteca, o arquivo nem é lido.
+    """
+    ext = _extension(path)
+    if ext not in IMAGE_EXTENSIONS:
+        raise ValueError(f"Formato de imagem não suportado: {os.path.basename(path)}")
+    if sha is not None and library_path(sha) is not None:
+        return sha
+    try:
+        with open(path, "rb") as f:
+            return _store_stream(f, ext, expected_sha=sha)[0]
+    except ValueError as e:
+        raise ValueError(f"Imagem inválida: {os.path.basename(path)} - {e}")
+
+def store_upload(stream, filename):
+    """
+    Grava um upload (file-like) na biblioteca, validando a imagem
+    Retorna {"sha256", "width", "height", "format"}
+    """
+    ext = _extension(filename or "")
+    if ext not in IMAGE_EXTENSIONS:
+        raise ValueError(f"Formato de imagem não suportado: {filename!r}")
+    try:
+        sha, (width, height, fmt) = _store_stream(stream, ext)
+    except ValueError as e:
+        raise ValueError(f"Imagem inválida: {filename!r} - {e}")
+    return {"sha256": sha, "width": width, "height": height, "format": fmt}
+
+def resolve_images(images=None):
+    """
+    Converte a lista de imagens de um job em referências "sha256:<hash>"
+
+    Args:
+        images: nomes em imagens/ e/ou "sha256:<hash>"; None = todas de imagens/
+                (ordem alfabética, imagens vazias ou corrompidas ignoradas)
+
+    Raises:
+        ValueError com as referências que não existem ou não são imagens válidas
+    """
+    index = image_index()
+    if images is None:
+        if not os.path.isdir(IMGS_DIR):
+            raise ValueError(f"Pasta de imagens não encontrada: {IMGS_DIR}")
+        entries = [entry for entry in index.sync(IMGS_DIR) if entry["verified"]]
+        if not entries:
+            raise ValueError("Nenhuma imagem válida encontrada na pasta imagens/")
+        return [REF_PREFIX + import_image(os.path.join(IMGS_DIR, entry["name"]), entry["sha256"])
+                for entry in entries]
+
+    names = [os.path.basename(entry) for entry in images if not entry.startswith(REF_PREFIX)]
+    indexed = index.lookup(IMGS_DIR, names) if names else {}
+    refs, missing, invalid = [], [], []
+    for entry in images:
+        if entry.startswith(REF_PREFIX):
+            sha = entry[len(REF_PREFIX):].lower()
+            if library_path(sha) is None:
+                missing.append(entry)
+                continue
+            refs.append(REF_PREFIX + sha)
+            continue
+        name = os.path.basename(entry)
+        indexed_entry = indexed.get(name)
+        if indexed_entry is None:
+            missing.append(entry)
+        elif not indexed_entry["verified"]:
+            invalid.append(f"{entry} ({indexed_entry['error']})")
+        else:
+            refs.append(REF_PREFIX + import_image(os.path.join(IMGS_DIR, name), indexed_entry["sha256"]))
+    if missing:
+        raise ValueError(f"Imagens não encontradas: {missing}")
+    if invalid:
+        raise ValueError(f"Imagens inválidas: {invalid}")
+    if not refs:
+        raise ValueError("Lista de imagens vazia")
+    return refs
+
+def evict_library():
+    """Aplica os limites de tamanho/idade da biblioteca (workspaces mantêm seus hardlinks)"""
+    return evict_cache_dir(IMAGE_LIBRARY_DIR, IMAGE_LIBRARY_MAX_MB * 1024 * 1024,
+                           IMAGE_LIBRARY_MAX_AGE_DAYS * 86400, label="imagem(ns) da biblioteca")
+
+# ========================================
+# WORKSPACES
+# ========================================
+
+def workspace_dir(job_id):
+    return os.path.join(WORKSPACES_DIR, safe_name(job_id))
+
+def create_workspace(job_id, refs):
+    """
+    Monta work/<id>/images/ com hardlinks para a biblioteca, na ordem de refs
+    ("sha256:<hash>"; recria do zero se já existir). Retorna o diretório.
+    """
+    workdir = workspace_dir(job_id)
+    images_dir = os.path.join(workdir, "images")
+    shutil.rmtree(workdir, ignore_errors=True)
+    os.makedirs(images_dir)
+
+    missing = []
+    for index, ref in enumerate(refs):
+        src = library_path(ref[len(REF_PREFIX):]) if ref.startswith(REF_PREFIX) else None
+        if src is None:
+            missing.append(ref)
+            continue
+        os.utime(src)  # Marca uso recente para a política de idade
+        _link(src, os.path.join(images_dir, f"{index:04d}_{os.path.basename(src)}"))
+    if missing:
+        shutil.rmtree(workdir, ignore_errors=True)
+        raise ValueError(f"Imagens ausentes da biblioteca: {missing}")
+    return workdir
+
+def prepare_workspace(job_id, images=None):
+    """Workspace montado no pedido ou, se não existir (ex.: job recuperado), montado agora"""
+    workdir = workspace_dir(job_id)
+    if os.path.isdir(os.path.join(workdir, "images")):
+        return workdir
+    return create_workspace(job_id, resolve_images(images))
+
+def workspace_images(workdir):
+    """Imagens do workspace na ordem do vídeo"""
+    images_dir = os.path.join(workdir, "images")
+    return [os.path.join(images_dir, f) for f in sorted(os.listdir(images_dir))]
+
+def remove_workspace(job_id):
+    shutil.rmtree(workspace_dir(job_id), ignore_errors=True)
+
+def purge_workspaces(active_ids):
+    """Remove workspaces de jobs que não estão mais na fila/executando"""
+    if not os.path.isdir(WORKSPACES_DIR):
+        return 0
+    keep = {safe_name(job_id) for job_id in active_ids}
+    cutoff = time.time() - WORKSPACE_MIN_AGE
+    removed = 0
+    for name in os.listdir(WORKSPACES_DIR):
+        path = os.path.join(WORKSPACES_DIR, name)
+        try:
+            if name in keep or os.path.getmtime(path) > cutoff:
+                continue
+        except OSError:
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+        removed += 1
+    return removed
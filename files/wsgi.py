@@ -0,0 +1,14 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ponto de entrada WSGI para produção (gunicorn)
+Cada worker importa este módulo depois do fork: a API passa a usar o banco de
+jobs como fila e um único worker, eleito por lock de arquivo, executa os jobs.
+
+Uso: gunicorn -c gunicorn.conf.py wsgi:app
+"""
+
+import server
+
+server.start_worker()
+app = server.app